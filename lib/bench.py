@@ -0,0 +1,277 @@
+'''
+Benchmark harness for MARC to BIBFRAME conversion
+
+Converts each input, by default the bundled test corpus (test/resource/*.mrx & std-examples.zip),
+and writes a JSON report with records/sec, peak RSS and the time spent in each stage of processing:
+
+python -m bibframe.bench -o bench.json
+python -m bibframe.bench --loops 5 records.mrx more-records.mrc
+
+Stages: parse (XML or ISO 2709 parsing), bootstrap & main (transform phases),
+specials (leader/006/007/008), json (Versa JSON serialization), rdf, and other (everything else,
+e.g. plug-ins & work ID computation). Stage times are exclusive, so they add up to the total.
+
+Inputs are all converted in the one process, so the peak RSS reported after each input
+(process_peak_rss) is the peak for the process so far, including all earlier inputs.
+'''
+
+import os
+import sys
+import json
+import glob
+import time
+import logging
+import zipfile
+import argparse
+import platform
+import functools
+from io import BytesIO
+from contextlib import contextmanager
+from collections import OrderedDict
+
+try:
+    import resource
+except ImportError:
+    #Not available on Windows
+    resource = None
+
+from amara3.inputsource import inputsourcetype
+
+from bibframe.reader import bfconvert, marc, BOOTSTRAP_PHASE
+from bibframe.reader.marcxml import handle_marcxml_source
+from bibframe.reader.marc21 import handle_marc21_source
+from bibframe.writer import rdf, versajson
+
+STAGES = ['parse', 'bootstrap', 'main', 'specials', 'json', 'rdf', 'other']
+
+#Where the test corpus is, when running from a source checkout
+RESOURCEPATH = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'test', 'resource'))
+
+MARC21_EXTENSIONS = ('.mrc', '.marc', '.iso2709')
+
+
+class stage_timer(object):
+    '''
+    Accumulates exclusive time per processing stage. Time spent in a nested stage is not counted in the enclosing one
+    '''
+    def __init__(self):
+        self.totals = OrderedDict(( (stage, 0.0) for stage in STAGES ))
+        #Stack of [stage, time it was last (re)started]
+        self._stack = []
+        return
+
+    def start(self, stage):
+        now = time.perf_counter()
+        if self._stack:
+            outer = self._stack[-1]
+            self.totals[outer[0]] += now - outer[1]
+        self._stack.append([stage, now])
+        return
+
+    def stop(self):
+        now = time.perf_counter()
+        stage, started = self._stack.pop()
+        self.totals[stage] += now - started
+        if self._stack: self._stack[-1][1] = now
+        return
+
+    def wrap(self, stage, func):
+        '''
+        Return a version of func which times its calls under the given stage.
+        stage can also be a function to pick the stage from the call arguments
+        '''
+        @functools.wraps(func)
+        def timed(*args, **kwargs):
+            self.start(stage(*args, **kwargs) if callable(stage) else stage)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.stop()
+        return timed
+
+
+class timed_sink(object):
+    '''
+    Wraps the record handler coroutine, so that conversion isn't counted as parse time, and counting the records sent
+    '''
+    def __init__(self, sink, timer):
+        self._sink = sink
+        self._timer = timer
+        self.records = 0
+        return
+
+    def __next__(self):
+        return self.send(None)
+
+    def send(self, value):
+        if value is not None: self.records += 1
+        self._timer.start('other')
+        try:
+            return self._sink.send(value)
+        finally:
+            self._timer.stop()
+
+    def throw(self, *args):
+        return self._sink.throw(*args)
+
+    def close(self):
+        return self._sink.close()
+
+
+def phase_stage(params, transforms, input_model, phase_target):
+    return 'bootstrap' if phase_target == BOOTSTRAP_PHASE else 'main'
+
+
+@contextmanager
+def instrumented(timer):
+    '''
+    Temporarily wrap the functions for each stage of processing with timers
+    '''
+    patches = [
+        (marc, 'process_marcpatterns', phase_stage),
+        (marc, 'gather_bootstrap_workid_data', 'bootstrap'),
+        (marc, 'process_specials', 'specials'),
+        (marc, 'dump_record_links', 'json'),
+        (versajson.writer, 'record', 'json'),
+        (rdf, 'process', 'rdf'),
+        (rdf.stream_writer, 'process', 'rdf'),
+    ]
+    originals = [ (obj, name, getattr(obj, name)) for obj, name, stage in patches ]
+    try:
+        for obj, name, stage in patches:
+            setattr(obj, name, timer.wrap(stage, getattr(obj, name)))
+        yield timer
+    finally:
+        for obj, name, func in originals:
+            setattr(obj, name, func)
+
+
+def peak_rss():
+    '''
+    Peak resident set size of this process so far, in bytes, or None if unavailable
+    '''
+    if resource is None: return None
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    #Reported in bytes on Mac OS X, but in kilobytes elsewhere
+    return maxrss if sys.platform == 'darwin' else maxrss * 1024
+
+
+def load_inputs(paths):
+    '''
+    Generate (name, content as bytes) for each input file, or each MARC/XML file within a zip file
+    '''
+    for path in paths:
+        if zipfile.is_zipfile(path):
+            with zipfile.ZipFile(path) as zf:
+                for member in zf.namelist():
+                    if member.endswith('/'): continue
+                    yield os.path.basename(path) + '/' + member, zf.read(member)
+        else:
+            with open(path, 'rb') as f:
+                yield os.path.basename(path), f.read()
+
+
+def run_one(name, content, config=None, rdfout=True, logger=logging):
+    '''
+    Convert the content of one input, returning the results of timing it
+    '''
+    handle_marc_source = handle_marc21_source if name.lower().endswith(MARC21_EXTENSIONS) else handle_marcxml_source
+    timer = stage_timer()
+    sinks = []
+
+    def timed_handler(source, sink, args, logger, model_factory):
+        sink = timed_sink(sink, timer)
+        sinks.append(sink)
+        timer.start('parse')
+        try:
+            return handle_marc_source(source, sink, args, logger, model_factory)
+        finally:
+            timer.stop()
+    timed_handler.readmode = handle_marc_source.readmode
+    timed_handler.makeinputsource = handle_marc_source.makeinputsource
+
+    with open(os.devnull, 'w') as out, open(os.devnull, 'w') as rdfnt:
+        with instrumented(timer):
+            start = time.perf_counter()
+            bfconvert([BytesIO(content)], handle_marc_source=timed_handler, out=out,
+                        rdfnt=rdfnt if rdfout else None, config=config, logger=logger,
+                        defaultsourcetype=inputsourcetype.stream)
+            elapsed = time.perf_counter() - start
+
+    #Whatever isn't attributed to a stage, e.g. setting up & finishing off
+    timer.totals['other'] += elapsed - sum(timer.totals.values())
+    records = sum(( sink.records for sink in sinks ))
+    return OrderedDict([
+        ('records', records),
+        ('seconds', elapsed),
+        ('records_per_sec', records / elapsed if elapsed else None),
+        ('stages', timer.totals),
+    ])
+
+
+def run(inputs=None, loops=3, config=None, rdfout=True, logger=logging):
+    '''
+    Benchmark conversion of each input, returning the report as a dict
+
+    inputs - list of file paths. Zip files are expanded. Defaults to the bundled test corpus
+    loops - number of times to convert each input. The fastest run is reported
+    config - configuration for bfconvert, as a dict
+    rdfout - if True also generate RDF (N-Triples)
+    '''
+    if not inputs:
+        inputs = sorted(glob.glob(os.path.join(RESOURCEPATH, '*.mrx')))
+        inputs.append(os.path.join(RESOURCEPATH, 'std-examples.zip'))
+
+    results = []
+    total_records = total_seconds = 0
+    total_stages = OrderedDict(( (stage, 0.0) for stage in STAGES ))
+    for name, content in load_inputs(inputs):
+        best = min(( run_one(name, content, config=config, rdfout=rdfout, logger=logger) for i in range(loops) ),
+                    key=lambda result: result['seconds'])
+        best['process_peak_rss'] = peak_rss()
+        results.append(OrderedDict([('input', name)] + list(best.items())))
+        total_records += best['records']
+        total_seconds += best['seconds']
+        for stage, seconds in best['stages'].items():
+            total_stages[stage] += seconds
+
+    return OrderedDict([
+        ('python', '{0} {1}'.format(platform.python_implementation(), platform.python_version())),
+        ('platform', platform.platform()),
+        ('timestamp', time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())),
+        ('loops', loops),
+        ('rdf', rdfout),
+        ('inputs', results),
+        ('total', OrderedDict([
+            ('records', total_records),
+            ('seconds', total_seconds),
+            ('records_per_sec', total_records / total_seconds if total_seconds else None),
+            ('stages', total_stages),
+            ('process_peak_rss', peak_rss()),
+        ])),
+    ])
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(prog='python -m bibframe.bench')
+    parser.add_argument('inputs', metavar='inputs', nargs='*',
+                        help='MARC/XML or MARC21 (.mrc) files, or zip files of them, to convert. Defaults to the bundled test corpus')
+    parser.add_argument('-o', '--out', type=argparse.FileType('w'), default=sys.stdout,
+        help='File where the JSON report should be written (default: write to stdout)')
+    parser.add_argument('-n', '--loops', type=int, default=3,
+        help='Number of times to convert each input, reporting the fastest (default: 3)')
+    parser.add_argument('-c', '--config', type=argparse.FileType('r'),
+        help='JSON config file for the conversion')
+    parser.add_argument('--no-rdf', action='store_true',
+        help='Skip generating RDF')
+    args = parser.parse_args()
+
+    #Keep conversion warnings from cluttering the report
+    logger = logging.getLogger('bibframe.bench')
+    logger.setLevel(logging.ERROR)
+
+    config = json.load(args.config) if args.config else None
+    report = run(args.inputs, loops=args.loops, config=config, rdfout=not args.no_rdf, logger=logger)
+    json.dump(report, args.out, indent=2)
+    args.out.write('\n')
+    args.out.close()
@@ -0,0 +1,128 @@
+'''
+In-memory Versa model with its links indexed by origin, and by origin & relationship
+
+The writers, plug-ins & postprocessing look up a resource's links over & over with
+model.match(origin, rel), which on the plain Versa memory model scans every link each time.
+This model answers such lookups from hash indexes, and otherwise behaves just like the memory
+model it extends (order of links, handling of duplicates, IDs), so it can be used in its place
+
+It's the default model for bfconvert. Choose another with the versa-model-cls config setting, e.g.
+
+{"versa-model-cls": "versa.driver.memory.connection"}
+'''
+
+from versa.driver import memory
+from versa import ORIGIN, RELATIONSHIP, TARGET, ATTRIBUTES
+
+
+def _memory_refuses_duplicates():
+    '''
+    Return True if the memory model of this version of Versa ignores the addition of a link identical to one it already has
+    '''
+    model = memory.connection()
+    for i in range(2):
+        model.add('http://example.org/origin', 'http://example.org/rel', 'target', {})
+    return model.size() == 1
+
+MEMORY_REFUSES_DUPLICATES = _memory_refuses_duplicates()
+
+
+class indexed_connection(memory.connection):
+    '''
+    Versa memory model which indexes its links, by origin and by origin & relationship
+
+    Indexes hold the positions of links in the model. They're kept up to date as links are
+    added at the end, and otherwise rebuilt as first needed
+    '''
+    def create_space(self):
+        memory.connection.create_space(self)
+        self._reset_index()
+        return
+
+    def _reset_index(self):
+        #The list of links indexed, & how many of them
+        self._indexed = None
+        self._indexed_count = 0
+        self._by_origin = {}
+        self._by_origin_rel = {}
+        return
+
+    def _update_index(self):
+        '''
+        Bring the indexes up to date with the links
+        '''
+        rels = self._relationships
+        if rels is not self._indexed or len(rels) < self._indexed_count:
+            #Links have been replaced or removed
+            self._reset_index()
+            self._indexed = rels
+        by_origin, by_origin_rel = self._by_origin, self._by_origin_rel
+        for pos in range(self._indexed_count, len(rels)):
+            origin, rel = rels[pos][ORIGIN], rels[pos][RELATIONSHIP]
+            by_origin.setdefault(origin, []).append(pos)
+            by_origin_rel.setdefault((origin, rel), []).append(pos)
+        self._indexed_count = len(rels)
+        return
+
+    def copy(self, contents=True):
+        '''Create a copy of this model, optionally without contents (i.e. just configuration)'''
+        cp = self.__class__(self._baseiri, self._attr_cls)
+        if contents: cp.add_many(self._relationships)
+        return cp
+
+    def add(self, origin, rel, target, attrs=None, index=None):
+        '''
+        Add one relationship to the extent, as for the memory model. Where that refuses duplicates,
+        they're looked for among the links with the same origin & relationship, rather than all of them
+        '''
+        if not origin:
+            raise ValueError('Relationship origin cannot be null')
+        if not rel:
+            raise ValueError('Relationship ID cannot be null')
+        #As with the memory model, attributes are copied into the attributes class
+        attrs = self._attr_cls(attrs or {})
+        item = (origin, rel, target, attrs)
+        rels = self._relationships
+        if MEMORY_REFUSES_DUPLICATES:
+            self._update_index()
+            if any(( rels[pos] == item for pos in self._by_origin_rel.get((origin, rel), ()) )): return None
+
+        if index is not None:
+            rels.insert(index, item)
+            #Positions of the following links have shifted
+            self._indexed = None
+            return index
+        rels.append(item)
+        if self._indexed is rels:
+            #Index straight away, so that links added while iterating over matches are seen, as for the memory model
+            self._update_index()
+        return len(rels) - 1
+
+    def match(self, origin=None, rel=None, target=None, attrs=None, include_ids=False):
+        '''
+        Iterator over relationships that match a pattern of components, as for the memory model
+        '''
+        if not origin:
+            yield from memory.connection.match(self, origin, rel, target, attrs, include_ids)
+            return
+        self._update_index()
+        if rel:
+            positions = self._by_origin_rel.setdefault((origin, rel), [])
+        else:
+            positions = self._by_origin.setdefault(origin, [])
+        rels = self._relationships
+        #The list of positions grows if matching links are added during iteration
+        i = 0
+        while i < len(positions):
+            index = positions[i]
+            i += 1
+            curr_rel = rels[index]
+            if target and target != curr_rel[TARGET]:
+                continue
+            if attrs and any(( k not in curr_rel[ATTRIBUTES] or curr_rel[ATTRIBUTES].get(k) != v for k, v in attrs.items() )):
+                continue
+            if include_ids:
+                yield index, (curr_rel[0], curr_rel[1], curr_rel[2], curr_rel[3].copy())
+            else:
+                yield (curr_rel[0], curr_rel[1], curr_rel[2], curr_rel[3].copy())
+        return
@@ -68,7 +68,7 @@ from versa.util import simple_lookup
 
 from amara3 import iri
 
-from bibframe import BFZ, BFLC, g_services, BF_INIT_TASK, BF_MARCREC_TASK, BF_MATRES_TASK, BF_FINAL_TASK
+from bibframe import BL, BFZ, BFLC, g_services, BF_INIT_TASK, BF_MARCREC_TASK, BF_MATRES_TASK, BF_FINAL_TASK
 
 RDF_NAMESPACE = 'http://www.w3.org/1999/02/22-rdf-syntax-ns#'
 RDFS_NAMESPACE = 'http://www.w3.org/2000/01/rdf-schema#'
@@ -81,6 +81,74 @@ def pairwise(iterable):
     next(b, None)
     return zip_longest(a, b)
 
+
+def chunk_eval(s, vocabbase=BL):
+    '''
+    Used when configuration is stored in JSON and one of these labelizer instructions is an eval-able string
+    A known Python injection attack vector, so mentioned in README
+
+    vocabbase - the configured default vocabulary base IRI, which the strings (e.g. lambdas) can refer to
+    '''
+    if isinstance(s, str) and len(s) > 5:
+        s = eval(s, {'I': I, 'vocabbase': vocabbase}, locals())
+    return s
+
+
+class label_rule(object):
+    '''
+    One labelizer rule dictionary from the config, with any eval-able strings compiled
+
+    rule - rule dictionary, with keys separator, wrapper, multivalSeparator, marcOrder & properties
+    vocabbase - the configured default vocabulary base IRI, for the eval-able strings
+    '''
+    def __init__(self, rule, vocabbase=BL):
+        self.marc_order = rule.get('marcOrder', False)
+        self.separator = chunk_eval(rule.get('separator', ' '), vocabbase)
+        self.wrapper = chunk_eval(rule.get('wrapper', None), vocabbase)
+        self.multivalsep = chunk_eval(rule.get('multivalSeparator', ' | '), vocabbase)
+        self.props = rule.get('properties', [])
+        self.prop_set = set(self.props)
+        return
+
+    def label(self, links, links_by_rel):
+        '''
+        Build the label from a resource's links, or return '' if there's nothing to go on
+
+        links - list of the resource's links, in model (i.e. MARC) order
+        links_by_rel - dict from relationship to the list of the resource's links with it, in model order
+        '''
+        if self.marc_order:
+            link_stream = pairwise(( l for l in links if l[RELATIONSHIP] in self.prop_set ))
+        else:
+            link_stream = pairwise(( l for p in self.props for l in links_by_rel.get(p, ()) ))
+
+        separator, wrapper, multivalsep = self.separator, self.wrapper, self.multivalsep
+        label = ''
+        for (link1, link2) in link_stream:
+            _o1,rel1,target1,_a1 = link1
+            _o2,rel2,target2,_a2 = link2 if link2 is not None else (None, None, None, None)
+
+            ctx = {
+                'currentProperty': rel1,
+                'currentValue': target1,
+                'nextProperty': rel2,
+                'nextValue': target2,
+            }
+
+            _wrapper = wrapper(ctx) if callable(wrapper) else wrapper
+            if _wrapper:
+                target1 = _wrapper[0]+target1+_wrapper[1]
+
+            label += target1
+            if rel2 == rel1:
+                _multivalsep = multivalsep(ctx) if callable(multivalsep) else multivalsep
+                label += _multivalsep
+            elif rel2 is not None:
+                _separator = separator(ctx) if callable(separator) else separator
+                label += _separator
+        return label
+
+
 #A plug-in is a series of callables, each of which handles a phase of
 #Process
 
@@ -94,12 +162,26 @@ class labelizer(object):
         #print ('BF_INIT_TASK', linkreport.PLUGIN_ID)
         self._config = config or {}
         #If you need state maintained throughout a full processing pass, you can use instance attributes
+        #Compile the rules for each type up front, rather than for each resource,
+        #for the default vocabulary base IRI, & again only if a run is configured with another
+        self._rules = {}
+        self._compile(BL)
         #Now set up the other plug-in phases
         pinfo[BF_MARCREC_TASK] = self.handle_record_links
         pinfo[BF_MATRES_TASK] = self.handle_materialized_resource
         pinfo[BF_FINAL_TASK] = self.finalize
         return
 
+    def _compile(self, vocabbase):
+        '''
+        Compile the rules for each type in the config, for a vocabulary base IRI
+        '''
+        rules_by_type = self._rules[vocabbase] = {}
+        for typ, rule in self._config.get('lookup', {}).items():
+            rules = rule if isinstance(rule, list) else [rule]
+            rules_by_type[typ] = [ label_rule(r, vocabbase) for r in rules ]
+        return rules_by_type
+
     #acyncio.Task is used to manage the tasks, so it's a good idea to use the standard decorator
     #if you don't know what that means you should still be OK just using the sample syntax below as is, and just writign a regular function
     #But you can squeeze out a lot of power by getting to know the wonders of asyncio.Task
@@ -117,67 +199,26 @@ class labelizer(object):
         #print ('BF_MARCREC_TASK', linkreport.PLUGIN_ID)
         #Get the configured default vocabulary base IRI
         vocabbase = params['vocabbase']
+        rules_by_type = self._rules[vocabbase] if vocabbase in self._rules else self._compile(vocabbase)
         for obj,_r,typ,_a in model.match(None, VTYPE_REL, None):
-            # build labels based on model order, iterating over every property of
-            # every resource, and building the label if that property is consulted
-            rule = self._config['lookup'].get(typ)
-            if rule is None: continue
+            rules = rules_by_type.get(typ)
+            if rules is None: continue
 
-            rules = rule if isinstance(rule, list) else [rule]
+            # a single pass over the resource's links, which the rules then draw on,
+            # in model order or in the order of their properties
+            links = list(model.match(obj, None, None))
+            links_by_rel = {}
+            for l in links:
+                links_by_rel.setdefault(l[RELATIONSHIP], []).append(l)
 
             label = ''
             for rule in rules:
-
-                def chunk_eval(s):
-                    # used when configuration is stored in JSON and one of these labelizer instructions is an eval-able string
-                    # a known Python injection attack vector, so mentioned in README
-                    if isinstance(s, str) and len(s) > 5:
-                        s = eval(s, {'I': I}, locals())
-                    return s
-
-                marc_order = rule.get('marcOrder', False)
-                separator = chunk_eval(rule.get('separator', ' '))
-                wrapper = chunk_eval(rule.get('wrapper', None))
-                multivalsep = chunk_eval(rule.get('multivalSeparator', ' | '))
-                props = rule.get('properties', [])
-
-                if marc_order:
-                    link_stream = pairwise((l for l in model.match(obj, None, None) if l[1] in props))
-                else:
-                    link_stream = pairwise((l for p in props for l in model.match(obj, p, None)))
-
                 #print("LABELIZING {} of type {}".format(obj, typ))
-                for (link1, link2) in link_stream:
-
-                    _o1,rel1,target1,_a1 = link1
-                    _o2,rel2,target2,_a2 = link2 if link2 is not None else (None, None, None, None)
-
-                    ctx = {
-                        'currentProperty': rel1,
-                        'currentValue': target1,
-                        'nextProperty': rel2,
-                        'nextValue': target2,
-                    }
-
-                    _wrapper = wrapper(ctx) if callable(wrapper) else wrapper
-                    if _wrapper:
-                        target1 = _wrapper[0]+target1+_wrapper[1]
-
-                    label += target1
-                    if rel2 == rel1:
-                        _multivalsep = multivalsep(ctx) if callable(multivalsep) else multivalsep
-                        label += _multivalsep
-                    elif rel2 is not None:
-                        _separator = separator(ctx) if callable(separator) else separator
-                        label += _separator
-                    #print("current label", label)
-
+                label = rule.label(links, links_by_rel)
                 if label:
                     model.add(obj, I(RDFS_LABEL), label)
                     break # we've found a rule that produces a label, so skip other rules
 
-                label = ''
-
             if not label and 'default-label' in self._config:
                 # if we've gone through all rules and not produced a label, yield specified default
                 model.add(obj, I(RDFS_LABEL), self._config['default-label'])
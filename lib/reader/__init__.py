@@ -69,8 +69,54 @@ class transform_set(object):
                     self.iris[BOOTSTRAP_PHASE] = WORK_HASH_TRANSFORMS_ID
                     self.compiled[BOOTSTRAP_PHASE] = WORK_HASH_TRANSFORMS
         #raise(Exception(repr(self.iris)))
+        #The default bootstrap transforms just gather work hash data, which can be taken straight from the input fields
+        self.workhash_only = self.compiled[BOOTSTRAP_PHASE] == WORK_HASH_TRANSFORMS
+        #Index each phase's transforms for fast matching against input fields
+        self.compiled = { phase: transform_index(transforms) for phase, transforms in self.compiled.items() }
         self.specials=special_transforms(specials_vocab)
 
+class transform_index(dict):
+    '''
+    Dict of transforms for one phase, keyed by match spec (e.g. '245-10$a'),
+    along with an index of those transforms by tag, then indicator pattern, then subfield code,
+    so that matching an input field doesn't require building & probing all the possible match specs
+
+    Indicator patterns are a pair of characters, '#' for blank, and '?' as a single char wildcard
+    '''
+    def __init__(self, transforms=None):
+        dict.__init__(self, transforms or {})
+        #tag -> [{indicator pattern or None: (transform, match spec)}, {subfield code: {indicator pattern or None: (transform, match spec)}}]
+        self._bytag = {}
+        for spec, funcinfo in self.items():
+            if not isinstance(spec, str): continue
+            head, sfsep, code = spec.partition('$')
+            tag, indsep, indpat = head.partition('-')
+            if indsep and len(indpat) != 2: continue #Can never match
+            fields, sfs = self._bytag.setdefault(tag, ({}, {}))
+            target = sfs.setdefault(code, {}) if sfsep else fields
+            target[indpat or None] = (funcinfo, spec)
+        #(tag, ind1, ind2) -> resolved matches for each tag & indicators combination, computed as first needed
+        self._resolved = {}
+        return
+
+    def resolve(self, tag, ind1, ind2):
+        '''
+        Return the transforms applicable to a field with the given tag & indicators, as a pair:
+        a list of (transform, match spec) for the field as a whole, and a dict from
+        subfield code to such a list. In each list the most specific matches come first
+        '''
+        key = (tag, ind1, ind2)
+        resolved = self._resolved.get(key)
+        if resolved is None:
+            fields, sfs = self._bytag.get(tag, ({}, {}))
+            #Most specific first: exact indicators, then with each wildcarded, then none specified
+            patterns = (ind1 + ind2, '?' + ind2, ind1 + '?', None)
+            field_matches = [ fields[p] for p in patterns if p in fields ]
+            sf_matches = { code: [ specs[p] for p in patterns if p in specs ] for code, specs in sfs.items() }
+            resolved = self._resolved[key] = (field_matches, sf_matches)
+        return resolved
+
+
 def force_tuple(val):
     return val if isinstance(val, tuple) else (val,)
 
@@ -0,0 +1,196 @@
+'''
+Incremental (delta) conversion, skipping records which haven't changed since the last run
+
+A manifest, kept in a sqlite file, maps each record's 001 control number to its 005
+timestamp, a fingerprint of its content, and the IDs of the resources generated from it.
+On the next run against the same manifest:
+
+ * Records whose fingerprint matches are skipped
+ * Changed & new records are converted as usual, and the manifest updated
+ * Resource IDs a changed record no longer produces, and no other record in the manifest does
+   either, are retracted
+ * Records marked as deleted (leader 05 = d) are dropped from the manifest and their resources
+   retracted in the same way
+
+Retractions are written to a separate stream, as a JSON array of objects, e.g.:
+
+[{"control": "ocm00012345", "status": "changed", "retracted": ["http://example.org/bBsHvHu8S-M"]}]
+
+The fingerprint covers the conversion settings (base IRIs, config & pybibframe version) as well
+as the record content, so changing them reconverts everything. Records without an 001 are
+always converted, and not tracked
+'''
+
+import json
+import sqlite3
+
+from versa import I, ORIGIN, TARGET
+
+from bibframe.contrib.datachefids import simple_hashstring
+from .marc import marc_lookup, MARCXML_NS
+
+LEADER_REL = MARCXML_NS + '/leader'
+
+#Commit manifest changes to disk after this many records
+DEFAULT_BATCH_SIZE = 1000
+
+
+def record_fingerprint(input_model, settings=''):
+    '''
+    Fingerprint of a record's content, from its input model, as a hash string.
+    Link origins are left out, since they're just placeholders which depend on the position in the input
+
+    input_model - input model for the record
+    settings - string with any conversion settings which should also affect the fingerprint
+    '''
+    content = [ (r, t, a) for (ix, (o, r, t, a)) in input_model ]
+    return simple_hashstring(settings + json.dumps(content, sort_keys=True, default=str))
+
+
+class manifest(object):
+    '''
+    sqlite backed store of record control numbers, fingerprints and the IDs of resources generated from them
+
+    path - file for the sqlite database, created if need be
+    '''
+    def __init__(self, path, batch_size=DEFAULT_BATCH_SIZE):
+        self._conn = sqlite3.connect(path)
+        self._conn.execute('PRAGMA synchronous = NORMAL')
+        self._conn.execute('CREATE TABLE IF NOT EXISTS records (control TEXT PRIMARY KEY, stamp TEXT, fingerprint TEXT) WITHOUT ROWID')
+        self._conn.execute('CREATE TABLE IF NOT EXISTS resources (rid TEXT, control TEXT, PRIMARY KEY (rid, control)) WITHOUT ROWID')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS resources_control ON resources (control)')
+        self._conn.commit()
+        self._batch_size = batch_size
+        self._pending = 0
+        return
+
+    def fingerprint(self, control):
+        '''
+        Return the fingerprint recorded for a control number, or None if there's none
+        '''
+        row = self._conn.execute('SELECT fingerprint FROM records WHERE control = ?', (control,)).fetchone()
+        return row[0] if row else None
+
+    def resources(self, control):
+        '''
+        Return the set of resource IDs recorded for a control number
+        '''
+        return { rid for (rid,) in self._conn.execute('SELECT rid FROM resources WHERE control = ?', (control,)) }
+
+    def _orphans(self, rids):
+        #Of the given resource IDs, those which no record in the manifest produces any longer
+        return sorted(( rid for rid in rids
+                        if self._conn.execute('SELECT 1 FROM resources WHERE rid = ?', (rid,)).fetchone() is None ))
+
+    def update(self, control, stamp, fingerprint, rids):
+        '''
+        Record the fingerprint & generated resource IDs for a control number,
+        returning the list of resource IDs to be retracted as a result
+        '''
+        old = self.resources(control)
+        dropped = old - rids
+        self._conn.executemany('DELETE FROM resources WHERE rid = ? AND control = ?', ( (rid, control) for rid in dropped ))
+        self._conn.executemany('INSERT INTO resources VALUES (?, ?)', ( (rid, control) for rid in rids - old ))
+        self._conn.execute('INSERT OR REPLACE INTO records VALUES (?, ?, ?)', (control, stamp, fingerprint))
+        self._changed()
+        return self._orphans(dropped)
+
+    def remove(self, control):
+        '''
+        Drop a control number from the manifest, returning the list of resource IDs to be retracted as a result
+        '''
+        old = self.resources(control)
+        self._conn.execute('DELETE FROM resources WHERE control = ?', (control,))
+        self._conn.execute('DELETE FROM records WHERE control = ?', (control,))
+        self._changed()
+        return self._orphans(old)
+
+    def _changed(self):
+        self._pending += 1
+        if self._pending >= self._batch_size: self.commit()
+        return
+
+    def commit(self):
+        self._conn.commit()
+        self._pending = 0
+        return
+
+    def close(self):
+        self.commit()
+        self._conn.close()
+        return
+
+
+class tracker(object):
+    '''
+    Drives incremental conversion from the record handler: decides which records to skip,
+    and updates the manifest & writes retractions for the rest
+
+    path - file for the manifest sqlite database
+    retractions - stream to where retractions should be written as JSON, or None to not write them
+    settings - string with the conversion settings, which are part of each fingerprint
+    '''
+    def __init__(self, path, retractions=None, settings='', logger=None):
+        self.manifest = manifest(path)
+        self._retractions = retractions
+        self._settings = settings
+        self._logger = logger
+        self._first_retraction = True
+        self._current = None
+        self.converted = self.unchanged = self.deleted = 0
+        if self._retractions is not None: self._retractions.write('[')
+        return
+
+    def skip(self, input_model):
+        '''
+        Check a record before conversion. Return True if it should be skipped, because it's unchanged
+        since the last run, or marked as deleted (in which case its resources are retracted)
+        '''
+        self._current = None
+        control = next(( v for (code, v) in marc_lookup(input_model, '001') ), None)
+        if not control: return False
+        leader = next(( t for (o, r, t, a) in input_model.match(None, LEADER_REL) ), '')
+        if leader[5:6] == 'd':
+            self.deleted += 1
+            self._retract(control, 'deleted', self.manifest.remove(control))
+            return True
+        fingerprint = record_fingerprint(input_model, self._settings)
+        if fingerprint == self.manifest.fingerprint(control):
+            self.unchanged += 1
+            return True
+        stamp = next(( v for (code, v) in marc_lookup(input_model, '005') ), None)
+        self._current = (control, stamp, fingerprint)
+        return False
+
+    def record_converted(self, model, existing_ids):
+        '''
+        Update the manifest after a record has been converted, given its output model.
+        Generated resources include those only linked to, because they were folded, so
+        they're picked up from existing_ids
+        '''
+        if self._current is None: return
+        control, stamp, fingerprint = self._current
+        rids = set()
+        for ix, link in model:
+            rids.add(str(link[ORIGIN]))
+            target = link[TARGET]
+            if isinstance(target, I) and target in existing_ids: rids.add(str(target))
+        self.converted += 1
+        self._retract(control, 'changed', self.manifest.update(control, stamp, fingerprint, rids))
+        self._current = None
+        return
+
+    def _retract(self, control, status, rids):
+        if self._retractions is None or not (rids or status == 'deleted'): return
+        if not self._first_retraction: self._retractions.write(',\n')
+        self._first_retraction = False
+        json.dump({'control': control, 'status': status, 'retracted': rids}, self._retractions)
+        return
+
+    def close(self):
+        if self._retractions is not None: self._retractions.write(']')
+        self.manifest.close()
+        if self._logger:
+            self._logger.debug('Incremental conversion: {0} records converted, {1} unchanged, {2} deleted'.format(
+                                self.converted, self.unchanged, self.deleted))
+        return
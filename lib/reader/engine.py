@@ -2,11 +2,12 @@
 API entry point for conversion from MARC to Linked Data
 '''
 
+import json
 import logging
 from collections import defaultdict
 import warnings
-import zipfile
 import functools
+import multiprocessing
 
 from versa import I, VERSA_BASEIRI, ORIGIN, RELATIONSHIP, TARGET, ATTRIBUTES
 from versa import util
@@ -15,14 +16,24 @@ from versa.driver import memory
 from amara3.inputsource import factory as inputsource_factory, inputsourcetype
 from amara3.uxml import writer
 
-from bibframe import BFZ, BFLC, BL, register_service
+from bibframe import BFLC, BL, register_service
 from bibframe import g_services
 from bibframe import BF_INIT_TASK, BF_MARCREC_TASK, BF_FINAL_TASK
-from bibframe.writer import rdf, microxml
+from bibframe.writer import rdf, microxml, versajson, shard
+from bibframe import stats as bfstats
+from bibframe.util import materialize_cache, MATERIALIZE_CACHE_SIZE
+from bibframe.version import version_info
 
 from . import marc
+from . import parallel
+from . import idstore
+from . import delta
+from . import sources
+from .tasks import DEFAULT_PLUGIN_WINDOW
+from .record import marc_record
 from . import transform_set
 from .marcxml import handle_marcxml_source
+from .marc21 import handle_marc21_source
 
 def resolve_class(fullname):
     '''
@@ -39,8 +50,12 @@ NSSEP = ' '
 
 def bfconvert(inputs, handle_marc_source=handle_marcxml_source, entbase=None, model=None,
                 out=None, limit=None, rdfttl=None, rdfxml=None, xml=None, config=None,
+                rdfnt=None, streamrdf=False,
                 verbose=False, logger=logging, canonical=False,
-                lax=False, defaultsourcetype=inputsourcetype.unknown):
+                lax=False, defaultsourcetype=inputsourcetype.unknown, workers=None, stats=None,
+                manifest=None, retractions=None, jsonl=False,
+                out_pattern=None, rdfttl_pattern=None, rdfnt_pattern=None, xml_pattern=None, records_per_shard=None,
+                record_range=None):
     '''
     inputs - One or more open file-like object, string with MARC content, or filename or IRI. If filename or
                 IRI it's a good idea to indicate this via the defaultsourcetype parameter
@@ -48,9 +63,12 @@ def bfconvert(inputs, handle_marc_source=handle_marcxml_source, entbase=None, mo
     entbase - Base IRI to be used for creating resources.
     model - model instance for internal use
     out - file where raw Versa JSON dump output should be written (default: write to stdout)
+    jsonl - If True write the Versa JSON output as JSON Lines, a record per line, rather than a JSON array per source
     limit - Limit the number of records processed to this number. If omitted, all records will be processed.
     rdfttl - stream to where RDF Turtle output should be written
     rdfxml - stream to where RDF/XML output should be written
+    rdfnt - stream to where RDF N-Triples output should be written, a record at a time
+    streamrdf - If True write RDF Turtle output a record at a time, rather than building up a full RDF graph in memory
     config - configuration information
     verbose - If true show additional messages and information (default: False)
     logger - logging object for messages
@@ -58,6 +76,19 @@ def bfconvert(inputs, handle_marc_source=handle_marcxml_source, entbase=None, mo
     lax - If True signal to the handle_marc_source function that relaxed syntax rules should be applied
             (e.g. accept XML with namespace problems)
     defaultsourcetype - Signal indicating how best to interpret inputs to create an inputsource
+    workers - Number of worker processes over which to spread record conversion. If omitted, or 1, records are converted in this process
+    stats - stream to where instrumentation statistics (per record, rule, plug-in task and materialized type) should be written as JSON.
+            If omitted no statistics are collected
+    manifest - path of a sqlite file with a manifest of the records converted in earlier runs, for incremental conversion.
+            Records which haven't changed since are skipped. Created if need be. If omitted all records are converted
+    retractions - stream to where IDs of resources no longer generated, for incremental conversion, should be written as JSON
+    out_pattern - path pattern for sharded Versa JSON output, rather than to out, with the shard number as shard, e.g. out-{shard:04d}.json
+    rdfttl_pattern - path pattern for sharded RDF Turtle output, each shard with its own prefix declarations
+    rdfnt_pattern - path pattern for sharded RDF N-Triples output
+    xml_pattern - path pattern for sharded MicroXML output, each shard with its own root element
+    records_per_shard - maximum number of records in each shard of output. If omitted each input gets a shard of its own
+    record_range - (start, stop) pair of record numbers, as for slicing, to convert just that range of the records in each input,
+            seeking straight to them using a sidecar index, built if need be. Inputs must be uncompressed MARC/XML files
     '''
     #if stats:
     #    register_service(statsgen.statshandler)
@@ -71,7 +102,10 @@ def bfconvert(inputs, handle_marc_source=handle_marcxml_source, entbase=None, mo
 
     attr_cls = resolve_class(config.get('versa-attr-cls', 'builtins.dict'))
 
-    model_factory = functools.partial(memory.connection, attr_cls=attr_cls)
+    #By default an in-memory model indexed for fast lookup of a resource's links
+    model_cls = resolve_class(config.get('versa-model-cls', 'bibframe.model.indexed_connection'))
+
+    model_factory = functools.partial(model_cls, attr_cls=attr_cls)
 
     if 'marc_record_handler' in config:
         handle_marc_source = AVAILABLE_MARC_HANDLERS[config['marc_record_handler']]
@@ -85,95 +119,197 @@ def bfconvert(inputs, handle_marc_source=handle_marcxml_source, entbase=None, mo
         inputs = inputsource_factory(
             inputs, defaultsourcetype=defaultsourcetype, streamopenmode=readmode
         )
+        #Decompress inputs & unpack zip files on the fly, as records are read
+        inputs = sources.expand_sources(inputs, logger)
     #inputs = ( inputsource(i, streamopenmode=readmode) for i in inputs )
 
     ids = marc.idgen(entbase)
     if model is None: model = model_factory()
 
+    #Allow configuration of a separate base URI for vocab items (classes & properties)
+    #XXX: Is this the best way to do this, or rather via a post-processing plug-in
+    vb = config.get('vocab-base-uri', BL)
+
+    #RDF writers which don't need the full graph in memory
+    rdfwriters = []
+    if rdfnt is not None:
+        rdfwriters.append(rdf.stream_writer(rdfnt, 'nt'))
+    if rdfttl is not None and streamrdf:
+        rdfwriters.append(rdf.stream_writer(rdfttl, 'turtle', prefixes=rdf.prefixes(vb, entbase)))
+        rdfttl = None
+
     if any((rdfttl, rdfxml)):
         import rdflib
 
-        BFNS = rdflib.Namespace(BFZ)
-        BFCNS = rdflib.Namespace(BFZ + 'cftag/')
-        BFDNS = rdflib.Namespace(BFZ + 'dftag/')
-
         g = rdflib.Graph()
     #Intentionally not using either factory
     if canonical: global_model = memory.connection()
 
     if xml is not None:
-        xmlw = writer.raw(xml, indent='  ')
+        xmlw = writer.raw(xml)
         xmlw.start_element('bibframe')
 
     extant_resources = None
     #extant_resources = set()
+
+    #Output rolled across files, N records each, so each output gets a writer per shard
+    def versajson_shard(stream):
+        jsonout = versajson.writer(stream, lines=jsonl)
+        jsonout.start()
+        return jsonout.record, jsonout.finish
+
+    def rdf_shard(format):
+        def start_shard(stream):
+            rdfwriter = rdf.stream_writer(stream, format, prefixes=rdf.prefixes(vb, entbase))
+            return functools.partial(rdfwriter.process, to_ignore=extant_resources, logger=logger), None
+        return start_shard
+
+    def xml_shard(stream):
+        shardxmlw = writer.raw(stream)
+        shardxmlw.start_element('bibframe')
+        write_record = lambda model: microxml.process(model, shardxmlw, to_ignore=extant_resources, logger=logger)
+        return write_record, functools.partial(shardxmlw.end_element, 'bibframe')
+
+    shards = []
+    for pattern, start_shard in ((out_pattern, versajson_shard), (rdfttl_pattern, rdf_shard('turtle')),
+                                    (rdfnt_pattern, rdf_shard('nt')), (xml_pattern, xml_shard)):
+        if pattern: shards.append(shard.shard_writer(pattern, start_shard, records_per_shard=records_per_shard))
+    if out_pattern:
+        if canonical: raise Exception('Versa canonical form output cannot be sharded')
+        #Versa JSON goes to the shards instead
+        out = None
+
     def postprocess():
         #No need to bother with Versa -> RDF translation if we were not asked to generate Turtle
         if any((rdfttl, rdfxml)): rdf.process(model, g, to_ignore=extant_resources, logger=logger)
+        for rdfwriter in rdfwriters:
+            rdfwriter.process(model, to_ignore=extant_resources, logger=logger)
         if canonical: global_model.add_many([(o,r,t,a) for (rid,(o,r,t,a)) in model])
 
         if xml is not None:
             microxml.process(model, xmlw, to_ignore=extant_resources, logger=logger)
+        for sharded in shards:
+            sharded.record(model)
 
         model.create_space()
 
-    #Allow configuration of a separate base URI for vocab items (classes & properties)
-    #XXX: Is this the best way to do this, or rather via a post-processing plug-in
-    vb = config.get('vocab-base-uri', BL)
-
     transform_iris = config.get('transforms', [])
     marcspecials_vocab = config.get('marcspecials-vocab')
     transforms = transform_set(transform_iris, marcspecials_vocab)
 
     lookups = config.get('lookups', {})
 
+    #Where to keep track of the IDs of resources already generated, e.g. in memory or spilled to disk
+    id_store_config = config.get('existing-ids') or {}
+    id_store = idstore.id_store_factory(id_store_config)
+
+    collector = bfstats.collector() if stats is not None else None
+
+    #Incremental conversion, against a manifest of the records converted in earlier runs
+    #Conversion settings are part of the record fingerprints, so changing them reconverts everything
+    tracker = None
+    if manifest is not None:
+        settings = json.dumps([version_info, entbase, vb, config], sort_keys=True, default=str)
+        tracker = delta.tracker(manifest, retractions=retractions, settings=settings, logger=logger)
+
+    #IDs of materialized resources, reused within & across records and sources (which all share ids)
+    id_cache = materialize_cache(config.get('materialize-cache-size', MATERIALIZE_CACHE_SIZE))
+
     #Initialize auxiliary services (i.e. plugins)
     plugins = []
     for pc in config.get('plugins', []):
         try:
             pinfo = g_services[pc['id']]
             plugins.append(pinfo)
-            pinfo[BF_INIT_TASK](pinfo, config=pc)
+            if collector: collector.name_plugin(pinfo, pc['id'])
+            with bfstats.plugin_task(collector, pinfo, BF_INIT_TASK):
+                pinfo[BF_INIT_TASK](pinfo, config=pc)
         except KeyError:
             raise Exception('Unknown plugin {0}'.format(pc['id']))
 
     limiting = [0, limit]
     #logger=logger,
 
+    handler_kwargs = dict(entbase=entbase, vocabbase=vb, logger=logger, transforms=transforms,
+                            canonical=canonical, lookups=lookups, model_factory=model_factory)
+
+    pool = None
+    if workers and workers > 1:
+        if plugins:
+            #Plug-ins keep state across records, so they can't be spread across processes
+            warnings.warn('Plug-ins are configured, so ignoring workers setting and converting records serially')
+        elif collector:
+            #Statistics are collected in this process
+            warnings.warn('Statistics were requested, so ignoring workers setting and converting records serially')
+        elif tracker:
+            #The manifest is checked & updated in this process
+            warnings.warn('Incremental conversion was requested, so ignoring workers setting and converting records serially')
+        elif 'fork' not in multiprocessing.get_all_start_methods():
+            warnings.warn('Parallel conversion is not supported on this platform, so converting records serially')
+        else:
+            #Workers' replicas of the existing IDs are the same kind of store, but never a named file shared with the parent
+            replica_store = idstore.id_store_factory({ k: v for (k, v) in id_store_config.items() if k != 'path' })
+            pool = parallel.worker_pool(workers, handler_kwargs, id_store=id_store, replica_store=replica_store,
+                                        cache_size=id_cache.size)
+
     #Each input can have multiple MARC sources (e.g. MARC/XML files)
     #Each source can represent multiple MARC records
     #The record_handler callback receives each record in the form of an input Versa model
-    for source in inputs:
-        sink = marc.record_handler( model,
-                                    entbase=entbase,
-                                    vocabbase=vb,
-                                    limiting=limiting,
-                                    plugins=plugins,
-                                    ids=ids,
-                                    postprocess=postprocess,
-                                    out=out,
-                                    logger=logger,
-                                    transforms=transforms,
-                                    canonical=canonical,
-                                    lookups=lookups,
-                                    model_factory=model_factory)
-
-        args = dict(lax=lax)
-        handle_marc_source(source, sink, args, logger, model_factory)
-        sink.close()
+    try:
+        for source in inputs:
+            existing_ids = None
+            for sharded in shards:
+                sharded.new_source()
+            if pool:
+                sink = parallel.record_dispatcher(pool, model,
+                                                    limiting=limiting,
+                                                    postprocess=postprocess,
+                                                    out=out,
+                                                    out_lines=jsonl,
+                                                    logger=logger,
+                                                    canonical=canonical,
+                                                    materialize_cache=id_cache)
+            else:
+                existing_ids = id_store()
+                sink = marc.record_handler( model,
+                                            limiting=limiting,
+                                            plugins=plugins,
+                                            ids=ids,
+                                            postprocess=postprocess,
+                                            out=out,
+                                            out_lines=jsonl,
+                                            existing_ids=existing_ids,
+                                            stats=collector,
+                                            materialize_cache=id_cache,
+                                            delta=tracker,
+                                            plugin_window=config.get('plugin-window', DEFAULT_PLUGIN_WINDOW),
+                                            **handler_kwargs)
+
+            args = dict(lax=lax, record_range=record_range)
+            try:
+                #Per-record input models are lightweight MARC records, rather than full Versa models
+                handle_marc_source(source, sink, args, logger, marc_record)
+                sink.close()
+            finally:
+                if existing_ids is not None: existing_ids.close()
+            if limiting[1] is not None and limiting[0] >= limiting[1]:
+                #Limit reached, so don't bother with the remaining inputs
+                break
+    finally:
+        if pool: pool.close()
+        if tracker: tracker.close()
+        for sharded in shards:
+            sharded.finish()
 
     if canonical:
         out.write(repr(global_model))
 
+    if collector:
+        collector.dump(stats)
+
     if any((rdfttl, rdfxml)):
-        if vb == BFZ:
-            g.bind('bf', BFNS)
-            g.bind('bfc', BFCNS)
-            g.bind('bfd', BFDNS)
-        else:
-            g.bind('vb', rdflib.Namespace(vb))
-        if entbase:
-            g.bind('ent', entbase)
+        for prefix, ns in rdf.prefixes(vb, entbase):
+            g.bind(prefix, rdflib.Namespace(ns))
 
     if rdfttl is not None:
         logger.debug('Converting to RDF (Turtle).')
@@ -190,7 +326,8 @@ def bfconvert(inputs, handle_marc_source=handle_marcxml_source, entbase=None, mo
 
 
 AVAILABLE_MARC_HANDLERS = {
-    "http://bibfra.me/tool/pybibframe/marchandler#marcjson": handle_marcxml_source
+    "http://bibfra.me/tool/pybibframe/marchandler#marcjson": handle_marcxml_source,
+    "http://bibfra.me/tool/pybibframe/marchandler#marc21": handle_marc21_source,
 }
 
 def register_marc_handler(iri, func):
@@ -0,0 +1,228 @@
+'''
+Stores for the IDs of resources already generated (existing_ids), used to decide folding of repeated resources
+
+Selected via the existing-ids config option, e.g.:
+
+{"existing-ids": {"store": "compact"}}
+
+{"existing-ids": {"store": "sqlite", "dir": "/var/tmp"}}
+
+"memory" (the default) is a plain Python set. "compact" keeps IDs in memory as the raw
+64-bit integers behind the hash strings from simple_hashstring. "sqlite" spills IDs to
+an on-disk sqlite database, for runs too big to keep them all in memory.
+
+All stores support the subset of the set API used in processing: in, add, len & truth testing
+'''
+
+import os
+import base64
+import binascii
+import struct
+import sqlite3
+import tempfile
+from array import array
+
+#Length of the string form of a 64-bit hash from simple_hashstring
+HASH64_LEN = 11
+
+
+def split_hash_id(eid):
+    '''
+    Split an ID generated from a 64-bit simple_hashstring, with or without a base IRI,
+    into the base IRI and the raw hash integer. Return None if eid isn't of that form
+
+    >>> split_hash_id('http://example.org/bBsHvHu8S-M')
+    ('http://example.org/', 7789828486578588643)
+    >>> split_hash_id('not a hash') is None
+    True
+    '''
+    if len(eid) < HASH64_LEN: return None
+    hashstr = eid[-HASH64_LEN:]
+    try:
+        raw = base64.urlsafe_b64decode(hashstr + '=')
+    except (ValueError, binascii.Error):
+        return None
+    #Decoding skips characters outside the base64 alphabet, so check the round trip
+    if len(raw) != 8 or base64.urlsafe_b64encode(raw)[:HASH64_LEN].decode('ascii') != hashstr:
+        return None
+    return eid[:-HASH64_LEN], struct.unpack('!q', raw)[0]
+
+
+class int64_table(object):
+    '''
+    Set of 64-bit integers, as an open-addressing hash table in a flat array
+    Takes 16-32 bytes per item, rather than the 100 or so for a set of ID strings
+    '''
+    def __init__(self, size=1024):
+        self._slots = array('q', bytes(8 * size))
+        self._mask = size - 1
+        self._used = 0
+        #0 marks an empty slot, so is tracked separately
+        self._has_zero = False
+        return
+
+    def _find(self, item):
+        slots, mask = self._slots, self._mask
+        #Hash bits are already well mixed, so use the low bits directly, then probe linearly
+        ix = item & mask
+        while True:
+            val = slots[ix]
+            if val == item or val == 0: return ix
+            ix = (ix + 1) & mask
+
+    def __contains__(self, item):
+        if item == 0: return self._has_zero
+        return self._slots[self._find(item)] == item
+
+    def add(self, item):
+        if item == 0:
+            if not self._has_zero: self._used += 1
+            self._has_zero = True
+            return
+        ix = self._find(item)
+        if self._slots[ix] == item: return
+        self._slots[ix] = item
+        self._used += 1
+        if self._used * 2 > len(self._slots): self._grow()
+        return
+
+    def _grow(self):
+        old = self._slots
+        self._slots = array('q', bytes(16 * len(old)))
+        self._mask = len(self._slots) - 1
+        for item in old:
+            if item: self._slots[self._find(item)] = item
+        return
+
+    def __len__(self):
+        return self._used
+
+
+class compact_id_store(object):
+    '''
+    In-memory store of existing IDs, keeping hash IDs as raw 64-bit integers
+
+    >>> ids = compact_id_store()
+    >>> ids.add('http://example.org/bBsHvHu8S-M')
+    >>> ids.add('odd-one-out')
+    >>> 'http://example.org/bBsHvHu8S-M' in ids, 'http://example.org/B7x7vEvj-M' in ids, 'odd-one-out' in ids
+    (True, False, True)
+    >>> len(ids)
+    2
+    '''
+    def __init__(self):
+        #Base IRI -> table of hashes. Generally just one base IRI in a run
+        self._tables = {}
+        #Any IDs which aren't hashes
+        self._other = set()
+        return
+
+    def __contains__(self, eid):
+        split = split_hash_id(eid)
+        if split is None: return eid in self._other
+        base, item = split
+        table = self._tables.get(base)
+        return table is not None and item in table
+
+    def add(self, eid):
+        split = split_hash_id(eid)
+        if split is None:
+            self._other.add(eid)
+        else:
+            base, item = split
+            table = self._tables.get(base)
+            if table is None: table = self._tables[base] = int64_table()
+            table.add(item)
+        return
+
+    def __len__(self):
+        return len(self._other) + sum(( len(t) for t in self._tables.values() ))
+
+    def close(self):
+        return
+
+
+class sqlite_id_store(object):
+    '''
+    Disk-backed store of existing IDs, using sqlite. Additions are written in batches
+
+    path - file for the sqlite database, emptied of any IDs from earlier sources or runs. If omitted a
+        temporary file is used, and removed on close
+    dir - directory for the temporary file, if path is omitted
+    '''
+    def __init__(self, path=None, dir=None, batch_size=10000):
+        self._temp_path = None
+        if path is None:
+            fd, path = tempfile.mkstemp(prefix='bfexistingids-', suffix='.sqlite', dir=dir)
+            os.close(fd)
+            self._temp_path = path
+        self._conn = sqlite3.connect(path)
+        #Scratch data, so trade durability for speed
+        self._conn.execute('PRAGMA journal_mode = OFF')
+        self._conn.execute('PRAGMA synchronous = OFF')
+        self._conn.execute('CREATE TABLE IF NOT EXISTS existing_ids (id TEXT PRIMARY KEY) WITHOUT ROWID')
+        with self._conn:
+            self._conn.execute('DELETE FROM existing_ids')
+        self._batch_size = batch_size
+        self._pending = set()
+        return
+
+    def __contains__(self, eid):
+        if eid in self._pending: return True
+        return self._conn.execute('SELECT 1 FROM existing_ids WHERE id = ?', (eid,)).fetchone() is not None
+
+    def add(self, eid):
+        if eid in self: return
+        self._pending.add(eid)
+        if len(self._pending) >= self._batch_size: self.flush()
+        return
+
+    def flush(self):
+        with self._conn:
+            self._conn.executemany('INSERT OR IGNORE INTO existing_ids VALUES (?)', ( (eid,) for eid in self._pending ))
+        self._pending.clear()
+        return
+
+    def __len__(self):
+        self.flush()
+        return self._conn.execute('SELECT COUNT(*) FROM existing_ids').fetchone()[0]
+
+    def __bool__(self):
+        #Checked for every transform context, so avoid counting all the IDs
+        if self._pending: return True
+        return self._conn.execute('SELECT 1 FROM existing_ids LIMIT 1').fetchone() is not None
+
+    def close(self):
+        self.flush()
+        self._conn.close()
+        if self._temp_path: os.remove(self._temp_path)
+        return
+
+
+class memory_id_store(set):
+    '''
+    Plain in-memory store of existing IDs
+    '''
+    def close(self):
+        return
+
+
+AVAILABLE_ID_STORES = {
+    'memory': memory_id_store,
+    'compact': compact_id_store,
+    'sqlite': sqlite_id_store,
+}
+
+
+def id_store_factory(config=None):
+    '''
+    Return a function to create a new existing IDs store, given the existing-ids config, e.g.
+    {"store": "sqlite", "dir": "/var/tmp"}. Options other than store are passed on to the store class
+    '''
+    config = dict(config or {})
+    store = config.pop('store', 'memory')
+    try:
+        store_cls = AVAILABLE_ID_STORES[store]
+    except KeyError:
+        raise Exception('Unknown existing IDs store {0}'.format(store))
+    return lambda: store_cls(**config)
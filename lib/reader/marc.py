@@ -5,8 +5,8 @@ marc2bfrdf -v -o /tmp/ph1.ttl -s /tmp/ph1.stats.js -b http://example.org test/re
 
 import re
 import os
-import json
 import functools
+import time
 import logging
 import itertools
 import asyncio
@@ -23,13 +23,15 @@ from versa.driver import memory
 
 from bibframe import MARC, POSTPROCESS_AS_INSTANCE
 from bibframe import BF_INIT_TASK, BF_INPUT_TASK, BF_INPUT_XREF_TASK, BF_MARCREC_TASK, BF_MATRES_TASK, BF_FINAL_TASK
-from bibframe.util import materialize_entity
+from bibframe.util import materialize_entity, materialize_cache as default_materialize_cache
 from bibframe.isbnplus import isbn_list, compute_ean13_check
-from . import transform_set, BOOTSTRAP_PHASE, DEFAULT_MAIN_PHASE, PYBF_BOOTSTRAP_TARGET_REL, VTYPE_REL
+from bibframe.writer import versajson
+from . import transform_set, transform_index, BOOTSTRAP_PHASE, DEFAULT_MAIN_PHASE, PYBF_BOOTSTRAP_TARGET_REL, VTYPE_REL
 from .util import WORK_TYPE, INSTANCE_TYPE, subfields
 from .marcpatterns import TRANSFORMS, bfcontext
-from .marcworkidpatterns import WORK_HASH_TRANSFORMS, WORK_HASH_INPUT
+from .marcworkidpatterns import WORK_HASH_TRANSFORMS, WORK_HASH_INPUT, WORK_HASH_FIELDS
 from .marcextra import transforms as default_special_transforms
+from .tasks import plugin_executor, DEFAULT_PLUGIN_WINDOW
 
 #re https://www.loc.gov/marc/bibliographic/ecbdcntf.html
 #$6 [linking tag]-[occurrence number]/[script identification code]/[field orientation code]
@@ -174,6 +176,85 @@ def gather_workid_data(model, origin):
     return data
 
 
+def refuses_duplicates(model_factory):
+    '''
+    Return True if models from the factory ignore the addition of a link identical to one they already have,
+    as the memory models of some versions of Versa do
+    '''
+    model = model_factory()
+    for i in range(2):
+        model.add(I('http://example.org/origin'), I('http://example.org/rel'), 'target', {})
+    return model.size() == 1
+
+
+class workid_links(object):
+    '''
+    Stands in for the output model of the default bootstrap phase, keeping just the links from the
+    work, in the order the model would have them
+
+    origin - the work's ID
+    unique - if True ignore duplicate links, as the model would (see refuses_duplicates)
+    '''
+    def __init__(self, origin, unique=False):
+        self.origin = origin
+        self._targets = defaultdict(list)
+        self._seen = set() if unique else None
+        return
+
+    def add(self, origin, rel, target, attrs=None):
+        if origin != self.origin: return
+        if self._seen is not None:
+            if (rel, target) in self._seen: return
+            self._seen.add((rel, target))
+        self._targets[rel].append(target)
+        return
+
+    def workid_data(self):
+        '''
+        The data for the work hash, as gather_workid_data would find it in the model
+        '''
+        return [ [rel, target] for rel in WORK_HASH_INPUT for target in self._targets.get(rel, ()) ]
+
+
+def gather_bootstrap_workid_data(params, input_model, unique=False):
+    '''
+    Compute the data for the work hash straight from the input fields, with the same result as running
+    the default bootstrap phase (WORK_HASH_TRANSFORMS & the special transforms) through process_marcpatterns
+    then gather_workid_data, but without building a model of the bootstrap output
+
+    Like process_marcpatterns, gathers the leader, 006, 007 & 008 into params
+
+    unique - if True ignore duplicate links, as the bootstrap output model would (see refuses_duplicates)
+    '''
+    links = workid_links(I(params['default-origin']), unique=unique)
+    stats = params.get('stats')
+    for lid, marc_link in input_model:
+        origin, taglink, val, attribs = marc_link
+        if taglink == MARCXML_NS + '/leader':
+            params['leader'] = val
+            continue
+        if taglink.startswith(MARCXML_NS + '/extra/') or 'tag' not in attribs: continue
+        tag = attribs['tag']
+        if taglink.startswith(MARCXML_NS + '/control'):
+            if tag == '006':
+                params['fields006'].append(val)
+            if tag == '007':
+                params['fields007'].append(val)
+            if tag == '008':
+                params['field008'] = val
+            continue
+        rels = WORK_HASH_FIELDS.get(tag)
+        if rels is None: continue
+        for k, v in subfields(attribs):
+            rel = rels.get(k)
+            if rel is None: continue
+            if stats is not None: start = time.perf_counter()
+            links.add(links.origin, rel, v)
+            if stats is not None: stats.rule(BOOTSTRAP_PHASE, tag + '$' + k, time.perf_counter() - start)
+    process_specials(params, links)
+    return links.workid_data()
+
+
 def gather_targetid_data(model, origin, orderings=None):
     '''
     Gather the identifying info needed to create a hash for the main described resource,
@@ -189,6 +270,7 @@ def gather_targetid_data(model, origin, orderings=None):
 #XXX Generalize by using URIs for phase IDs
 def process_marcpatterns(params, transforms, input_model, phase_target):
     output_model = params['output_model']
+    if not isinstance(transforms, transform_index): transforms = transform_index(transforms)
     if phase_target == BOOTSTRAP_PHASE:
         input_model_iter = params['input_model']
     else:
@@ -199,6 +281,7 @@ def process_marcpatterns(params, transforms, input_model, phase_target):
         # XXX Is the int() cast necessary? If not we could do key=operator.itemgetter(0)
         input_model_iter = sorted(list(params['input_model']), key=lambda x: int(x[0]))
     params['to_postprocess'] = []
+    stats = params.get('stats')
     for lid, marc_link in input_model_iter:
         origin, taglink, val, attribs = marc_link
         origin = params.get('default-origin', origin)
@@ -235,41 +318,29 @@ def process_marcpatterns(params, transforms, input_model, phase_target):
         #This is where we check each incoming MARC link to see if it matches a transform into an output link (e.g. renaming 001 to 'controlCode')
         to_process = []
         #Start with most specific matches, then to most general
+        # "?" syntax in lookups is a single char wildcard. These are resolved in the transform index
+        field_matches, sf_matches = transforms.resolve(tag, indicator_list[0], indicator_list[1])
 
-        # "?" syntax in lookups is a single char wildcard
         #First with subfields, with & without indicators:
+        report_dropped = phase_target != BOOTSTRAP_PHASE and not tag in transforms
         for k, v in curr_subfields:
-            #if indicator_list == ('#', '#'):
-            lookups = [
-                '{0}-{1}{2}${3}'.format(tag, indicator_list[0], indicator_list[1], k),
-                '{0}-?{2}${3}'.format(tag, indicator_list[0], indicator_list[1], k),
-                '{0}-{1}?${3}'.format(tag, indicator_list[0], indicator_list[1], k),
-                '{0}${1}'.format(tag, k),
-            ]
-            for lookup in lookups:
-                if lookup in transforms:
-                    to_process.append((transforms[lookup], v, lookup))
-                else:
-                    # don't report on subfields for which a code-transform exists,
-                    # disregard wildcards
-                    if phase_target != BOOTSTRAP_PHASE and not tag in transforms and '?' not in lookup:
-
+            matches = sf_matches.get(k, ())
+            for funcinfo, lookup in matches:
+                to_process.append((funcinfo, v, lookup))
+            if report_dropped:
+                # don't report on subfields for which a code-transform exists,
+                # disregard wildcards
+                matched = [ lookup for funcinfo, lookup in matches ]
+                for lookup in ('{0}-{1}{2}${3}'.format(tag, indicator_list[0], indicator_list[1], k), '{0}${1}'.format(tag, k)):
+                    if lookup not in matched and '?' not in lookup:
                         params['dropped_codes'].setdefault(lookup,0)
                         params['dropped_codes'][lookup] += 1
 
-        #Now just the tag, with & without indicators
-        lookups = [
-            '{0}-{1}{2}'.format(tag, indicator_list[0], indicator_list[1]),
-            '{0}-?{2}'.format(tag, indicator_list[0], indicator_list[1]),
-            '{0}-{1}?'.format(tag, indicator_list[0], indicator_list[1]),
-            tag,
-        ]
-
         #Remember how many lookups were successful based on subfields
         subfields_results_len = len(to_process)
-        for lookup in lookups:
-            if lookup in transforms:
-                to_process.append((transforms[lookup], val, lookup))
+        #Now just the tag, with & without indicators
+        for funcinfo, lookup in field_matches:
+            to_process.append((funcinfo, val, lookup))
 
         if phase_target != BOOTSTRAP_PHASE and subfields_results_len == len(to_process) and not curr_subfields:
             # Count as dropped if subfields were not processed and theer were no matches on non-subfield lookups
@@ -282,6 +353,7 @@ def process_marcpatterns(params, transforms, input_model, phase_target):
         for funcinfo, val, lookup in to_process:
             #Support multiple actions per lookup
             funcs = funcinfo if isinstance(funcinfo, tuple) else (funcinfo,)
+            if stats is not None: start = time.perf_counter()
 
             for func in funcs:
                 extras = {
@@ -305,6 +377,7 @@ def process_marcpatterns(params, transforms, input_model, phase_target):
                 params['to_postprocess'].extend(ctx.extras['postprocessing'])
                 if ctx.extras['abort-signal']:
                     return False
+            if stats is not None: stats.rule(phase_target, lookup, time.perf_counter() - start)
 
         if phase_target != BOOTSTRAP_PHASE and not to_process:
             #Nothing else has handled this data field; go to the fallback
@@ -329,21 +402,37 @@ def process_marcpatterns(params, transforms, input_model, phase_target):
     #XXX: Needs discussion
     if phase_target in (BOOTSTRAP_PHASE, DEFAULT_MAIN_PHASE):
         #params['logger'].debug('PHASE {}\n'.format(phase_target))
-        extra_stmts = set() # prevent duplicate statements
-        special_transforms = params['transforms'].specials
-        for origin, k, v in itertools.chain(
-                    special_transforms.process_leader(params),
-                    special_transforms.process_006(params['fields006'], params),
-                    special_transforms.process_007(params['fields007'], params),
-                    special_transforms.process_008(params['field008'], params)):
-            v = v if isinstance(v, tuple) else (v,)
-            for item in v:
-                o = origin or I(params['default-origin'])
-                if o and (o, k, item) not in extra_stmts:
-                    output_model.add(o, k, item)
-                    extra_stmts.add((o, k, item))
+        process_specials(params, output_model)
     return True
 
+def process_specials(params, output_model):
+    '''
+    Apply the special transforms for the leader & the 006, 007 and 008 fields gathered while processing a record
+    '''
+    extra_stmts = set() # prevent duplicate statements
+    special_transforms = params['transforms'].specials
+    for origin, k, v in itertools.chain(
+                special_transforms.process_leader(params),
+                special_transforms.process_006(params['fields006'], params),
+                special_transforms.process_007(params['fields007'], params),
+                special_transforms.process_008(params['field008'], params)):
+        v = v if isinstance(v, tuple) else (v,)
+        for item in v:
+            o = origin or I(params['default-origin'])
+            if o and (o, k, item) not in extra_stmts:
+                output_model.add(o, k, item)
+                extra_stmts.add((o, k, item))
+    return
+
+def dump_record_links(model, out):
+    '''
+    Write the links of a per-record output model to out as Versa JSON,
+    without the enclosing array brackets, so that records can be strung together
+    '''
+    out.write(versajson.LINK_SEPARATOR.join(map(versajson.encode_link, model)))
+    return
+
+
 unused_flag = object()
 
 def record_handler( model, entbase=None, vocabbase=BL, limiting=None,
@@ -351,11 +440,18 @@ def record_handler( model, entbase=None, vocabbase=BL, limiting=None,
                     logger=logging, transforms=TRANSFORMS,
                     special_transforms=unused_flag,
                     canonical=False, model_factory=memory.connection,
-                    lookups=None, **kwargs):
+                    lookups=None, existing_ids=None, stats=None, materialize_cache=None, delta=None,
+                    out_lines=False, plugin_window=DEFAULT_PLUGIN_WINDOW, **kwargs):
     '''
     model - the Versa model for the record
     entbase - base IRI used for IDs of generated entity resources
     limiting - mutable pair of [count, limit] used to control the number of records processed
+    existing_ids - set of IDs of resources already generated, used to fold repeated resources. A new, empty set if omitted
+    stats - bibframe.stats.collector for instrumentation of processing, or None
+    materialize_cache - bibframe.util.materialize_cache of IDs of materialized resources. A new one if omitted
+    delta - bibframe.reader.delta.tracker for incremental conversion, skipping unchanged records, or None to convert all records
+    out_lines - If True write Versa JSON output as JSON Lines, one record per line, rather than a single JSON array
+    plugin_window - maximum number of records with record-level (BF_MARCREC_TASK) plug-in tasks under way at once
     '''
     #Deprecated legacy API support
     if isinstance(transforms, dict) or special_transforms is not unused_flag:
@@ -370,14 +466,43 @@ def record_handler( model, entbase=None, vocabbase=BL, limiting=None,
     #FIXME: For now always generate instances from ISBNs, but consider working this through the plugins system
     instancegen = isbn_instancegen
 
-    existing_ids = set()
+    if existing_ids is None: existing_ids = set()
+    if materialize_cache is None: materialize_cache = default_materialize_cache()
     #Start the process of writing out the JSON representation of the resulting Versa
-    if out and not canonical: out.write('[')
-    first_record = True
+    jsonout = versajson.writer(out, lines=out_lines) if out and not canonical else None
+    if jsonout: jsonout.start()
+
+    #Plug-in tasks run on an asyncio event loop
+    executor = plugin_executor(plugins, stats=stats, window=plugin_window) if plugins else None
+    #Whether record-level plug-in tasks can carry on while later records are converted, in which case they need a model of their own.
+    #Otherwise they run on the output model in place
+    overlap_records = executor is not None and executor.window > 1 and executor.awaits(BF_MARCREC_TASK)
+    #With the default bootstrap phase the work hash data is taken straight from the input, mimicking the model's handling of duplicates
+    unique_workid_links = transforms.workhash_only and refuses_duplicates(model_factory)
+
+    def finish_record(record_model, record_start):
+        if record_model is not model:
+            #Swap the record's links into the output model, for output & postprocessing
+            carry = [ link for (ix, link) in model ]
+            model.create_space()
+            model.add_many([ link for (ix, link) in record_model ])
+        if delta is not None: delta.record_converted(model, existing_ids)
+
+        #Can we somehow move this to passed-in postprocessing?
+        if jsonout: jsonout.record(model)
+        #FIXME: Postprocessing should probably be a task too
+        if postprocess: postprocess()
+        if record_model is not model:
+            model.create_space()
+            model.add_many(carry)
+        if stats is not None: stats.record(time.perf_counter() - record_start)
+        return
 
     try:
         while True:
             input_model = yield
+            if delta is not None and delta.skip(input_model): continue
+            record_start = time.perf_counter() if stats is not None else None
             leader = None
             #Add work item record, with actual hash resource IDs based on default or plugged-in algo
             #FIXME: No plug-in support yet
@@ -386,94 +511,15 @@ def record_handler( model, entbase=None, vocabbase=BL, limiting=None,
                 #'input_model': input_model, 'output_model': model, 'logger': logger,
                 'entbase': entbase, 'vocabbase': vocabbase, 'ids': ids,
                 'existing_ids': existing_ids, 'plugins': plugins, 'transforms': transforms,
-                'materialize_entity': materialize_entity, 'leader': leader, 'lookups': lookups or {}
+                'materialize_entity': materialize_entity, 'leader': leader, 'lookups': lookups or {},
+                'stats': stats, 'materialize_cache': materialize_cache
             }
 
             # Earliest plugin stage, with an unadulterated input model
-            for plugin in plugins:
-                if BF_INPUT_TASK in plugin:
-                    yield from plugin[BF_INPUT_TASK](input_model, params)
-
-            #Prepare cross-references (i.e. 880s)
-            #See the "$6 - Linkage" section of https://www.loc.gov/marc/bibliographic/ecbdcntf.html
-            #XXX: Figure out a way to declare in TRANSFORMS? We might have to deal with non-standard relationship designators: https://github.com/lcnetdev/marc2bibframe/issues/83
-            xrefs = {}
-            remove_links = set()
-            add_links = []
-
-            xref_link_tag_workaround = {}
-            for lid, marc_link in input_model:
-                origin, taglink, val, attribs = marc_link
-                if taglink == MARCXML_NS + '/leader' or taglink.startswith(MARCXML_NS + '/data/9'):
-                    #900 fields are local and might not follow the general xref rules
-                    params['leader'] = leader = val
-                    continue
-                #XXX Do other fields with a 9 digit (not just 9XX) also need to be skipped?
-                if taglink.startswith(MARCXML_NS + '/extra/') or 'tag' not in attribs: continue
-                this_tag = attribs['tag']
-                #if this_tag == '100': import pdb; pdb.set_trace()
-                for xref in attribs.get('6', []):
-                    matched = LINKAGE_PAT.match(xref)
-                    this_taglink, this_occ, this_scriptid, this_rtl = matched.groups() if matched else (None, None, None, None)
-                    if not this_taglink and occ:
-                        control_code = list(marc_lookup(input_model, '001')) or ['NO 001 CONTROL CODE']
-                        dumb_title = list(marc_lookup(input_model, '245$a')) or ['NO 245$a TITLE']
-                        logger.warning('Skipping invalid $6: "{}" for {}: "{}"'.format(xref, control_code[0], dumb_title[0]))
-                        continue
-
-                    if this_tag == this_taglink:
-                        #Pretty sure this is an erroneous self-link, but we've seen this in the wild (e.g. QNL). Issue warning & do the best we can linking via occurrence
-                        #Note: the resulting workround (lookup table from occurence code to the correct tag) will not work in cases of linking from any tag higher in ordinal value than 880 (if such a situation is even possible)
-                        logger.warning('Invalid input: erroneous self-link $6: "{}" from "{}". Trying to work around.'.format(xref, this_tag))
-                        if this_tag != '880':
-                            xref_link_tag_workaround[this_occ] = this_tag
-
-                    #FIXME: Remove this debugging if statament at some point
-                    if scriptid or rtl:
-                        logger.debug('Language info specified in subfield 6, {}'.format(xref))
-
-                    #Locate the matching taglink
-                    if this_tag == '880' and this_occ == '00':
-                        #Special case, no actual xref, used to separate scripts in a record (re Multiscript Records)
-                        #FIXME: Not really handled right now. Presume some sort of merge dynamics will need to be implemented
-                        attribs['tag'] = this_taglink
-                        add_links.append((origin, MARCXML_NS + '/data/' + this_taglink, val, attribs))
-
-                    if xref_link_tag_workaround:
-                        if this_tag == '880':
-                            this_taglink = xref_link_tag_workaround.get(this_occ)
-
-                    links = input_model.match(None, MARCXML_NS + '/data/' + this_taglink)
-                    for that_link in links:
-                        #6 is the cross-reference subfield
-                        for that_ref in link[ATTRIBUTES].get('6', []):
-                            matched = LINKAGE_PAT.match(that_ref)
-                            that_taglink, that_occ, that_scriptid, that_rtl = matched.groups() if matched else (None, None, None, None)
-                            #if not that_tag and that_occ:
-                            #    control_code = list(marc_lookup(input_model, '001')) or ['NO 001 CONTROL CODE']
-                            #    dumb_title = list(marc_lookup(input_model, '245$a')) or ['NO 245$a TITLE']
-                            #    logger.warning('Skipping invalid $6: "{}" for {}: "{}"'.format(to_ref, control_code[0], dumb_title[0]))
-                            #    continue
-                            if ([that_taglink, that_occ] == [this_tag, this_occ]) or (xref_link_tag_workaround and that_occ == this_occ):
-                                if this_tag == '880':
-                                    #This is an 880, which we'll handle by integrating back into the input model using the correct tag, flagged to show the relationship
-                                    remove_links.add(lid)
-
-                                if that_taglink == '880':
-                                    #Rule for 880s: duplicate but link more robustly
-                                    copied_attribs = attribs.copy()
-                                    for k, v in that_link[ATTRIBUTES].items():
-                                        if k[:3] not in ('tag', 'ind'):
-                                            copied_attribs.setdefault(k, []).extend(v)
-                                    add_links.append((origin, MARCXML_NS + '/data/' + this_tag, val, copied_attribs))
-
-            input_model.remove(remove_links)
-            input_model.add_many(add_links)
+            if executor: executor.run(BF_INPUT_TASK, input_model, params)
 
             # hook for plugins interested in the xref-resolved input model
-            for plugin in plugins:
-                if BF_INPUT_XREF_TASK in plugin:
-                    yield from plugin[BF_INPUT_XREF_TASK](input_model, params)
+            if executor: executor.run(BF_INPUT_XREF_TASK, input_model, params)
 
             #Do one pass to establish work hash
             #XXX Should crossrefs precede this?
@@ -482,8 +528,6 @@ def record_handler( model, entbase=None, vocabbase=BL, limiting=None,
 
             params['default-origin'] = bootstrap_dummy_id
             params['instanceids'] = [bootstrap_dummy_id + '-instance']
-            params['output_model'] = model_factory()
-
             params['field008'] = leader = None
             params['fields006'] = fields006 = []
             params['fields007'] = fields007 = []
@@ -491,28 +535,37 @@ def record_handler( model, entbase=None, vocabbase=BL, limiting=None,
 
             params['origins'] = {WORK_TYPE: bootstrap_dummy_id, INSTANCE_TYPE: params['instanceids'][0]}
 
-            #First apply special patterns for determining the main target resources
-            curr_transforms = transforms.compiled[BOOTSTRAP_PHASE]
-
-            ok = process_marcpatterns(params, curr_transforms, input_model, BOOTSTRAP_PHASE)
-            if not ok: continue #Abort current record if signalled
-
-            bootstrap_output = params['output_model']
             #By default the main target and its type are None, in which case it will fall back to default targets
             temp_main_target = main_type = None
-            #See if the first pass overrode the default target & type
-            for o, r, t, a in bootstrap_output.match(None, PYBF_BOOTSTRAP_TARGET_REL):
-                #FIXME: We need a better designed way of determining fallback to bib
-                if t is not None: temp_main_target, main_type = o, t
+            if transforms.workhash_only:
+                #Default bootstrap phase, which can only lead to the work
+                workid_data = gather_bootstrap_workid_data(params, input_model, unique=unique_workid_links)
+            else:
+                #First apply special patterns for determining the main target resources
+                curr_transforms = transforms.compiled[BOOTSTRAP_PHASE]
+                params['output_model'] = model_factory()
+
+                ok = process_marcpatterns(params, curr_transforms, input_model, BOOTSTRAP_PHASE)
+                if not ok:
+                    #Abort current record if signalled
+                    if stats is not None: stats.record(time.perf_counter() - record_start, aborted=True)
+                    continue
+
+                bootstrap_output = params['output_model']
+                #See if the first pass overrode the default target & type
+                for o, r, t, a in bootstrap_output.match(None, PYBF_BOOTSTRAP_TARGET_REL):
+                    #FIXME: We need a better designed way of determining fallback to bib
+                    if t is not None: temp_main_target, main_type = o, t
+                if temp_main_target is None:
+                    #params['logger'].debug('WORK HASH ORIGIN {}\n'.format(bootstrap_dummy_id))
+                    #params['logger'].debug('WORK HASH MODEL {}\n'.format(repr(bootstrap_output)))
+                    workid_data = gather_workid_data(bootstrap_output, bootstrap_dummy_id)
 
             #Switch to the main output model for processing
             params['output_model'] = model
 
             if temp_main_target is None:
                 #If no target was set explicitly fall back to the transforms registered for the biblio phase
-                #params['logger'].debug('WORK HASH ORIGIN {}\n'.format(bootstrap_dummy_id))
-                #params['logger'].debug('WORK HASH MODEL {}\n'.format(repr(bootstrap_output)))
-                workid_data = gather_workid_data(bootstrap_output, bootstrap_dummy_id)
                 workid = materialize_entity('Work', ctx_params=params, data=workid_data)
                 logger.debug('Entering default main phase, Work ID: {0}'.format(workid))
 
@@ -566,7 +619,10 @@ def record_handler( model, entbase=None, vocabbase=BL, limiting=None,
             params['to_postprocess'] = []
 
             ok = process_marcpatterns(params, main_transforms, input_model, phase_target)
-            if not ok: continue #Abort current record if signalled
+            if not ok:
+                #Abort current record if signalled
+                if stats is not None: stats.record(time.perf_counter() - record_start, aborted=True)
+                continue
 
             skipped_rels = set()
             for op, rels, rid in params['to_postprocess']:
@@ -582,41 +638,31 @@ def record_handler( model, entbase=None, vocabbase=BL, limiting=None,
 
             #XXX At this point there must be at least one record with a Versa type
 
-            for plugin in plugins:
-                #Each plug-in is a task
-                if BF_MARCREC_TASK in plugin:
-                    yield from plugin[BF_MARCREC_TASK](model, params)
-
-            #Can we somehow move this to passed-in postprocessing?
-            if out and not canonical and not first_record: out.write(',\n')
-            if out:
-                if not canonical:
-                    first_record = False
-                    last_chunk = None
-                    #Using iterencode avoids building a big JSON string in memory, or having to resort to file pointer seeking
-                    #Then again builds a big list in memory, so still working on opt here
-                    for chunk in json.JSONEncoder().iterencode([ link for link in model ]):
-                        if last_chunk is None:
-                            last_chunk = chunk[1:]
-                        else:
-                            out.write(last_chunk)
-                            last_chunk = chunk
-                    if last_chunk: out.write(last_chunk[:-1])
-            #FIXME: Postprocessing should probably be a task too
-            if postprocess: postprocess()
+            if executor:
+                record_model = model
+                if overlap_records:
+                    record_model = model_factory()
+                    record_model.add_many([ link for (ix, link) in model ])
+                    model.create_space()
+                #Each plug-in is a task. Records are finished in order, once their tasks are done
+                executor.submit(BF_MARCREC_TASK, (record_model, params), finish_record, record_model, record_start)
+                #Should a plain function still hand back an awaitable, it has to be done with the output model before the next record
+                if record_model is model: executor.drain()
+            else:
+                finish_record(model, record_start)
             #limiting--running count of records processed versus the max number, if any
             limiting[0] += 1
             if limiting[1] is not None and limiting[0] >= limiting[1]:
+                #Limit reached, so finish up now. The source stops on the resulting StopIteration
                 break
     except GeneratorExit:
-        logger.debug('Completed processing {0} record{1}.'.format(limiting[0], '' if limiting[0] == 1 else 's'))
-        if out and not canonical: out.write(']')
+        pass
 
-        for plugin in plugins:
-            #Each plug-in is a task
-            func = plugin.get(BF_FINAL_TASK)
-            if not func: continue
-            yield from func()
-        #raise
+    if executor: executor.drain()
+    logger.debug('Completed processing {0} record{1}.'.format(limiting[0], '' if limiting[0] == 1 else 's'))
+    if jsonout: jsonout.finish()
 
+    if executor:
+        executor.run(BF_FINAL_TASK)
+        executor.close()
     return
@@ -0,0 +1,216 @@
+'''
+For processing MARC21 (ISO 2709) binary records
+
+Reads the leader & directory of each record straight from the binary data and
+sends on the same per-record input Versa model as the MARC/XML reader, so no
+conversion to MARC/XML is needed first
+
+marc2bf --marc21 records.mrc
+'''
+
+import io
+import mmap
+import warnings
+
+from bibframe.reader import marc
+from bibframe.reader.marcxml import VALID_SUBFIELD_PAT, normalize_text
+from bibframe.reader.util import PARSED_SUBFIELDS, parse_subfields
+
+MARCXML_NS = marc.MARCXML_NS
+
+RECORD_TERMINATOR = b'\x1d'
+FIELD_TERMINATOR = b'\x1e'
+SUBFIELD_DELIMITER = b'\x1f'
+
+LEADER_LEN = 24
+DIRECTORY_ENTRY_LEN = 12
+
+#Bytes to read at a time from streams which can't be memory-mapped
+STREAM_CHUNK_SIZE = 1 << 16
+
+
+def source_buffer(stream):
+    '''
+    Return a memory-mapped buffer with the full contents of a binary stream,
+    or None if it's not a regular file (e.g. stdin, socket, in-memory or decompressed), or empty
+    '''
+    #Decompressing streams have the fileno of the underlying compressed file, so check the type
+    if not isinstance(stream, (io.BufferedReader, io.FileIO)): return None
+    try:
+        return mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ)
+    except (AttributeError, OSError, ValueError):
+        return None
+
+
+def record_length(buf, pos):
+    '''
+    Record length from the leader of the record starting at pos, or 0 if it's not a valid number
+    '''
+    reclen = buf[pos:pos+5]
+    return int(reclen) if reclen.isdigit() else 0
+
+
+def iter_records(buf, logger):
+    '''
+    Generate (offset, record data) for each record in a buffer of MARC21 data
+
+    Uses the record length from the leader, falling back to the record terminator if that doesn't check out
+    '''
+    pos = 0
+    end = len(buf)
+    while pos < end:
+        reclen = record_length(buf, pos)
+        if reclen and buf[pos+reclen-1:pos+reclen] == RECORD_TERMINATOR:
+            next_pos = pos + reclen
+        else:
+            term = buf.find(RECORD_TERMINATOR, pos)
+            next_pos = end if term == -1 else term + 1
+            logger.debug('Bad record length in MARC21 record at offset {0}'.format(pos))
+        record = buf[pos:next_pos]
+        if record.strip(b'\r\n \x00' + RECORD_TERMINATOR):
+            yield pos, record
+        pos = next_pos
+    return
+
+
+def iter_stream_records(stream, logger, chunk_size=STREAM_CHUNK_SIZE):
+    '''
+    Generate (offset, record data) for each record read from a binary stream of MARC21 data, as with iter_records,
+    but reading in chunks, so that only the current record need be kept in memory
+    '''
+    buf = bytearray()
+    #Offset in the stream of the start of buf
+    offset = 0
+    more = True
+
+    def read_more():
+        chunk = stream.read(chunk_size)
+        buf.extend(chunk)
+        return bool(chunk)
+
+    while True:
+        while more and len(buf) < 5: more = read_more()
+        if not buf: break
+        reclen = record_length(buf, 0)
+        while more and len(buf) < reclen: more = read_more()
+        if reclen and buf[reclen-1:reclen] == RECORD_TERMINATOR:
+            next_pos = reclen
+        else:
+            term = buf.find(RECORD_TERMINATOR)
+            while term == -1 and more:
+                start = len(buf)
+                more = read_more()
+                term = buf.find(RECORD_TERMINATOR, start)
+            next_pos = len(buf) if term == -1 else term + 1
+            logger.debug('Bad record length in MARC21 record at offset {0}'.format(offset))
+        record = bytes(buf[:next_pos])
+        del buf[:next_pos]
+        if record.strip(b'\r\n \x00' + RECORD_TERMINATOR):
+            yield offset, record
+        offset += next_pos
+    return
+
+
+class marc21_decoder(object):
+    def __init__(self):
+        self._marc8 = None
+        return
+
+    def decode(self, data, leader):
+        #Leader position 09 is the character coding scheme: 'a' for UCS/Unicode, blank for MARC-8
+        if leader[9] == 'a':
+            text = data.decode('utf-8', errors='replace')
+        else:
+            if self._marc8 is None:
+                from pymarc.marc8 import marc8_to_unicode
+                self._marc8 = marc8_to_unicode
+            text = self._marc8(data)
+        return normalize_text(text)
+
+
+def record_model(offset, record, model_factory, decoder, logger):
+    '''
+    Build an input Versa model from the data of a single MARC21 record
+    Returns None if the record is too badly formed to use
+    '''
+    record_id = 'record-{0}'.format(offset)
+    leader = record[:LEADER_LEN].decode('ascii', errors='replace')
+    base = leader[12:17]
+    if len(leader) < LEADER_LEN or not base.isdigit():
+        logger.warning('Invalid leader in record "{0}"'.format(record_id))
+        return None
+    base = int(base)
+
+    #Versa model with a representation of the record
+    #For input model plugins, important that natural ordering be preserved
+    model = model_factory()
+    model.add(record_id, MARCXML_NS + '/leader', leader, {})
+
+    directory = record[LEADER_LEN:base].rstrip(FIELD_TERMINATOR)
+    for ix in range(0, len(directory) - DIRECTORY_ENTRY_LEN + 1, DIRECTORY_ENTRY_LEN):
+        entry = directory[ix:ix+DIRECTORY_ENTRY_LEN]
+        tag = entry[:3].decode('ascii', errors='replace')
+        length, start = entry[3:7], entry[7:12]
+        if not (length.isdigit() and start.isdigit()):
+            logger.warning('Invalid directory entry for tag "{0}" in record "{1}"'.format(tag, record_id))
+            continue
+        start = base + int(start)
+        data = record[start:start+int(length)].rstrip(FIELD_TERMINATOR + RECORD_TERMINATOR)
+        if not tag.isdigit():
+            logger.warning('Invalid datafield tag "{0}" in record "{1}"'.format(tag, record_id))
+            tag = '000'
+        if tag.startswith('00'):
+            #Control tags have neither indicators nor subfields
+            model.add(record_id, MARCXML_NS + '/control/' + tag, decoder.decode(data, leader), {'tag': tag})
+        else:
+            chunks = data.split(SUBFIELD_DELIMITER)
+            indicators = decoder.decode(chunks[0], leader)
+            attributes = {'tag': tag, 'ind1': indicators[0:1].strip(), 'ind2': indicators[1:2].strip()}
+            #Numbered to match MARC/XML processing
+            for count, chunk in enumerate(chunks[1:], start=2):
+                if not chunk: continue
+                code, value = chunk[:1].decode('ascii', errors='replace'), chunk[1:]
+                if not VALID_SUBFIELD_PAT.match(code):
+                    logger.warning('Invalid subfield code "{0}" in record "{1}", tag "{2}"'.format(code, record_id, tag))
+                    code = '_'
+                attributes['{}.{}'.format(count, code)] = decoder.decode(value, leader)
+            attributes[PARSED_SUBFIELDS] = parse_subfields(attributes)
+            model.add(record_id, MARCXML_NS + '/data/' + tag, '', attributes)
+    return model
+
+
+def handle_marc21_source(source, sink, args, logger, model_factory):
+    '''
+    Process one source of MARC21 (ISO 2709) binary records in the form of an amara3 inputsource
+    Generally this will be a single .mrc file with one or more records. Regular files are memory-mapped,
+    and other streams (e.g. stdin, or decompressed input) read a record at a time
+
+    source - amara3.inputsource.inputsource instance
+    sink - coroutine to be sent the generated resources
+    args -
+    model_factory - Factory function for creating the input model for each record (e.g. bibframe.reader.record.marc_record)
+    '''
+    next(sink) #Start the coroutine running
+    buf = source_buffer(source.stream)
+    records = iter_stream_records(source.stream, logger) if buf is None else iter_records(buf, logger)
+    decoder = marc21_decoder()
+    no_records = True
+    try:
+        for offset, record in records:
+            model = record_model(offset, record, model_factory, decoder, logger)
+            if model is None: continue
+            no_records = False
+            try:
+                sink.send(model)
+            except StopIteration:
+                #Handler coroutine has declined to process more records. Perhaps it's hit a limit
+                break
+    finally:
+        if buf is not None: buf.close()
+    if no_records:
+        warnings.warn("No records found in this file. Is it really MARC21 (ISO 2709)?", RuntimeWarning)
+    return
+
+
+handle_marc21_source.readmode = 'rb'
+handle_marc21_source.makeinputsource = True
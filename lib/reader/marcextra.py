@@ -2,6 +2,9 @@
 Treatment of certain special MARC fields, leader, 006, 007, 008, etc.
 '''
 
+import logging
+import itertools
+
 from versa import I, VERSA_BASEIRI
 from amara3.iri import is_absolute
 from bibframe import BL, BA, REL, MARC, RBMS, AV
@@ -56,12 +59,221 @@ def marc_date_yyyymm(d): # used in 007
 
     return date
 
+#008 language codes which don't give an actual language
+NO_LANGUAGE = ("###", "|||", "zxx", "mul", "sgn", "und", "   ")
+
+#Origins for links generated from fixed length data elements. Links on the work have origin None
+ON_WORK, ON_INSTANCE = False, True
+
+#Conversions of fixed length data element values other than lookup in a table
+MARC_INT = 'marc_int'
+VERBATIM = 'verbatim'
+DATE_YYYYMM = 'date_yyyymm'
+
+# Registry of patterns to be processed from 006, 007 & 008 fields, by category
+# Each pattern is (position, relationship, value source, origin)
+# There are 3 types of position
+# 1) An int, simply processed as a character position
+# 2) A tuple of ints, processed once for each character position in the list
+# 3) A tuple starting with 'slice' and then 2 ints, processed as a character chunk/slice as a whole
+# relationship is a property name in the MARC vocabulary, or VTYPE
+# value source is the path to the lookup table among transforms attributes, e.g. ('Books', 'Illustrations'),
+# or one of MARC_INT, VERBATIM or DATE_YYYYMM. Table values are SLUGged, except for types
+# Positions are for 006/007, and are shifted for 008
+FIXED_LENGTH_PATTERNS = dict(
+    Books = [
+        ((0, 1, 2, 3), 'illustrations', ('Books', 'Illustrations'), ON_WORK),
+        (4, 'targetAudience', ('AUDIENCE',), ON_WORK),
+        (5, 'formOfItem', ('FORM_OF_ITEM',), ON_INSTANCE),
+        ((6, 7, 8, 9), 'natureOfContents', ('NATURE_OF_CONTENTS',), ON_WORK),
+        (10, 'governmentPublication', ('GOVT_PUBLICATION',), ON_WORK),
+        (11, VTYPE, ('CONFERENCE_PUBLICATION',), ON_WORK),
+        (12, VTYPE, ('Books', 'Festschrift'), ON_WORK),
+        (13, 'index', ('INDEX',), ON_WORK),
+        (15, 'literaryForm', ('LITERARY_FORM',), ON_WORK),
+        (16, 'biographical', ('BIOGRAPHICAL',), ON_WORK),
+    ],
+    Music = [
+        (('slice', 0, 2), 'formOfComposition', ('Music', 'FormOfComposition'), ON_WORK),
+        (2, 'formatOfMusic', ('Music', 'FormatOfMusic'), ON_WORK),
+        (3, 'musicParts', ('Music', 'MusicParts'), ON_WORK),
+        (4, 'targetAudience', ('AUDIENCE',), ON_WORK),
+        (5, 'formOfItem', ('FORM_OF_ITEM',), ON_INSTANCE),
+        ((6, 7, 8, 9, 10, 11), 'accompanyingMatter', ('Music', 'AccompanyingMatter'), ON_WORK),
+        ((12, 13), 'literaryTextForSoundRecordings', ('Music', 'LiteraryTextForSoundRecordings'), ON_WORK),
+        (15, 'transpositionAndArrangement', ('Music', 'TranspositionAndArrangement'), ON_WORK),
+    ],
+    Maps = [  #006/008
+        ((0, 1, 2, 3), 'relief', ('Maps', 'Relief'), ON_WORK),
+        (('slice', 4, 5), 'projection', ('Maps', 'Projection'), ON_WORK),
+        (7, 'characteristic', ('Maps', 'TypeOfCartographicMaterial'), ON_WORK),
+        (10, 'governmentPublication', ('GOVT_PUBLICATION',), ON_WORK),
+        (11, 'formOfItem', ('FORM_OF_ITEM',), ON_INSTANCE),
+        (13, 'index', ('INDEX',), ON_WORK),
+        ((15, 16), 'specialFormatCharacteristics', ('Maps', 'SpecialFormatCharacteristics'), ON_WORK),
+    ],
+    VisualMaterials = [
+        (('slice', 0, 3), 'runtime', MARC_INT, ON_WORK),
+        (4, 'targetAudience', ('AUDIENCE',), ON_WORK),
+        (10, 'governmentPublication', ('GOVT_PUBLICATION',), ON_WORK),
+        (11, 'formOfItem', ('FORM_OF_ITEM',), ON_INSTANCE),
+        (15, 'characteristic', ('VisualMaterials', 'TypeOfVisualMaterial'), ON_WORK),
+        (16, 'technique', ('VisualMaterials', 'Technique'), ON_WORK),
+    ],
+    ComputerFiles = [
+        (4, 'targetAudience', ('AUDIENCE',), ON_WORK),
+        (5, 'formOfItem', ('ComputerFiles', 'FormOfItem'), ON_INSTANCE),
+        (8, 'characteristic', ('ComputerFiles', 'TypeOfComputerFile'), ON_WORK),
+        (10, 'governmentPublication', ('GOVT_PUBLICATION',), ON_WORK),
+    ],
+    MixedMaterials = [
+        (5, VTYPE, ('FORM_OF_ITEM',), ON_WORK),
+    ],
+    ContinuingResources = [
+        (0, 'frequency', ('ContinuingResources', 'Frequency'), ON_WORK),
+        (1, 'regularity', ('ContinuingResources', 'Regularity'), ON_WORK),
+        (3, 'characteristic', ('ContinuingResources', 'TypeOfContinuingResource'), ON_WORK),
+        (4, 'formOfOriginalItem', ('FORM_OF_ITEM',), ON_INSTANCE),
+        (5, 'formOfItem', ('FORM_OF_ITEM',), ON_INSTANCE),
+        (6, 'natureOfEntireWork', ('NATURE_OF_CONTENTS',), ON_WORK),
+        ((7, 8, 9), 'natureOfContents', ('NATURE_OF_CONTENTS',), ON_WORK),
+        (10, 'governmentPublication', ('GOVT_PUBLICATION',), ON_WORK),
+        (11, VTYPE, ('CONFERENCE_PUBLICATION',), ON_WORK),
+        (15, 'originalAlphabetOrScriptOfTitle', ('ContinuingResources', 'OriginalAlphabetOrScriptOfTitle'), ON_WORK),
+        (16, 'entryConvention', ('ContinuingResources', 'EntryConvention'), ON_WORK),
+    ],
+    Map = [  #007
+        (1, 'specificMaterialDesignation', ('Map', 'SpecificMaterialDesignation'), ON_INSTANCE),
+        (3, 'color', ('COLOR',), ON_INSTANCE),
+        (4, 'physicalMedium', ('PHYSICAL_MEDIUM',), ON_INSTANCE),
+        (5, 'typeOfReproduction', ('TYPE_OF_REPRODUCTION',), ON_INSTANCE),
+        (6, 'productionReproductionDetails', ('PRODUCTION_REPRODUCTION_DETAILS',), ON_INSTANCE),
+        (7, 'positiveNegativeAspect', ('POSITIVE_NEGATIVE_ASPECT',), ON_INSTANCE),
+    ],
+    ElectronicResource = [
+        (1, 'specificMaterialDesignation', ('ElectronicResource', 'SpecificMaterialDesignation'), ON_INSTANCE),
+        (3, 'color', ('COLOR',), ON_INSTANCE),
+        (4, 'dimensions', ('ElectronicResource', 'Dimensions'), ON_INSTANCE),
+        (5, 'sound', ('ElectronicResource', 'Sound'), ON_INSTANCE),
+        (('slice', 6, 8), 'imageBitDepth', MARC_INT, ON_WORK),
+        (9, 'fileFormat', ('ElectronicResource', 'FileFormats'), ON_INSTANCE),
+        (10, 'qualityAssuranceTargets', ('ElectronicResource', 'QualityAssuranceTargets'), ON_INSTANCE),
+        (11, 'antecedentSource', ('ElectronicResource', 'AntecedentSource'), ON_INSTANCE),
+        (12, 'levelOfCompression', ('ElectronicResource', 'LevelOfCompression'), ON_INSTANCE),
+        (13, 'reformattingQuality', ('ElectronicResource', 'ReformattingQuality'), ON_INSTANCE),
+    ],
+    Globe = [
+        (1, 'specificMaterialDesignation', ('Globe', 'SpecificMaterialDesignation'), ON_INSTANCE),
+        (3, 'color', ('COLOR',), ON_INSTANCE),
+        (4, 'physicalMedium', ('PHYSICAL_MEDIUM',), ON_INSTANCE),
+        (5, 'typeOfReproduction', ('TYPE_OF_REPRODUCTION',), ON_INSTANCE),
+    ],
+    TactileMaterial = [
+        (1, 'specificMaterialDesignation', ('TactileMaterial', 'SpecificMaterialDesignation'), ON_INSTANCE),
+        (('slice', 3, 4), 'classOfBrailleWriting', ('TactileMaterial', 'ClassOfBrailleWriting'), ON_INSTANCE),
+        (5, 'levelOfContraction', ('TactileMaterial', 'LevelOfContraction'), ON_INSTANCE),
+        ((6, 7, 8), 'brailleMusicFormat', ('TactileMaterial', 'BrailleMusicFormat'), ON_INSTANCE),
+        (9, 'specialPhysicalCharacteristics', ('TactileMaterial', 'SpecialPhysicalCharacteristics'), ON_INSTANCE),
+    ],
+    ProjectedGraphic = [
+        (1, 'specificMaterialDesignation', ('ProjectedGraphic', 'SpecificMaterialDesignation'), ON_INSTANCE),
+        (3, 'color', ('COLOR',), ON_INSTANCE),
+        (4, 'baseOfEmulsion', ('ProjectedGraphic', 'SpecificMaterialDesignation'), ON_INSTANCE),
+        (5, 'soundOnMediumOrSeparate', ('SOUND_ON_MEDIUM_OR_SEPARATE',), ON_INSTANCE),
+        (6, 'mediumForSound', ('MEDIUM_FOR_SOUND',), ON_INSTANCE),
+        (7, 'dimensions', ('DIMENSIONS_FILM',), ON_INSTANCE),
+        (8, 'secondarySupportMaterial', ('SUPPORT_MATERIAL',), ON_INSTANCE),
+    ],
+    Microform = [
+        (1, 'specificMaterialDesignation', ('Microform', 'SpecificMaterialDesignation'), ON_INSTANCE),
+        (3, 'positiveNegativeAspect', ('POSITIVE_NEGATIVE_ASPECT',), ON_INSTANCE),
+        (4, 'dimensions', ('Microform', 'Dimensions'), ON_INSTANCE),
+        (5, 'reductionRatioRange', ('Microform', 'ReductionRatioRange'), ON_INSTANCE),
+        (('slice', 6, 8), 'reductionRatio', VERBATIM, ON_INSTANCE),
+        (9, 'color', ('COLOR',), ON_INSTANCE),
+        (10, 'emulsionOnFilm', ('Microform', 'EmulsionOnFilm'), ON_INSTANCE),
+        (11, 'generation', ('Microform', 'Generation'), ON_INSTANCE),
+        (12, 'baseOfFilm', ('BASE_OF_FILM',), ON_INSTANCE),
+    ],
+    NonprojectedGraphic = [
+        (1, 'specificMaterialDesignation', ('NonprojectedGraphic', 'SpecificMaterialDesignation'), ON_INSTANCE),
+        (3, 'color', ('COLOR',), ON_INSTANCE),
+        (4, 'primarySupportMaterial', ('SUPPORT_MATERIAL',), ON_INSTANCE),
+        (5, 'secondarySupportMaterial', ('SUPPORT_MATERIAL',), ON_INSTANCE),
+    ],
+    MotionPicture = [
+        (1, 'specificMaterialDesignation', ('MotionPicture', 'SpecificMaterialDesignation'), ON_INSTANCE),
+        (3, 'color', ('COLOR',), ON_INSTANCE),
+        (4, 'motionPicturePresentationFormat', ('MotionPicture', 'MotionPicturePresentationFormat'), ON_INSTANCE),
+        (5, 'soundOnMediumOrSeparate', ('SOUND_ON_MEDIUM_OR_SEPARATE',), ON_INSTANCE),
+        (6, 'mediumForSound', ('MEDIUM_FOR_SOUND',), ON_INSTANCE),
+        (7, 'dimensions', ('DIMENSIONS_FILM',), ON_INSTANCE),
+        (8, 'configurationOfPlaybackChannels', ('CONFIGURATION_OF_PLAYBACK_CHANNELS',), ON_INSTANCE),
+        (9, 'productionElements', ('MotionPicture', 'ProductionElements'), ON_INSTANCE),
+        (10, 'positiveNegativeAspect', ('POSITIVE_NEGATIVE_ASPECT',), ON_INSTANCE),
+        (11, 'generation', ('MotionPicture', 'Generation'), ON_INSTANCE),
+        (12, 'baseOfFilm', ('BASE_OF_FILM',), ON_INSTANCE),
+        (13, 'refinedCategoriesOfColor', ('MotionPicture', 'RefinedCategoriesOfColor'), ON_INSTANCE),
+        (14, 'kindOfColorStockOrPrint', ('MotionPicture', 'KindOfColorStockOrPrint'), ON_INSTANCE),
+        (15, 'deteriorationStage', ('MotionPicture', 'DeteriorationStage'), ON_INSTANCE),
+        (16, 'completeness', ('MotionPicture', 'Completeness'), ON_INSTANCE),
+        (('slice', 17, 23), 'filmInspectionDate', DATE_YYYYMM, ON_INSTANCE),
+    ],
+    Kit = [
+        (1, 'specificMaterialDesignation', ('Kit', 'SpecificMaterialDesignation'), ON_INSTANCE),
+    ],
+    NotatedMusic = [
+        (1, 'specificMaterialDesignation', ('NotatedMusic', 'SpecificMaterialDesignation'), ON_INSTANCE),
+    ],
+    RemoteSensingImage = [
+        (1, 'specificMaterialDesignation', ('RemoteSensingImage', 'SpecificMaterialDesignation'), ON_INSTANCE),
+        (3, 'altitudeOfSensor', ('RemoteSensingImage', 'AltitudeOfSensor'), ON_INSTANCE),
+        (4, 'attitudeOfSensor', ('RemoteSensingImage', 'AttitudeOfSensor'), ON_INSTANCE),
+        (5, 'cloudCover', ('RemoteSensingImage', 'CloudCover'), ON_INSTANCE),
+        (6, 'platformConstructionType', ('RemoteSensingImage', 'PlatformConstructionType'), ON_INSTANCE),
+        (7, 'platformUseCategory', ('RemoteSensingImage', 'PlatformUseCategory'), ON_INSTANCE),
+        (8, 'sensorType', ('RemoteSensingImage', 'SensorType'), ON_INSTANCE),
+        (('slice', 9, 10), 'dataType', ('RemoteSensingImage', 'DataType'), ON_INSTANCE),
+    ],
+    SoundRecording = [
+        (1, 'specificMaterialDesignation', ('SoundRecording', 'SpecificMaterialDesignation'), ON_INSTANCE),
+        (3, 'speed', ('SoundRecording', 'Speed'), ON_INSTANCE),
+        (4, 'configurationOfPlaybackChannels', ('CONFIGURATION_OF_PLAYBACK_CHANNELS',), ON_INSTANCE),
+        (5, 'grooveWidthPitch', ('SoundRecording', 'GrooveWidthPitch'), ON_INSTANCE),
+        (6, 'dimensions', ('SoundRecording', 'Dimensions'), ON_INSTANCE),
+        (7, 'tapeWidth', ('SoundRecording', 'TapeWidth'), ON_INSTANCE),
+        (8, 'tapeConfiguration', ('SoundRecording', 'TapeConfiguration'), ON_INSTANCE),
+        (9, 'kindOfDiscCylinderOrTape', ('SoundRecording', 'KindOfDiscCylinderOrTape'), ON_INSTANCE),
+        (10, 'kindOfMaterial', ('SoundRecording', 'KindOfMaterial'), ON_INSTANCE),
+        (11, 'kindOfCutting', ('SoundRecording', 'KindOfCutting'), ON_INSTANCE),
+        (12, 'specialPlaybackCharacteristics', ('SoundRecording', 'SpecialPlaybackCharacteristics'), ON_INSTANCE),
+        (13, 'captureAndStorageTechnique', ('SoundRecording', 'CaptureAndStorageTechnique'), ON_INSTANCE),
+    ],
+    Text = [
+        (1, 'specificMaterialDesignation', ('Text', 'SpecificMaterialDesignation'), ON_INSTANCE),
+    ],
+    VideoRecording = [
+        (1, 'specificMaterialDesignation', ('VideoRecording', 'SpecificMaterialDesignation'), ON_INSTANCE),
+        (3, 'color', ('COLOR',), ON_INSTANCE),
+        (4, 'videorecordingFormat', ('VideoRecording', 'VideorecordingFormat'), ON_INSTANCE),
+        (5, 'soundOnMediumOrSeparate', ('SOUND_ON_MEDIUM_OR_SEPARATE',), ON_INSTANCE),
+        (6, 'mediumForSound', ('MEDIUM_FOR_SOUND',), ON_INSTANCE),
+        (7, 'dimensions', ('VideoRecording', 'Dimensions'), ON_INSTANCE),
+        (8, 'configurationOfPlaybackChannels', ('CONFIGURATION_OF_PLAYBACK_CHANNELS',), ON_INSTANCE),
+    ],
+    UnspecifiedCategory = [
+        (1, 'specificMaterialDesignation', ('UnspecifiedCategory', 'SpecificMaterialDesignation'), ON_INSTANCE),
+    ],
+)
+
 class transforms(object):
     def __init__(self, vocab=None):
         DEFAULT_VOCAB = { i:i for i in DEFAULT_VOCAB_ITEMS }
         vocab = vocab or {}
         #Use any provided, overridden vocab items, or just the defaults
         self._vocab = { i: vocab.get(i, i) for i in DEFAULT_VOCAB_ITEMS }
+        #Compiled fixed length data element patterns, by (category, offset)
+        self._compiled_patterns = {}
 
         # some shared mappings between and within 006/008 fields
         self.AUDIENCE = {
@@ -1395,26 +1607,58 @@ class transforms(object):
             'z': 'UnspecifiedCategory',
         }
 
+        # leader 06 lookups, for work and instance types
+        self.WORK_06 = dict(
+            a=I(self._vocab[MARC]+"LanguageMaterial"),
+            c=(I(self._vocab[MARC]+"LanguageMaterial"), I(self._vocab[MARC]+"NotatedMusic")),
+            d=(I(self._vocab[MARC]+"LanguageMaterial"), I(self._vocab[MARC]+"Manuscript"), I(self._vocab[MARC]+"NotatedMusic")),
+            e=(I(self._vocab[MARC]+"StillImage"), I(self._vocab[MARC]+"Cartography")),
+            f=(I(self._vocab[MARC]+"Manuscript"), I(self._vocab[MARC]+"Cartography"), I(self._vocab[MARC]+"StillImage")),
+            g=I(self._vocab[MARC]+"MovingImage"),
+            i=(I(self._vocab[MARC]+"Audio"), I(self._vocab[MARC]+"Nonmusical"), I(self._vocab[MARC]+"Sounds")),
+            j=(I(self._vocab[MARC]+"Audio"), I(self._vocab[MARC]+"Musical")),
+            k=I(self._vocab[MARC]+"StillImage"),
+            m=(I(self._vocab[MARC]+"Multimedia"), I(self._vocab[MARC]+"Software")),
+            o=I(self._vocab[MARC]+"Kit"),
+            p=(I(self._vocab[MARC]+"Collection"), I(self._vocab[MARC]+"Multimedia")),
+            r=I(self._vocab[MARC]+"ThreeDimensionalObject"),
+            t=(I(self._vocab[MARC]+"LanguageMaterial"), I(self._vocab[MARC]+"Manuscript"))
+            )
+
+        self.INSTANCE_06 = dict(
+            )
+
+        # encoded integers which aren't numbers
+        self.MARC_INT_CODES = {
+            'nnn': I(self._vocab[MARC]+"not-applicable"),
+            'mmm': I(self._vocab[MARC]+"multiple"),
+            '---': I(self._vocab[MARC]+"unknown"),
+        }
+
+        #Intern the IRIs of other output relationships & types once, so processing records just needs lookups
+        self._type_rel = I(self._vocab[VTYPE])
+        self._lang_rel = I(self._vocab[LANG])
+        self._collection_type = I(self._vocab[MARC]+"Collection")
+        self._material_types = { typ: I(self._vocab[MARC]+typ)
+                                    for typ in set(self.MATERIAL_TYPE.values()) | set(self.MATERIAL_CATEGORY.values()) }
+
+        #Compile the fixed length data element patterns for 008 & 006, then 007
+        for typ in set(self.MATERIAL_TYPE.values()):
+            self.fixed_length_patterns(typ, 18)
+            self.fixed_length_patterns(typ, 1)
+        for typ in set(self.MATERIAL_CATEGORY.values()):
+            self.fixed_length_patterns(typ, 0)
         return
 
     def marc_int(self, rt):
         '''
         Handle encoded integers with fallback
         '''
-        mi = None # no property produced
         try:
-            mi = int(rt)
+            return int(rt)
         except ValueError:
-            if rt == 'nnn':
-                mi = I(self._vocab[MARC]+"not-applicable")
-            elif rt == 'mmm':
-                mi = I(self._vocab[MARC]+"multiple")
-            elif rt == '---':
-                mi = I(self._vocab[MARC]+"unknown")
-            else:
-                pass #None
-
-        return mi
+            #None, i.e. no property produced, for anything else
+            return self.MARC_INT_CODES.get(rt)
 
     def material_type_by_leader(self, leader, logger):
 
@@ -1458,33 +1702,77 @@ class transforms(object):
         work = I(params['default-origin'])
         instance = params['instanceids'][0]
         instance = I(instance) if instance else None
-        work_06 = dict(
-            a=I(self._vocab[MARC]+"LanguageMaterial"),
-            c=(I(self._vocab[MARC]+"LanguageMaterial"), I(self._vocab[MARC]+"NotatedMusic")),
-            d=(I(self._vocab[MARC]+"LanguageMaterial"), I(self._vocab[MARC]+"Manuscript"), I(self._vocab[MARC]+"NotatedMusic")),
-            e=(I(self._vocab[MARC]+"StillImage"), I(self._vocab[MARC]+"Cartography")),
-            f=(I(self._vocab[MARC]+"Manuscript"), I(self._vocab[MARC]+"Cartography"), I(self._vocab[MARC]+"StillImage")),
-            g=I(self._vocab[MARC]+"MovingImage"),
-            i=(I(self._vocab[MARC]+"Audio"), I(self._vocab[MARC]+"Nonmusical"), I(self._vocab[MARC]+"Sounds")),
-            j=(I(self._vocab[MARC]+"Audio"), I(self._vocab[MARC]+"Musical")),
-            k=I(self._vocab[MARC]+"StillImage"),
-            m=(I(self._vocab[MARC]+"Multimedia"), I(self._vocab[MARC]+"Software")),
-            o=I(self._vocab[MARC]+"Kit"),
-            p=(I(self._vocab[MARC]+"Collection"), I(self._vocab[MARC]+"Multimedia")),
-            r=I(self._vocab[MARC]+"ThreeDimensionalObject"),
-            t=(I(self._vocab[MARC]+"LanguageMaterial"), I(self._vocab[MARC]+"Manuscript"))
-            )
-
-        instance_06 = dict(
-            )
-
         _06 = leader[6]
-        if _06 in work_06.keys():
-            yield work, I(self._vocab[VTYPE]), work_06[_06]
-        if _06 in instance_06.keys():
-            yield instance, I(self._vocab[VTYPE]), instance_06[_06]
+        if _06 in self.WORK_06:
+            yield work, self._type_rel, self.WORK_06[_06]
+        if _06 in self.INSTANCE_06:
+            yield instance, self._type_rel, self.INSTANCE_06[_06]
         if leader[7] in ('c', 's'):
-            yield None, I(self._vocab[VTYPE]), I(self._vocab[MARC]+"Collection")
+            yield None, self._type_rel, self._collection_type
+
+    def fixed_length_patterns(self, typ, offset=0):
+        '''
+        Return the patterns for a category of 006/007/008 data compiled against this instance's lookup
+        tables & vocabulary, as a list of (position, length needed, relationship, converter, origin).
+        position is an int or a slice object, shifted by offset. converter is a function of the value
+        at the position, or None to use it verbatim. The patterns for the 006, 007 & 008 categories
+        are compiled up front, others on first use, and all are cached
+
+        >>> from bibframe.reader.marcextra import transforms
+        >>> t = transforms()
+        >>> t.fixed_length_patterns('Books', 18)[4][:3]
+        (22, 23, I(http://bibfra.me/vocab/marc/targetAudience))
+        '''
+        compiled = self._compiled_patterns.get((typ, offset))
+        if compiled is not None: return compiled
+
+        compiled = []
+        for position, rel, source, origin in FIXED_LENGTH_PATTERNS.get(typ, ()):
+            rel = self._type_rel if rel == VTYPE else I(self._vocab[MARC]+rel)
+            if source == MARC_INT:
+                convert = self.marc_int
+            elif source == DATE_YYYYMM:
+                convert = marc_date_yyyymm
+            elif source == VERBATIM:
+                convert = None
+            else:
+                table = getattr(self, source[0])
+                for key in source[1:]: table = table[key]
+                #Resolve the SLUGs up front
+                if rel != self._type_rel: table = { k: SLUG(v) for k, v in table.items() }
+                convert = table.get
+
+            if isinstance(position, tuple) and position[0] == 'slice':
+                #Slicing a too short field just gives a short value
+                compiled.append((slice(position[1]+offset, position[2]+offset), 0, rel, convert, origin))
+            else:
+                for pos in (position if isinstance(position, tuple) else (position,)):
+                    compiled.append((pos+offset, pos+offset+1, rel, convert, origin))
+
+        self._compiled_patterns[typ, offset] = compiled
+        return compiled
+
+    def decode_fixed_length(self, typ, info, offset, instance=None):
+        '''
+        Decode the fixed length data elements of a 006, 007 or 008 field for a given category
+
+        :typ: - the category used to interpret the text in 'info'
+        :info: - text string containing 006/007/008 data
+        :offset: - byte offset into 'info' containing germane data. 18 for 008, 1 for 006 and 0 for 007 (007 patterns just avoid index 0)
+        :instance: - origin for links from the instance
+
+        returns - list of 3-tuples, (origin, rel, target), each representing a new link generated from
+            the data. origin is None for links from the work
+        '''
+        links = []
+        length = len(info)
+        for position, needed, rel, convert, origin in self.fixed_length_patterns(typ, offset):
+            if needed > length: continue #Truncated field
+            value = info[position]
+            if convert is not None: value = convert(value)
+            if value is not None:
+                links.append((instance if origin else None, rel, value))
+        return links
 
     def _process_fixed_length(self, typ, info, offset, params):
         """
@@ -1503,235 +1791,12 @@ class transforms(object):
             to the work as origin
 
         """
-        if info is None: return
+        if info is None or not typ: return
 
-        work = I(params['default-origin'])
         instance = params['instanceids'][0]
         instance = I(instance) if instance else None
-        logger = params['logger']
-
-        #MARC characters skipped in the 008 field by convention
-        #In most cases we dont have to actually check for these, as they'll just not be in the value lookup tables above
-        SKIP_CHARS = ('#', ' ', '|')
-
-        # Registry of patterns to be processed from 008 field {index key: value function}
-        # There are 3 types of index keys to this dict
-        # 1) An int, simply processed as a character position passed to the value function
-        # 2) A tuple of ints, processed once for each character position in the list, each int passed to the value function
-        # 3) A tuple starting with 'slice' and then 2 ints, processed as a character chunk/slice passed as a whole to the value function
-        # If the value function returns None or a tuple with None in the last position, it's a signal to do nothing for the case at hand
-        #
-        # The current pattern structure could be simplified greatly if it
-        # internalized the common relationship between property name and the map
-        # for that field FIXME
-        PATTERNS = dict(
-            Books = {
-                (0, 1, 2, 3): lambda i: (None, I(self._vocab[MARC]+'illustrations'), SLUG(self.Books['Illustrations'].get(info[i]))),
-                4: lambda i: (None, I(self._vocab[MARC]+'targetAudience'), SLUG(self.AUDIENCE.get(info[i]))),
-                5: lambda i: (instance, I(self._vocab[MARC]+'formOfItem'), SLUG(self.FORM_OF_ITEM.get(info[i]))),
-                (6, 7, 8, 9): lambda i: (None, I(self._vocab[MARC]+'natureOfContents'), SLUG(self.NATURE_OF_CONTENTS.get(info[i]))),
-                10: lambda i: (None, I(self._vocab[MARC]+'governmentPublication'), SLUG(self.GOVT_PUBLICATION.get(info[i]))),
-                11: lambda i: (None, I(self._vocab[VTYPE]), self.CONFERENCE_PUBLICATION.get(info[i])),
-                12: lambda i: (None, I(self._vocab[VTYPE]), self.Books['Festschrift'].get(info[i])),
-                13: lambda i: (None, I(self._vocab[MARC]+'index'), SLUG(self.INDEX.get(info[i]))),
-                15: lambda i: (None, I(self._vocab[MARC]+'literaryForm'), SLUG(self.LITERARY_FORM.get(info[i]))),
-                16: lambda i: (None, I(self._vocab[MARC]+'biographical'), SLUG(self.BIOGRAPHICAL.get(info[i]))),
-            },
-            Music = {
-                ('slice', 0, 2): lambda i: (None, I(self._vocab[MARC]+'formOfComposition'), SLUG(self.Music['FormOfComposition'].get(info[i]))),
-                2: lambda i: (None, I(self._vocab[MARC]+'formatOfMusic'), SLUG(self.Music['FormatOfMusic'].get(info[i]))),
-                3: lambda i: (None, I(self._vocab[MARC]+'musicParts'), SLUG(self.Music['MusicParts'].get(info[i]))),
-                4: lambda i: (None, I(self._vocab[MARC]+'targetAudience'), SLUG(self.AUDIENCE.get(info[i]))),
-                5: lambda i: (instance, I(self._vocab[MARC]+'formOfItem'), SLUG(self.FORM_OF_ITEM.get(info[i]))),
-                (6, 7, 8, 9, 10, 11): lambda i: (None, I(self._vocab[MARC]+'accompanyingMatter'), SLUG(self.Music['AccompanyingMatter'].get(info[i]))),
-                (12, 13): lambda i: (None, I(self._vocab[MARC]+'literaryTextForSoundRecordings'), SLUG(self.Music['LiteraryTextForSoundRecordings'].get(info[i]))),
-                15: lambda i: (None, I(self._vocab[MARC]+'transpositionAndArrangement'), SLUG(self.Music['TranspositionAndArrangement'].get(info[i]))),
-            },
-            Maps = { #006/008
-                (0, 1, 2, 3): lambda i: (None, I(self._vocab[MARC]+'relief'), SLUG(self.Maps['Relief'].get(info[i]))),
-                ('slice', 4, 5): lambda i: (None, I(self._vocab[MARC]+'projection'), SLUG(self.Maps['Projection'].get(info[i]))),
-                7: lambda i: (None, I(self._vocab[MARC]+'characteristic'), SLUG(self.Maps['TypeOfCartographicMaterial'].get(info[i]))),
-                10: lambda i: (None, I(self._vocab[MARC]+'governmentPublication'), SLUG(self.GOVT_PUBLICATION.get(info[i]))),
-                11: lambda i: (instance, I(self._vocab[MARC]+'formOfItem'), SLUG(self.FORM_OF_ITEM.get(info[i]))),
-                13: lambda i: (None, I(self._vocab[MARC]+'index'), SLUG(self.INDEX.get(info[i]))),
-                (15, 16): lambda i: (None, I(self._vocab[MARC]+'specialFormatCharacteristics'), SLUG(self.Maps['SpecialFormatCharacteristics'].get(info[i]))),
-            },
-            VisualMaterials = {
-                ('slice', 0, 3): lambda i: (None, I(self._vocab[MARC]+'runtime'), self.marc_int(info[i])),
-                4: lambda i: (None, I(self._vocab[MARC]+'targetAudience'), SLUG(self.AUDIENCE.get(info[i]))),
-                10: lambda i: (None, I(self._vocab[MARC]+'governmentPublication'), SLUG(self.GOVT_PUBLICATION.get(info[i]))),
-                11: lambda i: (instance, I(self._vocab[MARC]+'formOfItem'), SLUG(self.FORM_OF_ITEM.get(info[i]))),
-                15: lambda i: (None, I(self._vocab[MARC]+'characteristic'), SLUG(self.VisualMaterials['TypeOfVisualMaterial'].get(info[i]))),
-                16: lambda i: (None, I(self._vocab[MARC]+'technique'), SLUG(self.VisualMaterials['Technique'].get(info[i]))),
-            },
-            ComputerFiles = {
-                4: lambda i: (None, I(self._vocab[MARC]+'targetAudience'), SLUG(self.AUDIENCE.get(info[i]))),
-                5: lambda i: (instance, I(self._vocab[MARC]+'formOfItem'), SLUG(self.ComputerFiles['FormOfItem'].get(info[i]))),
-                8: lambda i: (None, I(self._vocab[MARC]+'characteristic'), SLUG(self.ComputerFiles['TypeOfComputerFile'].get(info[i]))),
-                10: lambda i: (None, I(self._vocab[MARC]+'governmentPublication'), SLUG(self.GOVT_PUBLICATION.get(info[i]))),
-            },
-            MixedMaterials = {
-                5: lambda i: (None, I(self._vocab[VTYPE]), self.FORM_OF_ITEM.get(info[i])),
-            },
-            ContinuingResources = {
-                0: lambda i: (None, I(self._vocab[MARC]+'frequency'), SLUG(self.ContinuingResources['Frequency'].get(info[i]))),
-                1: lambda i: (None, I(self._vocab[MARC]+'regularity'), SLUG(self.ContinuingResources['Regularity'].get(info[i]))),
-                3: lambda i: (None, I(self._vocab[MARC]+'characteristic'), SLUG(self.ContinuingResources['TypeOfContinuingResource'].get(info[i]))),
-                4: lambda i: (instance, I(self._vocab[MARC]+'formOfOriginalItem'), SLUG(self.FORM_OF_ITEM.get(info[i]))),
-                5: lambda i: (instance, I(self._vocab[MARC]+'formOfItem'), SLUG(self.FORM_OF_ITEM.get(info[i]))),
-                6: lambda i: (None, I(self._vocab[MARC]+'natureOfEntireWork'), SLUG(self.NATURE_OF_CONTENTS.get(info[i]))),
-                (7,8,9): lambda i: (None, I(self._vocab[MARC]+'natureOfContents'), SLUG(self.NATURE_OF_CONTENTS.get(info[i]))),
-                10: lambda i: (None, I(self._vocab[MARC]+'governmentPublication'), SLUG(self.GOVT_PUBLICATION.get(info[i]))),
-                11: lambda i: (None, I(self._vocab[VTYPE]), self.CONFERENCE_PUBLICATION.get(info[i])),
-                15: lambda i: (None, I(self._vocab[MARC]+'originalAlphabetOrScriptOfTitle'), SLUG(self.ContinuingResources['OriginalAlphabetOrScriptOfTitle'].get(info[i]))),
-                16: lambda i: (None, I(self._vocab[MARC]+'entryConvention'), SLUG(self.ContinuingResources['EntryConvention'].get(info[i]))),
-            },
-            Map = { #007
-                1: lambda i: (instance, I(self._vocab[MARC]+'specificMaterialDesignation'), SLUG(self.Map['SpecificMaterialDesignation'].get(info[i]))),
-                3: lambda i: (instance, I(self._vocab[MARC]+'color'), SLUG(self.COLOR.get(info[i]))),
-                4: lambda i: (instance, I(self._vocab[MARC]+'physicalMedium'), SLUG(self.PHYSICAL_MEDIUM.get(info[i]))),
-                5: lambda i: (instance, I(self._vocab[MARC]+'typeOfReproduction'), SLUG(self.TYPE_OF_REPRODUCTION.get(info[i]))),
-                6: lambda i: (instance, I(self._vocab[MARC]+'productionReproductionDetails'), SLUG(self.PRODUCTION_REPRODUCTION_DETAILS.get(info[i]))),
-                7: lambda i: (instance, I(self._vocab[MARC]+'positiveNegativeAspect'), SLUG(self.POSITIVE_NEGATIVE_ASPECT.get(info[i]))),
-            },
-            ElectronicResource = {
-                1: lambda i: (instance, I(self._vocab[MARC]+'specificMaterialDesignation'), SLUG(self.ElectronicResource['SpecificMaterialDesignation'].get(info[i]))),
-                3: lambda i: (instance, I(self._vocab[MARC]+'color'), SLUG(self.COLOR.get(info[i]))),
-                4: lambda i: (instance, I(self._vocab[MARC]+'dimensions'), SLUG(self.ElectronicResource['Dimensions'].get(info[i]))),
-                5: lambda i: (instance, I(self._vocab[MARC]+'sound'), SLUG(self.ElectronicResource['Sound'].get(info[i]))),
-                ('slice', 6, 8): lambda i: (None, I(self._vocab[MARC]+'imageBitDepth'), self.marc_int(info[i])),
-                9: lambda i: (instance, I(self._vocab[MARC]+'fileFormat'), SLUG(self.ElectronicResource['FileFormats'].get(info[i]))),
-                10: lambda i: (instance, I(self._vocab[MARC]+'qualityAssuranceTargets'), SLUG(self.ElectronicResource['QualityAssuranceTargets'].get(info[i]))),
-                11: lambda i: (instance, I(self._vocab[MARC]+'antecedentSource'), SLUG(self.ElectronicResource['AntecedentSource'].get(info[i]))),
-                12: lambda i: (instance, I(self._vocab[MARC]+'levelOfCompression'), SLUG(self.ElectronicResource['LevelOfCompression'].get(info[i]))),
-                13: lambda i: (instance, I(self._vocab[MARC]+'reformattingQuality'), SLUG(self.ElectronicResource['ReformattingQuality'].get(info[i]))),
-            },
-            Globe = {
-                1: lambda i: (instance, I(self._vocab[MARC]+'specificMaterialDesignation'), SLUG(self.Globe['SpecificMaterialDesignation'].get(info[i]))),
-                3: lambda i: (instance, I(self._vocab[MARC]+'color'), SLUG(self.COLOR.get(info[i]))),
-                4: lambda i: (instance, I(self._vocab[MARC]+'physicalMedium'), SLUG(self.PHYSICAL_MEDIUM.get(info[i]))),
-                5: lambda i: (instance, I(self._vocab[MARC]+'typeOfReproduction'), SLUG(self.TYPE_OF_REPRODUCTION.get(info[i]))),
-            },
-            TactileMaterial = {
-                1: lambda i: (instance, I(self._vocab[MARC]+'specificMaterialDesignation'), SLUG(self.TactileMaterial['SpecificMaterialDesignation'].get(info[i]))),
-                ('slice', 3, 4): lambda i: (instance, I(self._vocab[MARC]+'classOfBrailleWriting'), SLUG(self.TactileMaterial['ClassOfBrailleWriting'].get(info[i]))),
-                5: lambda i: (instance, I(self._vocab[MARC]+'levelOfContraction'), SLUG(self.TactileMaterial['LevelOfContraction'].get(info[i]))),
-                (6, 7, 8): lambda i: (instance, I(self._vocab[MARC]+'brailleMusicFormat'), SLUG(self.TactileMaterial['BrailleMusicFormat'].get(info[i]))),
-                9: lambda i: (instance, I(self._vocab[MARC]+'specialPhysicalCharacteristics'), SLUG(self.TactileMaterial['SpecialPhysicalCharacteristics'].get(info[i]))),
-            },
-            ProjectedGraphic = {
-                1: lambda i: (instance, I(self._vocab[MARC]+'specificMaterialDesignation'), SLUG(self.ProjectedGraphic['SpecificMaterialDesignation'].get(info[i]))),
-                3: lambda i: (instance, I(self._vocab[MARC]+'color'), SLUG(self.COLOR.get(info[i]))),
-                4: lambda i: (instance, I(self._vocab[MARC]+'baseOfEmulsion'), SLUG(self.ProjectedGraphic['SpecificMaterialDesignation'].get(info[i]))),
-                5: lambda i: (instance, I(self._vocab[MARC]+'soundOnMediumOrSeparate'), SLUG(self.SOUND_ON_MEDIUM_OR_SEPARATE.get(info[i]))),
-                6: lambda i: (instance, I(self._vocab[MARC]+'mediumForSound'), SLUG(self.MEDIUM_FOR_SOUND.get(info[i]))),
-                7: lambda i: (instance, I(self._vocab[MARC]+'dimensions'), SLUG(self.DIMENSIONS_FILM.get(info[i]))),
-                8: lambda i: (instance, I(self._vocab[MARC]+'secondarySupportMaterial'), SLUG(self.SUPPORT_MATERIAL.get(info[i]))),
-            },
-            Microform = {
-                1: lambda i: (instance, I(self._vocab[MARC]+'specificMaterialDesignation'), SLUG(self.Microform['SpecificMaterialDesignation'].get(info[i]))),
-                3: lambda i: (instance, I(self._vocab[MARC]+'positiveNegativeAspect'), SLUG(self.POSITIVE_NEGATIVE_ASPECT.get(info[i]))),
-                4: lambda i: (instance, I(self._vocab[MARC]+'dimensions'), SLUG(self.Microform['Dimensions'].get(info[i]))),
-                5: lambda i: (instance, I(self._vocab[MARC]+'reductionRatioRange'), SLUG(self.Microform['ReductionRatioRange'].get(info[i]))),
-                ('slice', 6, 8): lambda i: (instance, I(self._vocab[MARC]+'reductionRatio'), info[i]),
-                9: lambda i: (instance, I(self._vocab[MARC]+'color'), SLUG(self.COLOR.get(info[i]))),
-               10: lambda i: (instance, I(self._vocab[MARC]+'emulsionOnFilm'), SLUG(self.Microform['EmulsionOnFilm'].get(info[i]))),
-               11: lambda i: (instance, I(self._vocab[MARC]+'generation'), SLUG(self.Microform['Generation'].get(info[i]))),
-               12: lambda i: (instance, I(self._vocab[MARC]+'baseOfFilm'), SLUG(self.BASE_OF_FILM.get(info[i]))),
-            },
-            NonprojectedGraphic = {
-                1: lambda i: (instance, I(self._vocab[MARC]+'specificMaterialDesignation'), SLUG(self.NonprojectedGraphic['SpecificMaterialDesignation'].get(info[i]))),
-                3: lambda i: (instance, I(self._vocab[MARC]+'color'), SLUG(self.COLOR.get(info[i]))),
-                4: lambda i: (instance, I(self._vocab[MARC]+'primarySupportMaterial'), SLUG(self.SUPPORT_MATERIAL.get(info[i]))),
-                5: lambda i: (instance, I(self._vocab[MARC]+'secondarySupportMaterial'), SLUG(self.SUPPORT_MATERIAL.get(info[i]))),
-            },
-            MotionPicture = {
-                1: lambda i: (instance, I(self._vocab[MARC]+'specificMaterialDesignation'), SLUG(self.MotionPicture['SpecificMaterialDesignation'].get(info[i]))),
-                3: lambda i: (instance, I(self._vocab[MARC]+'color'), SLUG(self.COLOR.get(info[i]))),
-                4: lambda i: (instance, I(self._vocab[MARC]+'motionPicturePresentationFormat'), SLUG(self.MotionPicture['MotionPicturePresentationFormat'].get(info[i]))),
-                5: lambda i: (instance, I(self._vocab[MARC]+'soundOnMediumOrSeparate'), SLUG(self.SOUND_ON_MEDIUM_OR_SEPARATE.get(info[i]))),
-                6: lambda i: (instance, I(self._vocab[MARC]+'mediumForSound'), SLUG(self.MEDIUM_FOR_SOUND.get(info[i]))),
-                7: lambda i: (instance, I(self._vocab[MARC]+'dimensions'), SLUG(self.DIMENSIONS_FILM.get(info[i]))),
-                8: lambda i: (instance, I(self._vocab[MARC]+'configurationOfPlaybackChannels'), SLUG(self.CONFIGURATION_OF_PLAYBACK_CHANNELS.get(info[i]))),
-                9: lambda i: (instance, I(self._vocab[MARC]+'productionElements'), SLUG(self.MotionPicture['ProductionElements'].get(info[i]))),
-               10: lambda i: (instance, I(self._vocab[MARC]+'positiveNegativeAspect'), SLUG(self.POSITIVE_NEGATIVE_ASPECT.get(info[i]))),
-               11: lambda i: (instance, I(self._vocab[MARC]+'generation'), SLUG(self.MotionPicture['Generation'].get(info[i]))),
-               12: lambda i: (instance, I(self._vocab[MARC]+'baseOfFilm'), SLUG(self.BASE_OF_FILM.get(info[i]))),
-               13: lambda i: (instance, I(self._vocab[MARC]+'refinedCategoriesOfColor'), SLUG(self.MotionPicture['RefinedCategoriesOfColor'].get(info[i]))),
-               14: lambda i: (instance, I(self._vocab[MARC]+'kindOfColorStockOrPrint'), SLUG(self.MotionPicture['KindOfColorStockOrPrint'].get(info[i]))),
-               15: lambda i: (instance, I(self._vocab[MARC]+'deteriorationStage'), SLUG(self.MotionPicture['DeteriorationStage'].get(info[i]))),
-               16: lambda i: (instance, I(self._vocab[MARC]+'completeness'), SLUG(self.MotionPicture['Completeness'].get(info[i]))),
-               ('slice', 17, 23): lambda i: (instance, I(self._vocab[MARC]+'filmInspectionDate'), marc_date_yyyymm(info[i])),
-            },
-            Kit = {
-                1: lambda i: (instance, I(self._vocab[MARC]+'specificMaterialDesignation'), SLUG(self.Kit['SpecificMaterialDesignation'].get(info[i]))),
-            },
-            NotatedMusic = {
-                1: lambda i: (instance, I(self._vocab[MARC]+'specificMaterialDesignation'), SLUG(self.NotatedMusic['SpecificMaterialDesignation'].get(info[i]))),
-            },
-            RemoteSensingImage = {
-                1: lambda i: (instance, I(self._vocab[MARC]+'specificMaterialDesignation'), SLUG(self.RemoteSensingImage['SpecificMaterialDesignation'].get(info[i]))),
-                3: lambda i: (instance, I(self._vocab[MARC]+'altitudeOfSensor'), SLUG(self.RemoteSensingImage['AltitudeOfSensor'].get(info[i]))),
-                4: lambda i: (instance, I(self._vocab[MARC]+'attitudeOfSensor'), SLUG(self.RemoteSensingImage['AttitudeOfSensor'].get(info[i]))),
-                5: lambda i: (instance, I(self._vocab[MARC]+'cloudCover'), SLUG(self.RemoteSensingImage['CloudCover'].get(info[i]))),
-                6: lambda i: (instance, I(self._vocab[MARC]+'platformConstructionType'), SLUG(self.RemoteSensingImage['PlatformConstructionType'].get(info[i]))),
-                7: lambda i: (instance, I(self._vocab[MARC]+'platformUseCategory'), SLUG(self.RemoteSensingImage['PlatformUseCategory'].get(info[i]))),
-                8: lambda i: (instance, I(self._vocab[MARC]+'sensorType'), SLUG(self.RemoteSensingImage['SensorType'].get(info[i]))),
-                ('slice', 9, 10): lambda i: (instance, I(self._vocab[MARC]+'dataType'), SLUG(self.RemoteSensingImage['DataType'].get(info[i]))),
-            },
-            SoundRecording = {
-                1: lambda i: (instance, I(self._vocab[MARC]+'specificMaterialDesignation'), SLUG(self.SoundRecording['SpecificMaterialDesignation'].get(info[i]))),
-                3: lambda i: (instance, I(self._vocab[MARC]+'speed'), SLUG(self.SoundRecording['Speed'].get(info[i]))),
-                4: lambda i: (instance, I(self._vocab[MARC]+'configurationOfPlaybackChannels'), SLUG(self.CONFIGURATION_OF_PLAYBACK_CHANNELS.get(info[i]))),
-                5: lambda i: (instance, I(self._vocab[MARC]+'grooveWidthPitch'), SLUG(self.SoundRecording['GrooveWidthPitch'].get(info[i]))),
-                6: lambda i: (instance, I(self._vocab[MARC]+'dimensions'), SLUG(self.SoundRecording['Dimensions'].get(info[i]))),
-                7: lambda i: (instance, I(self._vocab[MARC]+'tapeWidth'), SLUG(self.SoundRecording['TapeWidth'].get(info[i]))),
-                8: lambda i: (instance, I(self._vocab[MARC]+'tapeConfiguration'), SLUG(self.SoundRecording['TapeConfiguration'].get(info[i]))),
-                9: lambda i: (instance, I(self._vocab[MARC]+'kindOfDiscCylinderOrTape'), SLUG(self.SoundRecording['KindOfDiscCylinderOrTape'].get(info[i]))),
-               10: lambda i: (instance, I(self._vocab[MARC]+'kindOfMaterial'), SLUG(self.SoundRecording['KindOfMaterial'].get(info[i]))),
-               11: lambda i: (instance, I(self._vocab[MARC]+'kindOfCutting'), SLUG(self.SoundRecording['KindOfCutting'].get(info[i]))),
-               12: lambda i: (instance, I(self._vocab[MARC]+'specialPlaybackCharacteristics'), SLUG(self.SoundRecording['SpecialPlaybackCharacteristics'].get(info[i]))),
-               13: lambda i: (instance, I(self._vocab[MARC]+'captureAndStorageTechnique'), SLUG(self.SoundRecording['CaptureAndStorageTechnique'].get(info[i]))),
-            },
-            Text = {
-                1: lambda i: (instance, I(self._vocab[MARC]+'specificMaterialDesignation'), SLUG(self.Text['SpecificMaterialDesignation'].get(info[i]))),
-            },
-            VideoRecording = {
-                1: lambda i: (instance, I(self._vocab[MARC]+'specificMaterialDesignation'), SLUG(self.VideoRecording['SpecificMaterialDesignation'].get(info[i]))),
-                3: lambda i: (instance, I(self._vocab[MARC]+'color'), SLUG(self.COLOR.get(info[i]))),
-                4: lambda i: (instance, I(self._vocab[MARC]+'videorecordingFormat'), SLUG(self.VideoRecording['VideorecordingFormat'].get(info[i]))),
-                5: lambda i: (instance, I(self._vocab[MARC]+'soundOnMediumOrSeparate'), SLUG(self.SOUND_ON_MEDIUM_OR_SEPARATE.get(info[i]))),
-                6: lambda i: (instance, I(self._vocab[MARC]+'mediumForSound'), SLUG(self.MEDIUM_FOR_SOUND.get(info[i]))),
-                7: lambda i: (instance, I(self._vocab[MARC]+'dimensions'), SLUG(self.VideoRecording['Dimensions'].get(info[i]))),
-                8: lambda i: (instance, I(self._vocab[MARC]+'configurationOfPlaybackChannels'), SLUG(self.CONFIGURATION_OF_PLAYBACK_CHANNELS.get(info[i]))),
-            },
-            UnspecifiedCategory = {
-                1: lambda i: (instance, I(self._vocab[MARC]+'specificMaterialDesignation'), SLUG(self.UnspecifiedCategory['SpecificMaterialDesignation'].get(info[i]))),
-            }
-        )
 
-        # build new patterns from existing patterns by byte shifting, i.e. 18 bytes for 006->008
-        def shift_patterns(patterns, offset):
-            new_patt = {}
-            for k, v in patterns.items():
-                if isinstance(k, tuple):
-                    if k[0] == 'slice':
-                        new_k = (k[0], k[1]+offset, k[2]+offset)
-                    else:
-                        new_k = tuple((kk+offset for kk in k))
-                else: # int
-                    new_k = k+offset
-
-                new_patt[new_k] = v
-
-            return new_patt
-
-        patterns = PATTERNS.get(typ)
-        if patterns:
-            if offset:
-                patterns = shift_patterns(patterns, offset)
-
-            yield from process_patterns(patterns)
+        yield from self.decode_fixed_length(typ, info, offset, instance)
 
     def process_008(self, info, params):
         '''
@@ -1757,17 +1822,56 @@ class transforms(object):
 
         # special case language tag
         lang = info[35:38]
-        if lang not in ("###", "|||", "zxx", "mul", "sgn", "und", "   "):
-            yield work, I(self._vocab[LANG]), lang
+        if lang not in NO_LANGUAGE:
+            yield work, self._lang_rel, lang
 
         # see marc_date above re date_008
 
         typ = self.material_type_by_leader(leader, logger)
         if typ:
-            yield work, I(self._vocab[VTYPE]), I(self._vocab[MARC]+typ)
+            yield work, self._type_rel, self._material_types[typ]
 
         yield from self._process_fixed_length(typ, info, 18, params)
 
+    def process_008_batch(self, infos, leaders, instance=None, logger=logging):
+        '''
+        Decode a batch of 008 fields at once, for bulk jobs which don't need the rest of record processing
+
+        infos - list of 008 field texts. None for a record without an 008
+        leaders - list of the corresponding leaders, or one leader for all the fields
+        instance - origin for links from the instance. If omitted these links also have origin None
+
+        returns - list with, for each 008, a list of 3-tuples (origin, rel, target), as from process_008,
+            except that origin is None for links from the work
+
+        >>> from bibframe.reader.marcextra import transforms
+        >>> t = transforms()
+        >>> results = t.process_008_batch(['920219s1993    caua   j      000 0 eng  ', None], '00000nam a2200000 a 4500')
+        >>> [ (r.rsplit('/', 1)[-1], v) for (o, r, v) in results[0] ]
+        [('language', 'eng'), ('type', I(http://bibfra.me/vocab/marc/Books)), ('illustrations', 'illustrations'), ('targetAudience', 'juvenile'), ('index', 'no index present'), ('literaryForm', 'non fiction')]
+        >>> results[1]
+        []
+        '''
+        if leaders is None or isinstance(leaders, str): leaders = itertools.repeat(leaders)
+        #Material type depends only on leader positions 6 & 7, which are shared by most of a batch
+        types = {}
+        results = []
+        for info, leader in zip(infos, leaders):
+            links = []
+            results.append(links)
+            if info is None: continue
+            info = info.ljust(40)
+            lang = info[35:38]
+            if lang not in NO_LANGUAGE:
+                links.append((None, self._lang_rel, lang))
+            key = leader.ljust(24)[6:8] if leader is not None else None
+            if key not in types: types[key] = self.material_type_by_leader(leader, logger)
+            typ = types[key]
+            if typ:
+                links.append((None, self._type_rel, self._material_types[typ]))
+                links.extend(self.decode_fixed_length(typ, info, 18, instance))
+        return results
+
     def process_006(self, infos, params):
         '''
         Re: Multiple 006 fields see page 2 of University of Colorado Boulder University Libraries Cataloging Procedures Manual,
@@ -1784,7 +1888,7 @@ class transforms(object):
 
         # add a type statement for this type too
         if typ:
-            yield work, I(self._vocab[VTYPE]), I(self._vocab[MARC]+typ)
+            yield work, self._type_rel, self._material_types[typ]
 
         for info in infos:
             # pad to expected size
@@ -1806,27 +1910,6 @@ class transforms(object):
             if not typ:
                 params['logger'].debug('Unknown 007 material category "{}"'.format(_00))
             else:
-                yield instance, I(self._vocab[VTYPE]), I(self._vocab[MARC]+typ)
+                yield instance, self._type_rel, self._material_types[typ]
 
             yield from self._process_fixed_length(typ, info, 0, params)
-
-def process_patterns(patterns):
-    #Execute the rules detailed in the various positional patterns lookup tables above
-    for i, func in patterns.items():
-        if isinstance(i, tuple):
-            if i[0] == 'slice':
-                params = [slice(i[1], i[2])]
-            else:
-                params = i
-        elif isinstance(i, int):
-            params = [i]
-
-        for param in params:
-            try:
-                result = func(param)
-                result = result if isinstance(result, list) else [result]
-                for r in result:
-                    if r and r[2] is not None:
-                        yield r
-            except IndexError:
-                pass #Truncated field
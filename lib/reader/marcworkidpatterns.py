@@ -8,66 +8,76 @@ from . import VTYPE_REL
 
 LL = 'http://library.link/vocab/'
 
-WORK_HASH_TRANSFORMS = {
+#Subfields which go into the work hash, & the relationships from the work they become
+WORK_HASH_LINKS = {
     # Key creator info
-    '100$a': onwork.link(rel=LL + 'creatorName'),
-    '100$d': onwork.link(rel=LL + 'creatorDate'),
+    '100$a': LL + 'creatorName',
+    '100$d': LL + 'creatorDate',
 
-    '110$a': onwork.link(rel=BL + 'organizationName'),
-    '110$d': onwork.link(rel=BL + 'organizationDate'),
+    '110$a': BL + 'organizationName',
+    '110$d': BL + 'organizationDate',
 
-    '111$a': onwork.link(rel=BL + 'meetingName'),
-    '111$d': onwork.link(rel=BL + 'meetingDate'),
+    '111$a': BL + 'meetingName',
+    '111$d': BL + 'meetingDate',
 
-    '130$a': onwork.link(rel=BL + 'collectionName'),
-
-    # key uniform title info
-    '240a': oninstance.link(rel=LL + 'collectionTitle'),
-    # '240f': oninstance.link(rel=LL + 'collectionDate'),
-    # '240n': oninstance.link(rel=LL + 'collectionPartCount'),
-    # '240o': oninstance.link(rel=LL + 'collectionMusicArrangement'),
-    # '240p': oninstance.link(rel=LL + 'collectionPartName'),
-    # '240l': oninstance.link(rel=LL + 'collectionLanguage'),
+    '130$a': BL + 'collectionName',
 
     # Title info
-    '245$a': onwork.link(rel=BL + 'title'),
-    '245$b': onwork.link(rel=MARC + 'titleRemainder'),
-    '245$c': onwork.link(rel=MARC + 'titleStatement'),
-    '245$n': onwork.link(rel=MARC + 'titleNumber'),
-    '245$p': onwork.link(rel=MARC + 'titlePart'),
-    '245$f': onwork.link(rel=MARC + 'inclusiveDates'),
-    '245$k': onwork.link(rel=MARC + 'formDesignation'),
+    '245$a': BL + 'title',
+    '245$b': MARC + 'titleRemainder',
+    '245$c': MARC + 'titleStatement',
+    '245$n': MARC + 'titleNumber',
+    '245$p': MARC + 'titlePart',
+    '245$f': MARC + 'inclusiveDates',
+    '245$k': MARC + 'formDesignation',
 
     # Title variation info
-    '246$a': onwork.link(rel=MARC + 'titleVariation'),
-    '246$b': onwork.link(rel=MARC + 'titleVariationRemainder'),
-    '246$f': onwork.link(rel=MARC + 'titleVariationDate'),
+    '246$a': MARC + 'titleVariation',
+    '246$b': MARC + 'titleVariationRemainder',
+    '246$f': MARC + 'titleVariationDate',
 
     # # Key edition info
-    # '250$a': onwork.link(rel=MARC + 'edition'),
-    # '250$b': onwork.link(rel=MARC + 'edition'),
+    # '250$a': MARC + 'edition',
+    # '250$b': MARC + 'edition',
 
     # Key subject info
-    '600$a': onwork.link(rel=LL + 'subjectName'),
-    '610$a': onwork.link(rel=LL + 'subjectName'),
-    '611$a': onwork.link(rel=LL + 'subjectName'),
-    '650$a': onwork.link(rel=LL + 'subjectName'),
-    '651$a': onwork.link(rel=LL + 'subjectName'),
+    '600$a': LL + 'subjectName',
+    '610$a': LL + 'subjectName',
+    '611$a': LL + 'subjectName',
+    '650$a': LL + 'subjectName',
+    '651$a': LL + 'subjectName',
 
     # Key contributor info
-    '700$a': onwork.link(rel=LL + 'relatedWorkOrContributorName'),
-    '700$d': onwork.link(rel=LL + 'relatedWorkOrContributorDate'),
+    '700$a': LL + 'relatedWorkOrContributorName',
+    '700$d': LL + 'relatedWorkOrContributorDate',
 
-    '710$a': onwork.link(rel=LL + 'relatedWorkOrContributorName'),
-    '710$d': onwork.link(rel=LL + 'relatedWorkOrContributorDate'),
+    '710$a': LL + 'relatedWorkOrContributorName',
+    '710$d': LL + 'relatedWorkOrContributorDate',
 
-    '711$a': onwork.link(rel=LL + 'relatedWorkOrContributorName'),
-    '711$d': onwork.link(rel=LL + 'relatedWorkOrContributorDate'),
+    '711$a': LL + 'relatedWorkOrContributorName',
+    '711$d': LL + 'relatedWorkOrContributorDate',
 
-    '730$a': onwork.link(rel=BL + 'collectionName'),
+    '730$a': BL + 'collectionName',
 }
 
 
+WORK_HASH_TRANSFORMS = { spec: onwork.link(rel=rel) for spec, rel in WORK_HASH_LINKS.items() }
+
+# key uniform title info
+WORK_HASH_TRANSFORMS['240a'] = oninstance.link(rel=LL + 'collectionTitle')
+# WORK_HASH_TRANSFORMS['240f'] = oninstance.link(rel=LL + 'collectionDate')
+# WORK_HASH_TRANSFORMS['240n'] = oninstance.link(rel=LL + 'collectionPartCount')
+# WORK_HASH_TRANSFORMS['240o'] = oninstance.link(rel=LL + 'collectionMusicArrangement')
+# WORK_HASH_TRANSFORMS['240p'] = oninstance.link(rel=LL + 'collectionPartName')
+# WORK_HASH_TRANSFORMS['240l'] = oninstance.link(rel=LL + 'collectionLanguage')
+
+#The same subfields by tag, then subfield code, for taking work hash data straight from the input fields
+WORK_HASH_FIELDS = {}
+for spec, rel in WORK_HASH_LINKS.items():
+    tag, sfsep, code = spec.partition('$')
+    WORK_HASH_FIELDS.setdefault(tag, {})[code] = rel
+
+
 WORK_HASH_TRANSFORMS_ID = 'http://bibfra.me/tool/pybibframe/transforms#workhash'
 
 register_transforms(WORK_HASH_TRANSFORMS_ID, WORK_HASH_TRANSFORMS)
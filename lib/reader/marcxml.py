@@ -16,6 +16,7 @@ from versa import I, VERSA_BASEIRI, ORIGIN, RELATIONSHIP, TARGET, ATTRIBUTES
 from versa import util
 
 from bibframe.reader import marc
+from bibframe.reader.util import PARSED_SUBFIELDS, parse_subfields
 
 MARCXML_NS = marc.MARCXML_NS
 
@@ -27,6 +28,42 @@ IS_VALID_TAG = lambda t: len(t.rsplit('/',1)[-1]) == 3
 
 NSSEP = ' '
 
+#str.isascii is only in Python 3.7 or more recent
+IS_ASCII = getattr(str, 'isascii', None) or re.compile(r'[\x00-\x7f]*\Z').match
+
+def normalize_text(text):
+    '''
+    NFKC normalization precombines composed characters and substitutes compatibility codepoints
+    We want to make sure we're dealing with comparable & consistently hashable strings throughout the toolchain
+
+    >>> normalize_text('Zweig') == 'Zweig', normalize_text('\ufb01n') == 'fin'
+    (True, True)
+    '''
+    #NFKC leaves pure ASCII unchanged, so skip the work
+    if IS_ASCII(text): return text
+    return unicodedata.normalize('NFKC', text)
+
+def split_name(name, lax=False):
+    '''
+    Namespace & local name of an element, from its name as reported by expat
+    With lax, namespaces aren't processed, so any prefix is dropped & all elements are assumed to be MARC/XML
+
+    >>> split_name('http://www.loc.gov/MARC21/slim record'), split_name('marc:record', lax=True)[1]
+    (['http://www.loc.gov/MARC21/slim', 'record'], 'record')
+    '''
+    if lax:
+        (head, sep, tail) = name.partition(':')
+        return MARCXML_NS, tail or head
+    return name.split(NSSEP) if NSSEP in name else (None, name)
+
+
+class stop_parsing(Exception):
+    '''
+    Raised from the parse callbacks once the record handler declines further records, to end the parse early
+    '''
+    pass
+
+
 class expat_callbacks(object):
     def __init__(self, sink, parser, logger, model_factory, lax=False):
         self._sink = sink
@@ -40,12 +77,7 @@ class expat_callbacks(object):
         return
 
     def start_element(self, name, attributes):
-        if self._lax:
-            (head, sep, tail) = name.partition(':')
-            local = tail or head
-            ns = MARCXML_NS #Just assume all elements are MARC/XML
-        else:
-            ns, local = name.split(NSSEP) if NSSEP in name else (None, name)
+        ns, local = split_name(name, self._lax)
         # XXX Do we want to do some basic content model checking? i.e. no subfield as root element?
         if ns == MARCXML_NS:
             #Ignore the 'collection' element
@@ -58,12 +90,12 @@ class expat_callbacks(object):
                 #For input model plugins, important that natural ordering be preserved
                 self._record_model = self._model_factory()
             elif local == 'leader':
-                self._chardata_dest = ''
+                self._chardata = []
                 self._link_iri = MARCXML_NS + '/leader'
                 self._marc_attributes = {}
                 self._getcontent = True
             elif local == 'controlfield':
-                self._chardata_dest = ''
+                self._chardata = []
                 tag = attributes['tag'].strip()
                 if len(tag) != 3 or not tag.isdigit():
                     self._logger.warn('Invalid datafield tag "{0}" in record "{1}"'.format(tag, self._record_id))
@@ -81,7 +113,7 @@ class expat_callbacks(object):
                 self._marc_attributes = dict(([k, v.strip()] for (k, v) in attributes.items() if ' ' not in k))
                 self._subfield_count = 1
             elif local == 'subfield':
-                self._chardata_dest = ''
+                self._chardata = []
                 self._subfield = attributes['code'].strip()
                 if not VALID_SUBFIELD_PAT.match(self._subfield):
                     self._logger.warn('Invalid subfield code "{0}" in record "{1}", tag "{2}"'.format(self._subfield, self._record_id, self._marc_attributes['tag']))
@@ -91,43 +123,40 @@ class expat_callbacks(object):
         return
 
     def end_element(self, name):
-        if self._lax:
-            (head, sep, tail) = name.partition(':')
-            local = tail or head
-            ns = MARCXML_NS #Just assume all elements are MARC/XML
-        else:
-            ns, local = name.split(NSSEP) if NSSEP in name else (None, name)
+        ns, local = split_name(name, self._lax)
         if ns == MARCXML_NS:
             if local == 'record':
                 try:
                     self._sink.send(self._record_model)
                 except StopIteration:
                     #Handler coroutine has declined to process more records. Perhaps it's hit a limit
-                    #FIXME would be nice to throw some sort of signal to stop parse. Or...we can wait until we've evolved beyond SAX to enhance the event architecture
-                    pass
+                    #Exceptions in callbacks abort the expat parse, so no more of the input is read
+                    raise stop_parsing
             elif local == 'datafield':
                 #Convert list of pairs of subfield codes/values to dict of lists (since there can be multiple of each subfields)
                 #sfdict = defaultdict(list)
                 #[ sfdict[sf[0]].append(sf[1]) for sf in self._record[-1][3] ]
                 #self._record[-1][3] = sfdict
                 if self._record_model and IS_VALID_TAG(self._link_iri):
+                    #Parse the subfields once here, rather than every time they're looked up
+                    self._marc_attributes[PARSED_SUBFIELDS] = parse_subfields(self._marc_attributes)
                     self._record_model.add(self._record_id, self._link_iri, '', self._marc_attributes)
                 self._getcontent = False
             elif local == 'subfield':
-                self._marc_attributes['{}.{}'.format(self._subfield_count, self._subfield)] = self._chardata_dest
+                self._marc_attributes['{}.{}'.format(self._subfield_count, self._subfield)] = normalize_text(''.join(self._chardata))
+                self._getcontent = False
             elif local == 'leader':
-                if self._record_model: self._record_model.add(self._record_id, self._link_iri, self._chardata_dest, self._marc_attributes)
+                if self._record_model: self._record_model.add(self._record_id, self._link_iri, normalize_text(''.join(self._chardata)), self._marc_attributes)
                 self._getcontent = False
             elif local == 'controlfield':
                 if self._record_model and IS_VALID_TAG(self._link_iri):
-                    self._record_model.add(self._record_id, self._link_iri, self._chardata_dest, self._marc_attributes)
+                    self._record_model.add(self._record_id, self._link_iri, normalize_text(''.join(self._chardata)), self._marc_attributes)
                 self._getcontent = False
 
     def char_data(self, data):
         if self._getcontent:
-            #NFKC normalization precombines composed characters and substitutes compatibility codepoints
-            #We want to make sure we're dealing with comparable & consistently hashable strings throughout the toolchain
-            self._chardata_dest += unicodedata.normalize('NFKC', data)
+            #Normalized once the whole value is in, at the end of the element
+            self._chardata.append(data)
 
 
 #PYTHONASYNCIODEBUG = 1
@@ -140,8 +169,9 @@ def handle_marcxml_source(source, sink, args, logger, model_factory):
 
     source - amara3.inputsource.inputsource instance
     sink - coroutine to be sent the generated resources
-    args -
-    model_factory - Factory function for creating Versa models
+    args - dict of options: lax, and record_range, a (start, stop) pair of record numbers, as for slicing,
+            to parse just that range of records, seeking straight to them using the file's record index
+    model_factory - Factory function for creating the input model for each record (e.g. bibframe.reader.record.marc_record)
     '''
     #Cannot reuse a pyexpat parser, so must create a new one for each input file
     next(sink) #Start the coroutine running
@@ -158,7 +188,15 @@ def handle_marcxml_source(source, sink, args, logger, model_factory):
     parser.CharacterDataHandler = handler.char_data
     parser.buffer_text = True
 
-    parser.ParseFile(source.stream)
+    record_range = args.get('record_range')
+    try:
+        if record_range is None:
+            parser.ParseFile(source.stream)
+        else:
+            from bibframe.reader import recordindex
+            recordindex.parse_range(parser, source.stream, record_range, lax=lax, logger=logger)
+    except stop_parsing:
+        pass
     if handler.no_records:
         warnings.warn("No records found in this file. Possibly an XML namespace problem (try using the 'lax' flag).", RuntimeWarning)
     return
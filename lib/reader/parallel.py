@@ -0,0 +1,402 @@
+'''
+Multi-process conversion of MARC records, sharding records across worker processes
+
+marc2bf --workers 8 -o /tmp/out.json bigdump.mrx
+
+Each worker runs the full record_handler pipeline (bootstrap & main phases) on
+chunks of records and sends back the Versa links generated. The parent process
+merges results in the original record order, so that the output is identical to
+a serial run.
+
+The catch is resource folding. Whether a materialized resource is written out
+in full depends on whether its ID has been seen in any earlier record (existing_ids).
+Each worker keeps a replica of the IDs seen so far, which the parent keeps topped up
+with every chunk dispatched. Workers keep a trace of every lookup on their replica.
+When merging, the trace is replayed against the actual IDs seen by the time the record
+is reached in serial order. On any disagreement the worker result is discarded and the
+parent reconverts the record itself against the true existing_ids.
+Conversion is deterministic given the same folding decisions, so accepted worker
+results are exactly what a serial run would have produced.
+
+Relies on the fork start method, so that registered transforms, services & other
+module-level state are inherited by the workers.
+'''
+
+import logging
+import traceback
+import multiprocessing
+
+from bibframe.contrib.datachefids import idgen
+
+from bibframe.writer import versajson
+
+from bibframe.util import materialize_cache, MATERIALIZE_CACHE_SIZE
+
+from . import marc, idstore
+from .record import marc_record
+
+#Number of records sent to a worker in one go
+DEFAULT_CHUNK_SIZE = 50
+
+#Number of chunks each worker is allowed to have in flight
+MAX_CHUNKS_PER_WORKER = 2
+
+
+class traced_ids(object):
+    '''
+    Store of existing resource IDs (see bibframe.reader.idstore) wrapped so as to keep a trace
+    of lookups & additions. Used by workers to report which folding decisions they made
+
+    Trace entries are (id, found) for lookups, (id, None) for additions and
+    (None, nonempty) for checks of whether any IDs have been seen at all, which matter
+    because bfcontext starts over with a fresh set if there are none
+    '''
+    def __init__(self, store):
+        self._store = store
+        self.reset()
+        return
+
+    def reset(self):
+        self.trace = []
+        return
+
+    def __contains__(self, item):
+        found = item in self._store
+        self.trace.append((item, found))
+        return found
+
+    def add(self, item):
+        self.trace.append((item, None))
+        self._store.add(item)
+        return
+
+    def update(self, items):
+        '''
+        Add IDs seen by other workers, without tracing them
+        '''
+        for item in items: self._store.add(item)
+        return
+
+    def __bool__(self):
+        nonempty = bool(self._store)
+        self.trace.append((None, nonempty))
+        return nonempty
+
+    def __len__(self):
+        return len(self._store)
+
+    def close(self):
+        self._store.close()
+        return
+
+
+class logged_ids(object):
+    '''
+    Store of existing resource IDs wrapped so as to keep a log of IDs in the order they were first added
+    Used by the parent to compute the updates to send to each worker's replica. The log
+    only goes back as far as the IDs all workers have yet to be sent
+    '''
+    def __init__(self, store):
+        self._store = store
+        self.log = []
+        return
+
+    def __contains__(self, item):
+        return item in self._store
+
+    def add(self, item):
+        if item not in self._store:
+            self.log.append(item)
+            self._store.add(item)
+        return
+
+    def __bool__(self):
+        return bool(self._store)
+
+    def __len__(self):
+        return len(self._store)
+
+    def close(self):
+        self._store.close()
+        return
+
+
+def replay_trace(trace, existing_ids):
+    '''
+    Check a worker's trace of lookups against the actual existing IDs at the point
+    the record comes up in serial order, adding the record's IDs if they all agree
+
+    Returns True if the worker's folding decisions were all correct
+    '''
+    added = set()
+    for item, found in trace:
+        if item is None:
+            if found != bool(added or existing_ids): return False
+        elif found is None:
+            added.add(item)
+        elif found != (item in added or item in existing_ids):
+            return False
+    for item, found in trace:
+        if found is None: existing_ids.add(item)
+    return True
+
+
+def record_links(model):
+    '''
+    Return a list of the links in a Versa model, in order
+    '''
+    return [ link for (rid, link) in model ]
+
+
+def converter(model, existing_ids, handler_kwargs, materialize_cache=None):
+    '''
+    Set up a record_handler for converting records one at a time
+
+    Returns a function which takes an input model and returns a tuple (ok, links)
+    where ok is False if processing of the record was aborted, in which case
+    links has whatever was generated before the abort
+    '''
+    captured = []
+    def capture():
+        captured.append(record_links(model))
+        model.create_space()
+
+    sink = marc.record_handler(model, postprocess=capture, out=None, plugins=[],
+                                limiting=[0, None], existing_ids=existing_ids, materialize_cache=materialize_cache,
+                                ids=idgen(handler_kwargs.get('entbase')), **handler_kwargs)
+    next(sink)
+
+    def convert(input_model):
+        sink.send(input_model)
+        if captured:
+            return True, captured.pop()
+        #Aborted record. Whatever has been generated so far stays in the model
+        links = record_links(model)
+        model.create_space()
+        return False, links
+
+    return convert
+
+
+def worker_main(inq, outq, handler_kwargs, id_store, cache_size):
+    '''
+    Main loop for a worker process
+    '''
+    model_factory = handler_kwargs['model_factory']
+    #As in a serial run, the cache of materialized IDs carries on across sources
+    id_cache = materialize_cache(cache_size)
+    generation = None
+    existing_ids = None
+    try:
+        while True:
+            msg = inq.get()
+            if msg is None: break
+            gen, seq, new_ids, records = msg
+            if gen != generation:
+                #New input source, so starting over with folding
+                generation = gen
+                if existing_ids is not None: existing_ids.close()
+                existing_ids = traced_ids(id_store())
+                convert = converter(model_factory(), existing_ids, handler_kwargs, materialize_cache=id_cache)
+            existing_ids.update(new_ids)
+
+            results = []
+            for links in records:
+                existing_ids.reset()
+                input_model = marc_record()
+                input_model.add_many(links)
+                ok, out_links = convert(input_model)
+                results.append((ok, out_links, existing_ids.trace))
+            outq.put((seq, results))
+    except Exception:
+        outq.put((None, traceback.format_exc()))
+    finally:
+        if existing_ids is not None: existing_ids.close()
+    return
+
+
+class worker_pool(object):
+    '''
+    Pool of worker processes for record conversion, with the bookkeeping needed to
+    keep each worker's replica of existing IDs up to date
+
+    nworkers - number of worker processes
+    handler_kwargs - keyword arguments for marc.record_handler
+    id_store - function to create a new store of existing IDs (see bibframe.reader.idstore),
+               for the parent's IDs. A plain set if omitted
+    replica_store - likewise for each worker's replica of the IDs. Same as id_store if omitted
+    cache_size - maximum number of entries in each worker's cache of materialized IDs
+    '''
+    def __init__(self, nworkers, handler_kwargs, id_store=None, replica_store=None,
+                    cache_size=MATERIALIZE_CACHE_SIZE, chunksize=None):
+        ctx = multiprocessing.get_context('fork')
+        self.chunksize = chunksize or DEFAULT_CHUNK_SIZE
+        self.handler_kwargs = handler_kwargs
+        self.id_store = id_store or idstore.memory_id_store
+        self.existing_ids = None
+        self._outq = ctx.Queue()
+        self._inqs = []
+        self._procs = []
+        for i in range(nworkers):
+            inq = ctx.Queue()
+            proc = ctx.Process(target=worker_main, args=(inq, self._outq, handler_kwargs, replica_store or self.id_store, cache_size), daemon=True)
+            proc.start()
+            self._inqs.append(inq)
+            self._procs.append(proc)
+        self._generation = 0
+        self.start_source()
+        return
+
+    def start_source(self):
+        '''
+        Reset shared state at the start of a new input source
+        '''
+        self._generation += 1
+        if self.existing_ids is not None: self.existing_ids.close()
+        self.existing_ids = logged_ids(self.id_store())
+        #Per worker: how far into the existing IDs log its replica has been brought up to date
+        self._synced = [0] * len(self._procs)
+        self._inflight = [0] * len(self._procs)
+        self._assignment = {}
+        self._next_seq = 0
+        return
+
+    def full(self):
+        return min(self._inflight) >= MAX_CHUNKS_PER_WORKER
+
+    def busy(self):
+        return any(self._inflight)
+
+    def ready(self):
+        return not self._outq.empty()
+
+    def dispatch(self, records):
+        '''
+        Send a chunk of records (each a list of input links) to the least busy worker
+        Returns the sequence number of the chunk
+        '''
+        w = self._inflight.index(min(self._inflight))
+        log = self.existing_ids.log
+        new_ids = log[self._synced[w]:]
+        self._synced[w] = len(log)
+        #Drop what all the workers have been sent
+        sent = min(self._synced)
+        if sent:
+            del log[:sent]
+            self._synced = [ n - sent for n in self._synced ]
+        seq = self._next_seq
+        self._next_seq += 1
+        self._inqs[w].put((self._generation, seq, new_ids, records))
+        self._inflight[w] += 1
+        self._assignment[seq] = w
+        return seq
+
+    def receive(self):
+        '''
+        Wait for the next chunk result from any worker. Returns (seq, results)
+        '''
+        seq, results = self._outq.get()
+        if seq is None:
+            raise RuntimeError('Error in conversion worker process:\n' + results)
+        self._inflight[self._assignment.pop(seq)] -= 1
+        return seq, results
+
+    def close(self):
+        for inq in self._inqs:
+            inq.put(None)
+        for proc in self._procs:
+            proc.join()
+        if self.existing_ids is not None: self.existing_ids.close()
+        return
+
+
+def record_dispatcher(pool, model, limiting=None, postprocess=None, out=None,
+                        logger=logging, canonical=False, out_lines=False, materialize_cache=None, **kwargs):
+    '''
+    Coroutine counterpart to marc.record_handler which farms out records to a worker_pool
+    and writes out results in the original order
+
+    model - the Versa model for the record
+    limiting - mutable pair of [count, limit] used to control the number of records processed
+    out_lines - If True write Versa JSON output as JSON Lines, one record per line
+    materialize_cache - cache of materialized resource IDs for records reconverted in this process
+    '''
+    pool.start_source()
+    existing_ids = pool.existing_ids
+    handler_kwargs = pool.handler_kwargs
+    model_factory = handler_kwargs['model_factory']
+
+    #Used in the parent process for records that need to be reconverted against the actual existing IDs
+    scratch_model = model_factory()
+    convert_locally = converter(scratch_model, existing_ids, handler_kwargs, materialize_cache=materialize_cache)
+
+    chunk = []
+    pending = {} #Chunk seq -> (input records, results or None)
+    #Links left over in the model from aborted records end up in the output of the next record, as with record_handler
+    state = {'next_seq': 0, 'carry': record_links(model), 'done': False}
+    model.create_space()
+
+    def emit(links):
+        model.add_many(links)
+        if jsonout: jsonout.record(model)
+        if postprocess: postprocess()
+        limiting[0] += 1
+        if limiting[1] is not None and limiting[0] >= limiting[1]:
+            state['done'] = True
+
+    def merge(records, results):
+        for links, (ok, out_links, trace) in zip(records, results):
+            if state['done']: return
+            #A record following an aborted one needs the leftovers in its model, so is always handled locally
+            if state['carry'] or not replay_trace(trace, existing_ids):
+                scratch_model.add_many(state['carry'])
+                input_model = marc_record()
+                input_model.add_many(links)
+                ok, out_links = convert_locally(input_model)
+            if ok:
+                emit(out_links)
+                state['carry'] = []
+            else:
+                state['carry'] = out_links
+
+    def collect(block):
+        #Pull in any results available, and write out all those next in line
+        while pool.busy() and (block or pool.ready()):
+            seq, results = pool.receive()
+            pending[seq] = (pending[seq][0], results)
+            block = False
+            while state['next_seq'] in pending and pending[state['next_seq']][1] is not None:
+                records, results = pending.pop(state['next_seq'])
+                state['next_seq'] += 1
+                if not state['done']: merge(records, results)
+
+    def flush():
+        if chunk:
+            seq = pool.dispatch(list(chunk))
+            pending[seq] = (list(chunk), None)
+            del chunk[:]
+
+    def finish():
+        #Drain what's outstanding, so the workers are clean for the next source
+        while pool.busy(): collect(True)
+        model.add_many(state['carry'])
+
+    jsonout = versajson.writer(out, lines=out_lines) if out and not canonical else None
+    if jsonout: jsonout.start()
+    try:
+        while True:
+            input_model = yield
+            chunk.append(record_links(input_model))
+            if len(chunk) >= pool.chunksize:
+                while pool.full(): collect(True)
+                flush()
+                collect(False)
+            if state['done']:
+                #Limit reached, so finish up now, as with record_handler
+                break
+    except GeneratorExit:
+        flush()
+    finish()
+    logger.debug('Completed processing {0} record{1}.'.format(limiting[0], '' if limiting[0] == 1 else 's'))
+    if jsonout: jsonout.finish()
+    return
@@ -0,0 +1,103 @@
+'''
+Lightweight input model for a single MARC record
+
+A full Versa memory model per record is more than is needed for input which is built once,
+read through a few times and then thrown away. marc_record keeps the fields in parallel lists
+and implements the subset of the Versa model API used on input models in processing & by
+plug-ins: iteration, match, add, add_many, remove & size
+
+Unlike with the Versa memory model, attributes aren't copied when links are added or read,
+so they should be treated as read-only. Also, a link identical to one already in the record
+(e.g. from a repeated field) is always added, whereas the memory models of some versions of
+Versa ignore such links (see bibframe.reader.marc.refuses_duplicates)
+'''
+
+
+class marc_record(object):
+    '''
+    Input model for a MARC record
+
+    >>> rec = marc_record()
+    >>> rec.add('record-1', 'http://www.loc.gov/MARC21/slim/leader', '00000nam a2200000 a 4500')
+    0
+    >>> rec.add_many([('record-1', 'http://www.loc.gov/MARC21/slim/control/001', '12345', {'tag': '001'})])
+    >>> [ t for (o, r, t, a) in rec.match(None, 'http://www.loc.gov/MARC21/slim/control/001') ]
+    ['12345']
+    >>> rec.remove(0)
+    >>> list(rec)
+    [(0, ('record-1', 'http://www.loc.gov/MARC21/slim/control/001', '12345', {'tag': '001'}))]
+    '''
+    __slots__ = ('_origins', '_rels', '_targets', '_attrs')
+
+    def __init__(self):
+        self.create_space()
+        return
+
+    def create_space(self):
+        self._origins = []
+        self._rels = []
+        self._targets = []
+        self._attrs = []
+        return
+
+    def size(self):
+        return len(self._rels)
+
+    def __iter__(self):
+        return enumerate(zip(self._origins, self._rels, self._targets, self._attrs))
+
+    def __getitem__(self, i):
+        return (self._origins[i], self._rels[i], self._targets[i], self._attrs[i])
+
+    def match(self, origin=None, rel=None, target=None, attrs=None, include_ids=False):
+        '''
+        Iterator over links that match a pattern of components, as with the Versa memory model
+        '''
+        rels = self._rels
+        #Relationship is the usual criterion, so check it first
+        indices = ( i for i, r in enumerate(rels) if r == rel ) if rel else range(len(rels))
+        for index in indices:
+            if origin and origin != self._origins[index]: continue
+            if target and target != self._targets[index]: continue
+            link_attrs = self._attrs[index]
+            if attrs and any(( k not in link_attrs or link_attrs[k] != v for k, v in attrs.items() )): continue
+            link = (self._origins[index], rels[index], self._targets[index], link_attrs)
+            yield (index, link) if include_ids else link
+        return
+
+    def add(self, origin, rel, target, attrs=None):
+        '''
+        Add a link, returning its index
+        '''
+        if not origin:
+            raise ValueError('Relationship origin cannot be null')
+        if not rel:
+            raise ValueError('Relationship ID cannot be null')
+        self._origins.append(origin)
+        self._rels.append(rel)
+        self._targets.append(target)
+        self._attrs.append({} if attrs is None else attrs)
+        return len(self._rels) - 1
+
+    def add_many(self, links):
+        '''
+        Add links, each a tuple of origin, relationship, target and optionally attributes,
+        or an (index, link) pair as generated from iteration over a model
+        '''
+        for link in links:
+            if len(link) == 2: link = link[1]
+            self.add(*link)
+        return
+
+    def remove(self, index):
+        '''
+        Delete one or more links, by index. As with the Versa memory model, the indices of later links shift down
+        '''
+        indices = set(index) if hasattr(index, '__iter__') else {index}
+        if not indices: return
+        keep = [ i for i in range(len(self._rels)) if i not in indices ]
+        self._origins = [ self._origins[i] for i in keep ]
+        self._rels = [ self._rels[i] for i in keep ]
+        self._targets = [ self._targets[i] for i in keep ]
+        self._attrs = [ self._attrs[i] for i in keep ]
+        return
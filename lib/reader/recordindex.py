@@ -0,0 +1,237 @@
+'''
+Index of the byte offsets of the records in a MARC/XML file, so that any range of records can
+be parsed by seeking straight to it, e.g. to spread one large file across machines:
+
+marc2bf --index records.mrx
+marc2bf --range 0:50000 -o part0.versa.json records.mrx
+marc2bf --range 50000:100000 -o part1.versa.json records.mrx
+
+The index is kept in a sidecar file alongside the MARC/XML (records.mrx.bfidx), and is built
+with a single scan of the file, recognizing records by the same namespace rules (strict or lax)
+as in conversion. Records are expected to be siblings, e.g. all within a marc:collection, in an
+ASCII compatible encoding such as UTF-8
+
+The sidecar has a fixed header, then the XML before the first record (the XML declaration &
+opening tags of its ancestors, with their namespace declarations), the matching closing tags,
+then the start & end offsets of each record as little-endian 64-bit integers
+'''
+
+import io
+import os
+import re
+import sys
+import struct
+import logging
+import xml.parsers.expat
+from array import array
+
+from .marcxml import split_name, NSSEP, MARCXML_NS
+
+INDEX_SUFFIX = '.bfidx'
+INDEX_MAGIC = b'PYBFIDX1'
+#Magic, lax flag, size of the indexed file, number of records, lengths of the opening & closing XML
+INDEX_HEADER = struct.Struct('<8sBQQII')
+
+#Bytes to read at a time when scanning or parsing
+CHUNK_SIZE = 1 << 20
+
+TAG_NAME_PAT = re.compile(br'<([^\s/>]+)')
+
+
+class record_index(object):
+    '''
+    Byte offsets of the records in a MARC/XML file
+
+    starts - array of the offset of the start of each record element
+    ends - array of the offset just past the end of each record element
+    prolog - the XML before the first record, e.g. XML declaration & <collection> start tag, as bytes
+    epilog - XML to close the elements opened in prolog, e.g. </collection>, as bytes
+    size - size in bytes of the indexed file, to check the index isn't out of date
+    lax - True if records were recognized with lax namespace rules
+    '''
+    def __init__(self, starts, ends, prolog=b'', epilog=b'', size=0, lax=False):
+        self.starts = starts
+        self.ends = ends
+        self.prolog = prolog
+        self.epilog = epilog
+        self.size = size
+        self.lax = lax
+        return
+
+    def __len__(self):
+        return len(self.starts)
+
+    def chunks(self, stream, start=None, stop=None, chunk_size=CHUNK_SIZE):
+        '''
+        Generate the chunks of a standalone MARC/XML document of just the records from start up to
+        (not including) stop, read by seeking in a stream of the indexed file. As with slicing,
+        start & stop can be omitted or negative. Generates nothing if there are no records in the range
+        '''
+        start, stop, step = slice(start, stop).indices(len(self))
+        if start >= stop: return
+        yield self.prolog
+        pos, end = self.starts[start], self.ends[stop - 1]
+        stream.seek(pos)
+        while pos < end:
+            chunk = stream.read(min(chunk_size, end - pos))
+            if not chunk:
+                raise ValueError('MARC/XML file is shorter than its record index says. Is the index out of date?')
+            pos += len(chunk)
+            yield chunk
+        yield self.epilog
+
+
+def build_index(stream, lax=False, chunk_size=CHUNK_SIZE):
+    '''
+    Scan a seekable binary stream of MARC/XML, returning a record_index
+
+    >>> idx = build_index(io.BytesIO(b'<?xml version="1.0"?><c xmlns="http://www.loc.gov/MARC21/slim"><record><leader/></record>\\n<record/></c>'))
+    >>> len(idx), idx.prolog, idx.epilog
+    (2, b'<?xml version="1.0"?><c xmlns="http://www.loc.gov/MARC21/slim">', b'</c>')
+    >>> list(idx.starts), list(idx.ends)
+    ([63, 90], [89, 99])
+    '''
+    if lax:
+        parser = xml.parsers.expat.ParserCreate()
+    else:
+        parser = xml.parsers.expat.ParserCreate(namespace_separator=NSSEP)
+    starts, ends = array('Q'), array('Q')
+    #Offsets of the start tags of the elements currently open
+    open_tags = []
+    #Depth of nesting of the records, offsets of the start tags of the elements around the first,
+    #the depth of the record being scanned, if any, and the data most recently read, with its offset
+    state = {'record_depth': None, 'ancestors': [], 'in_record': None, 'has_children': False, 'data': b'', 'data_start': 0}
+
+    def start_element(name, attributes):
+        open_tags.append(parser.CurrentByteIndex)
+        if state['in_record'] is not None:
+            state['has_children'] = True
+            return
+        if tuple(split_name(name, lax)) == (MARCXML_NS, 'record'):
+            depth = len(open_tags)
+            if state['record_depth'] is None:
+                state['record_depth'] = depth
+                state['ancestors'] = open_tags[:-1]
+            elif depth != state['record_depth']:
+                raise ValueError('MARC/XML records at different levels of nesting cannot be indexed')
+            state['in_record'] = depth
+            state['has_children'] = False
+            starts.append(parser.CurrentByteIndex)
+        return
+
+    def end_element(name):
+        if state['in_record'] == len(open_tags):
+            data, data_start = state['data'], state['data_start']
+            pos = parser.CurrentByteIndex - data_start
+            if not state['has_children'] and data[pos-2:pos] == b'/>':
+                #Empty element, e.g. <record/>, which the parser is already past
+                ends.append(pos + data_start)
+            else:
+                #Record ends just past the > of its end tag, which the parser has seen
+                ends.append(data.index(b'>', pos) + data_start + 1)
+            state['in_record'] = None
+        open_tags.pop()
+        return
+
+    parser.StartElementHandler = start_element
+    parser.EndElementHandler = end_element
+
+    stream.seek(0)
+    prev = b''
+    pos = 0
+    while True:
+        chunk = stream.read(chunk_size)
+        #Keep the previous chunk too, in case a tag straddles the two
+        state['data'], state['data_start'] = prev + chunk, pos - len(prev)
+        parser.Parse(chunk, not chunk)
+        if not chunk: break
+        prev = chunk
+        pos += len(chunk)
+
+    prolog = epilog = b''
+    if starts:
+        stream.seek(0)
+        prolog = stream.read(starts[0])
+        names = [ TAG_NAME_PAT.match(prolog, offset).group(1) for offset in state['ancestors'] ]
+        epilog = b''.join(( b'</' + name + b'>' for name in reversed(names) ))
+    return record_index(starts, ends, prolog, epilog, size=pos, lax=lax)
+
+
+def write_index(index, path):
+    '''
+    Write a record_index to a sidecar file. The file is replaced in one go, so concurrent readers never see part of it
+    '''
+    temp_path = '{0}.{1}.tmp'.format(path, os.getpid())
+    with open(temp_path, 'wb') as f:
+        f.write(INDEX_HEADER.pack(INDEX_MAGIC, index.lax, index.size, len(index), len(index.prolog), len(index.epilog)))
+        f.write(index.prolog)
+        f.write(index.epilog)
+        for offsets in (index.starts, index.ends):
+            if sys.byteorder == 'big':
+                offsets = array('Q', offsets)
+                offsets.byteswap()
+            offsets.tofile(f)
+    os.replace(temp_path, path)
+    return
+
+
+def read_index(path):
+    '''
+    Read a record_index from a sidecar file
+    '''
+    with open(path, 'rb') as f:
+        magic, lax, size, count, prolog_len, epilog_len = INDEX_HEADER.unpack(f.read(INDEX_HEADER.size))
+        if magic != INDEX_MAGIC:
+            raise ValueError('Not a MARC/XML record index: {0}'.format(path))
+        prolog = f.read(prolog_len)
+        epilog = f.read(epilog_len)
+        starts, ends = array('Q'), array('Q')
+        starts.fromfile(f, count)
+        ends.fromfile(f, count)
+    if sys.byteorder == 'big':
+        starts.byteswap()
+        ends.byteswap()
+    return record_index(starts, ends, prolog, epilog, size=size, lax=bool(lax))
+
+
+def index_for(path, lax=False, rebuild=False, logger=logging):
+    '''
+    Return the record_index for a MARC/XML file from its sidecar, first building & saving it if need be,
+    e.g. if the file has changed since
+
+    path - path of the MARC/XML file
+    lax - if True recognize records with lax namespace rules
+    rebuild - if True always build the index afresh
+    '''
+    index_path = path + INDEX_SUFFIX
+    if not rebuild and os.path.exists(index_path):
+        index = read_index(index_path)
+        if index.size == os.path.getsize(path) and index.lax == lax and \
+                os.path.getmtime(index_path) >= os.path.getmtime(path):
+            return index
+        logger.debug('Record index {0} is out of date, so rebuilding it'.format(index_path))
+    with open(path, 'rb') as f:
+        index = build_index(f, lax=lax)
+    write_index(index, index_path)
+    logger.debug('Indexed {0} records in {1}'.format(len(index), path))
+    return index
+
+
+def parse_range(parser, stream, record_range, lax=False, logger=logging):
+    '''
+    Feed an expat parser a range of the records in a MARC/XML file, using its index (built if need be)
+    Returns the number of records in the range
+
+    stream - stream of the MARC/XML file, which must be a regular, uncompressed file
+    record_range - (start, stop) pair of record numbers, as for slicing
+    '''
+    if not isinstance(stream, io.BufferedReader) or not isinstance(getattr(stream, 'name', None), str):
+        raise ValueError('Ranges of records can only be read from uncompressed MARC/XML files')
+    index = index_for(stream.name, lax=lax, logger=logger)
+    start, stop = record_range
+    fed = False
+    for chunk in index.chunks(stream, start, stop):
+        parser.Parse(chunk, False)
+        fed = True
+    if fed: parser.Parse(b'', True)
+    return len(range(*slice(start, stop).indices(len(index))))
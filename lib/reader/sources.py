@@ -0,0 +1,88 @@
+'''
+Transparent handling of compressed & archived inputs
+
+Inputs compressed with gzip, bzip2 or xz (e.g. records.xml.gz), and zip files of MARC
+(e.g. test/resource/std-examples.zip) are recognized from their leading bytes, so file
+extensions don't matter. They're decompressed on the fly, as the records are read:
+nothing is written to temporary files, nor decompressed in full into memory
+
+Each file within a zip is a separate source of records, and can itself be compressed
+'''
+
+import io
+import bz2
+import gzip
+import lzma
+import logging
+import zipfile
+
+from amara3.inputsource import inputsource
+
+ZIP_MAGIC = b'PK\x03\x04'
+
+#Leading bytes of each compressed format, and how to decompress a stream of it
+DECOMPRESSORS = [
+    (b'\x1f\x8b', lambda stream: gzip.GzipFile(fileobj=stream, mode='rb')),
+    (b'BZh', bz2.BZ2File),
+    (b'\xfd7zXZ\x00', lzma.LZMAFile),
+]
+
+MAGIC_LEN = max(len(ZIP_MAGIC), *( len(magic) for (magic, decompress) in DECOMPRESSORS ))
+
+
+def sniff(stream):
+    '''
+    Return the leading bytes of a stream, without consuming them,
+    or b'' if it's a text stream, or they can't be read back
+
+    >>> sniff(io.BytesIO(b'\\x1f\\x8b\\x08\\x00'))
+    b'\\x1f\\x8b\\x08\\x00'
+    >>> sniff(io.StringIO('<collection/>'))
+    b''
+    '''
+    if isinstance(stream, io.TextIOBase): return b''
+    if hasattr(stream, 'peek'):
+        head = stream.peek(MAGIC_LEN)[:MAGIC_LEN]
+    elif hasattr(stream, 'seekable') and stream.seekable():
+        pos = stream.tell()
+        head = stream.read(MAGIC_LEN)
+        stream.seek(pos)
+    else:
+        return b''
+    return head if isinstance(head, bytes) else b''
+
+
+def expand_source(source, logger=logging):
+    '''
+    Generate the amara3 inputsources for the MARC data in a source: the source itself,
+    its decompressed content, or a source for each file within it if it's a zip
+
+    source - amara3.inputsource.inputsource instance
+    '''
+    stream = source.stream
+    head = sniff(stream)
+    if head.startswith(ZIP_MAGIC):
+        if not stream.seekable():
+            logger.warning('Unable to read a zip file from a stream which is not seekable (e.g. stdin). Skipping.')
+            return
+        with zipfile.ZipFile(stream) as zf:
+            for info in zf.infolist():
+                if info.filename.endswith('/'): continue
+                logger.debug('Reading {0} from zip file'.format(info.filename))
+                with zf.open(info) as member:
+                    yield from expand_source(inputsource(member), logger)
+        return
+    for magic, decompress in DECOMPRESSORS:
+        if head.startswith(magic):
+            with decompress(stream) as decompressed:
+                yield from expand_source(inputsource(decompressed), logger)
+            return
+    yield source
+
+
+def expand_sources(sources, logger=logging):
+    '''
+    Generate the amara3 inputsources for the MARC data in each of a sequence of sources
+    '''
+    for source in sources:
+        yield from expand_source(source, logger)
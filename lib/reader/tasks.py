@@ -0,0 +1,137 @@
+'''
+Runs plug-in tasks on an asyncio event loop
+
+All plug-ins' tasks of a kind for a record (e.g. BF_MARCREC_TASK) are started together and
+awaited concurrently, so a plug-in waiting on I/O (an authority lookup, a sqlite query) doesn't
+hold up the others. Record-level (BF_MARCREC_TASK) tasks can also carry on while the following
+records are converted, up to a bounded window of records in flight. Records are still finished
+off (output, postprocessing) one at a time, in their original order
+
+Tasks which never actually wait on anything run one after the other to completion, in plug-in
+order, just as if they were called directly
+
+Plug-in tasks can be asyncio coroutines, generator based coroutines (@asyncio.coroutine) or plain
+functions. Where asyncio doesn't accept generator based coroutines (Python 3.11 on) they are run
+through in turn
+'''
+
+import sys
+import asyncio
+import inspect
+from collections import deque
+
+from bibframe.stats import plugin_task
+
+#Default maximum number of records with record-level plug-in tasks under way at once
+DEFAULT_PLUGIN_WINDOW = 16
+
+
+class plugin_executor(object):
+    '''
+    Runs the tasks of a list of plug-ins on an event loop of its own
+
+    plugins - list of plug-in info dicts, keyed by task
+    stats - bibframe.stats.collector for timing of plug-in tasks, or None
+    window - maximum number of records with tasks under way at once. 1 means each record's
+        tasks finish before the next record is converted
+    '''
+    def __init__(self, plugins, stats=None, window=DEFAULT_PLUGIN_WINDOW):
+        self._plugins = plugins
+        self._stats = stats
+        self.window = max(window, 1)
+        self._loop = asyncio.new_event_loop()
+        #(futures, callback when they're done, callback args) for each record in flight, in order
+        self._pending = deque()
+        return
+
+    def awaits(self, task):
+        '''
+        Return True if any plug-in's handler for the given task is a coroutine function, and so
+        can still be under way once started. Tasks of other plug-ins run to completion when started
+        '''
+        return any(( asyncio.iscoroutinefunction(plugin.get(task)) for plugin in self._plugins ))
+
+    def _start(self, task, args):
+        '''
+        Start the task for each plug-in which has it, returning the futures for those which are still under way
+        '''
+        futures = []
+        for plugin in self._plugins:
+            func = plugin.get(task)
+            if not func: continue
+            timing = plugin_task(self._stats, plugin, task)
+            timing.__enter__()
+            try:
+                result = func(*args)
+                future = None
+                if asyncio.iscoroutine(result) or isinstance(result, asyncio.Future):
+                    future = asyncio.ensure_future(result, loop=self._loop)
+                elif inspect.isgenerator(result):
+                    #Generator based coroutine this version of asyncio won't schedule
+                    for _ in result: pass
+            except BaseException:
+                timing.__exit__(*sys.exc_info())
+                raise
+            if future is None:
+                timing.__exit__(None, None, None)
+                continue
+            future.add_done_callback(lambda f, timing=timing: timing.__exit__(None, None, None))
+            futures.append(future)
+        return futures
+
+    def _wait(self, futures):
+        if futures: self._loop.run_until_complete(asyncio.gather(*futures))
+        return
+
+    def _step(self):
+        #Run one iteration of the event loop, so that newly started tasks get going
+        self._loop.call_soon(self._loop.stop)
+        self._loop.run_forever()
+        return
+
+    def run(self, task, *args):
+        '''
+        Run the task for all plug-ins which have it concurrently, returning once they've all finished
+        '''
+        self._wait(self._start(task, args))
+        return
+
+    def submit(self, task, args, done, *done_args):
+        '''
+        Start the task for all plug-ins which have it concurrently, and call done(*done_args) once
+        they've all finished, after the callbacks for earlier submissions. Returns once there are
+        fewer than window submissions under way
+        '''
+        self._pending.append((self._start(task, args), done, done_args))
+        if self._pending[-1][0]: self._step()
+        self._complete(len(self._pending) - self.window + 1)
+        return
+
+    def _complete(self, required=0):
+        '''
+        Call the done callbacks for submissions which have finished, in order, waiting
+        if need be until at least the given number have been completed
+        '''
+        while self._pending:
+            futures, done, done_args = self._pending[0]
+            if required > 0:
+                self._wait(futures)
+            elif not all(( f.done() for f in futures )):
+                break
+            self._pending.popleft()
+            #Raises any exception from the tasks
+            for f in futures: f.result()
+            done(*done_args)
+            required -= 1
+        return
+
+    def drain(self):
+        '''
+        Wait for all submissions to finish, calling their done callbacks
+        '''
+        self._complete(len(self._pending))
+        return
+
+    def close(self):
+        self._loop.close()
+        return
@@ -98,21 +98,48 @@ def subfields(attrs, code=None, ctx=None):
     [('a', 'DLC'), ('c', 'DLC'), ('d', 'm.c.'), ('d', 'WaOLN'), ('d', 'UtOrBLW')]
     >>> subfields({'tag': '650', 'ind1': '', 'ind2': '0', '2.a': 'Tapestry', '3.z': 'Massachusetts', '4.z': 'Boston', '5.v': 'Catalogs.'}, 'z')
     [('z', 'Massachusetts'), ('z', 'Boston')]
+    >>> attrs = {'tag': '650', 'ind1': '', 'ind2': '0', '2.a': 'Tapestry'}
+    >>> attrs[PARSED_SUBFIELDS] = parse_subfields(attrs)
+    >>> attrs['2.a'] = 'Weaving'
+    >>> subfields(attrs)
+    [('a', 'Weaving')]
 
     '''
     result = []
-    # If the attributes have their own ordering, use it, otherwise sort
-    attrs_in_order = sorted(attrs.items())
-    for ix, (k, v) in enumerate(attrs_in_order):
-        if '.' in k:
-            this_code = k.rsplit('.')[-1]
-            if code is None or this_code == code:
-                result.append((this_code, v))
-                if ctx and 'current-subfield-ix' in ctx.extras:
-                    ctx.extras['current-subfield-ix'].append(ix)
+    parsed = attrs.get(PARSED_SUBFIELDS)
+    #Parse afresh if not cached by the reader, or if attributes have been added, removed or replaced since
+    if parsed is None or len(parsed[0]) != len(attrs) - 1 or any(( attrs.get(k) is not v for k, v in parsed[0] )):
+        parsed = parse_subfields(attrs)
+    track_ix = ctx is not None and 'current-subfield-ix' in ctx.extras
+    for this_code, v, ix in parsed[1]:
+        if code is None or this_code == code:
+            result.append((this_code, v))
+            if track_ix:
+                ctx.extras['current-subfield-ix'].append(ix)
     return result
 
 
+#Attribute under which readers cache the parsed subfields of an input link. See parse_subfields
+PARSED_SUBFIELDS = '@parsed-subfields'
+
+def parse_subfields(attrs):
+    '''
+    Parse the subfields out of the full structure of attributes of an input link, in order.
+    Readers store the result in the attributes under PARSED_SUBFIELDS, so that it's only done once per field
+
+    Returns a tuple of the (key, value) pairs of the attributes parsed, in order, so that changes
+    can be spotted, and a tuple of (code, value, ix) triples, where ix is the position of the
+    subfield in the sorted attributes
+
+    >>> parse_subfields({'tag': '100', 'ind1': '1', 'ind2': '', '2.a': 'Abert, J. W.', '3.q': '(James William),', '4.d': '1820-1897.'})[1]
+    (('a', 'Abert, J. W.', 0), ('q', '(James William),', 1), ('d', '1820-1897.', 2))
+    '''
+    # If the attributes have their own ordering, use it, otherwise sort
+    attrs_in_order = sorted(( (k, v) for (k, v) in attrs.items() if k != PARSED_SUBFIELDS ))
+    parsed = tuple(( (k.rsplit('.')[-1], v, ix) for ix, (k, v) in enumerate(attrs_in_order) if '.' in k ))
+    return attrs_in_order, parsed
+
+
 class base_transformer(object):
     def __init__(self, origin_type=None):
         self._origin_type = origin_type
@@ -0,0 +1,230 @@
+'''
+Incremental reader for Versa JSON, as written by bibframe.writer.versajson (or versa.util.jsondump)
+
+Links are parsed one at a time as the input is read, in chunks, so that only the current link
+& a chunk of input are ever held in memory, however large the dump. Input can be a JSON array
+of links, or JSON Lines of such arrays (marc2bf --jsonl), each link in either the raw form,
+[index, [origin, relationship, target, attributes]], or the canonical form,
+[origin, relationship, target, attributes]
+
+rdfconvert() uses this to write RDF straight from Versa JSON dumps (see exec/versa2ttl)
+'''
+
+import io
+import os
+import re
+import sys
+import json
+import codecs
+import shutil
+import logging
+import tempfile
+import itertools
+import multiprocessing
+
+from versa import I
+
+from bibframe.writer import rdf
+
+#Characters (or bytes) of input to read at a time
+READ_CHUNK_SIZE = 1 << 16
+
+#Links to gather into each batch of RDF output, within which Turtle statements are grouped by subject
+RDF_BATCH_SIZE = 1000
+
+NON_WHITESPACE_PAT = re.compile(r'\S')
+
+
+def link_from_json(link):
+    '''
+    Versa link (origin, rel, target, attrs) from its JSON form, raw or canonical,
+    or None if it's in neither form (such items are skipped, as by versa.util.jsonload)
+
+    >>> link_from_json([0, ['http://example.org/x', 'http://example.org/name', 'X', {}]])
+    ('http://example.org/x', 'http://example.org/name', 'X', {})
+    >>> origin, rel, target, attrs = link_from_json(['http://example.org/x', 'http://example.org/see', 'http://example.org/y', {'@target-type': '@iri-ref'}])
+    >>> isinstance(target, I), attrs
+    (True, {})
+    '''
+    if len(link) == 2:
+        lid, (origin, rel, target, attrs) = link
+    elif len(link) == 4:
+        #Canonical form marks which targets are IRIs
+        origin, rel, target, attrs = link
+        if attrs.get('@target-type') == '@iri-ref':
+            target = I(target)
+            attrs = { k: v for (k, v) in attrs.items() if k != '@target-type' }
+    else:
+        return None
+    return (origin, rel, target, attrs)
+
+
+class link_reader(object):
+    '''
+    Iterator over the links in a Versa JSON stream, parsed one at a time
+
+    >>> import io
+    >>> dump = '[[0, ["http://example.org/x", "http://example.org/name", "X", {}]]]\\n[]\\n'
+    >>> list(link_reader(io.StringIO(dump), chunk_size=8))
+    [('http://example.org/x', 'http://example.org/name', 'X', {})]
+    '''
+    def __init__(self, stream, chunk_size=READ_CHUNK_SIZE):
+        '''
+        stream - file-like object, text or binary (UTF-8), from which to read the Versa JSON
+        chunk_size - number of characters (or bytes) to read at a time
+        '''
+        self._stream = stream
+        self._chunk_size = chunk_size
+        self._decoder = None
+        self._decode = json.JSONDecoder().raw_decode
+        self._buf = ''
+        self._pos = 0
+        self._eof = False
+        return
+
+    def _more(self):
+        '''
+        Read another chunk of input into the buffer, dropping what's been parsed already.
+        Return False at the end of the input
+        '''
+        if self._eof: return False
+        chunk = ''
+        while not chunk:
+            raw = self._stream.read(self._chunk_size)
+            if isinstance(raw, bytes):
+                #Multibyte characters can be split across chunks
+                if self._decoder is None: self._decoder = codecs.getincrementaldecoder('utf-8')()
+                chunk = self._decoder.decode(raw, final=not raw)
+            else:
+                chunk = raw
+            if not raw:
+                break
+        if not chunk:
+            self._eof = True
+            return False
+        self._buf = self._buf[self._pos:] + chunk
+        self._pos = 0
+        return True
+
+    def _next_char(self):
+        '''
+        Skip whitespace, returning the next character without consuming it, or '' at the end of the input
+        '''
+        while True:
+            m = NON_WHITESPACE_PAT.search(self._buf, self._pos)
+            if m:
+                self._pos = m.start()
+                return self._buf[self._pos]
+            self._pos = len(self._buf)
+            if not self._more(): return ''
+
+    def _value(self):
+        '''
+        Parse the next JSON value, reading more input as needed
+        '''
+        self._next_char()
+        while True:
+            try:
+                value, end = self._decode(self._buf, self._pos)
+            except ValueError:
+                #Possibly a value cut short by the end of the buffer
+                if not self._more(): raise
+                continue
+            #A number at the end of the buffer might carry on in the next chunk
+            if end == len(self._buf) and self._more(): continue
+            self._pos = end
+            return value
+
+    def _expect(self, chars):
+        c = self._next_char()
+        if c not in chars or not c:
+            raise ValueError('Expected one of {0!r} in Versa JSON, not {1!r}'.format(chars, c or 'end of input'))
+        self._pos += 1
+        return c
+
+    def __iter__(self):
+        #Each top-level array, of which there's one per line for JSON Lines
+        while self._next_char():
+            self._expect('[')
+            if self._next_char() == ']':
+                self._pos += 1
+                continue
+            while True:
+                link = link_from_json(self._value())
+                if link: yield link
+                if self._expect(',]') == ']': break
+        return
+
+
+def write_rdf(stream, writer, batch_size=RDF_BATCH_SIZE):
+    '''
+    Write out the links from a Versa JSON stream as RDF, a batch at a time
+
+    stream - file-like object from which to read the Versa JSON
+    writer - bibframe.writer.rdf.stream_writer instance
+    '''
+    #Raw JSON doesn't mark which targets are IRIs, but those of types always are
+    links = ( (o, r, I(t), a) if r == rdf.VTYPE_REL and not isinstance(t, I) else (o, r, t, a)
+                for (o, r, t, a) in link_reader(stream) )
+    while True:
+        batch = list(itertools.islice(links, batch_size))
+        if not batch: break
+        writer.write(batch)
+    return
+
+
+def open_input(path):
+    '''
+    Open an input file by name, or standard input for '-', leaving it open once done with
+    '''
+    return open(sys.stdin.fileno(), 'rb', closefd=False) if path == '-' else open(path, 'rb')
+
+
+def convert_piece(job):
+    '''
+    Worker process task: convert one input to RDF in a temporary file, returning its path
+    '''
+    path, format, prefixes, tmpdir = job
+    fd, piecepath = tempfile.mkstemp(suffix='.' + format, dir=tmpdir)
+    with open(fd, 'wb') as piece, open_input(path) as inf:
+        write_rdf(inf, rdf.stream_writer(piece, format=format, prefixes=prefixes, header=False))
+    return piecepath
+
+
+def rdfconvert(inputs, out, format='turtle', prefixes=None, workers=None, logger=logging):
+    '''
+    Convert Versa JSON dumps to RDF, as N-Triples or Turtle, in constant memory
+
+    Unlike bibframe.writer.rdf.process, which selects the links of resources with a type
+    from a whole model, every link in the input is written, since they're never all in memory
+
+    inputs - list of names of Versa JSON files, or '-' for stdin
+    out - file-like object, text or binary, to which RDF output is written
+    format - 'nt' for N-Triples or 'turtle'
+    prefixes - list of (prefix, namespace IRI) pairs to use in Turtle output
+    workers - number of worker processes across which to spread the inputs, each converted
+              to a temporary file, then copied to the output in order. If omitted, inputs are
+              converted in turn, in this process
+    '''
+    writer = rdf.stream_writer(out, format=format, prefixes=prefixes)
+    if not workers or workers < 2 or len(inputs) < 2:
+        for path in inputs:
+            logger.debug('Converting {0}'.format(path))
+            with open_input(path) as inf:
+                write_rdf(inf, writer)
+        return
+
+    if '-' in inputs:
+        raise ValueError('Standard input can\'t be converted by worker processes')
+    out.flush()
+    binary = not isinstance(out, io.TextIOBase)
+    ctx = multiprocessing.get_context('fork')
+    with tempfile.TemporaryDirectory() as tmpdir:
+        with ctx.Pool(workers) as pool:
+            jobs = [ (path, format, prefixes, tmpdir) for path in inputs ]
+            for path, piecepath in zip(inputs, pool.imap(convert_piece, jobs)):
+                logger.debug('Converted {0}'.format(path))
+                with open(piecepath, 'rb' if binary else 'r', encoding=None if binary else 'utf-8') as piece:
+                    shutil.copyfileobj(piece, out)
+                os.remove(piecepath)
+    return
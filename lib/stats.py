@@ -0,0 +1,135 @@
+'''
+Opt-in instrumentation of the conversion process
+
+Collects counts & timings per record, per transform rule (keyed by match spec, e.g. '245$a'),
+per plug-in task, and counts of materialized resources by type, along with the hit rate of the
+materialize cache. Enable by passing a stream to bfconvert's stats parameter (or using marc2bf
+--stats) to get a JSON report at the end.
+
+When not enabled processing only pays for a check of params['stats'] against None
+'''
+
+import time
+import json
+from contextlib import contextmanager
+from collections import OrderedDict, defaultdict
+
+
+class collector(object):
+    def __init__(self):
+        #Counts & total times, keyed by (phase, match spec), or by (plug-in, task)
+        self.rules = defaultdict(lambda: [0, 0.0])
+        self.plugin_tasks = defaultdict(lambda: [0, 0.0])
+        self.materialized = defaultdict(int)
+        #Lookups of materialized resource IDs in the cache, as [hits, misses]
+        self.materialize_cache = [0, 0]
+        self.records = 0
+        self.aborted = 0
+        self.record_seconds = 0.0
+        self.max_record_seconds = 0.0
+        #Plug-in info dicts don't carry their IDs, so map them from the object IDs
+        self._plugin_ids = {}
+        return
+
+    def name_plugin(self, pinfo, plugin_id):
+        self._plugin_ids[id(pinfo)] = plugin_id
+        return
+
+    def record(self, seconds, aborted=False):
+        '''
+        Count a record, and the time taken to process it
+        '''
+        if aborted:
+            self.aborted += 1
+        else:
+            self.records += 1
+        self.record_seconds += seconds
+        if seconds > self.max_record_seconds: self.max_record_seconds = seconds
+        return
+
+    def rule(self, phase, spec, seconds):
+        '''
+        Count an application of the transform rule for the given phase & match spec, and the time it took
+        '''
+        counts = self.rules[phase, spec]
+        counts[0] += 1
+        counts[1] += seconds
+        return
+
+    @contextmanager
+    def plugin_task(self, pinfo, task):
+        '''
+        Context manager timing the run of a plug-in task
+        '''
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            counts = self.plugin_tasks[self._plugin_ids.get(id(pinfo), '(unknown)'), task]
+            counts[0] += 1
+            counts[1] += time.perf_counter() - start
+
+    def materialize(self, etype, cache_hit=None):
+        '''
+        Count a materialized resource of the given type. cache_hit is True or False according to whether
+        its ID came from the materialize cache, or None if the cache wasn't used
+        '''
+        self.materialized[etype] += 1
+        if cache_hit is not None: self.materialize_cache[0 if cache_hit else 1] += 1
+        return
+
+    def as_dict(self):
+        '''
+        Return the collected statistics, ready for JSON serialization. Rules are grouped by phase,
+        in descending order of total time
+        '''
+        rules = OrderedDict()
+        for (phase, spec), (count, seconds) in sorted(self.rules.items(), key=lambda item: item[1][1], reverse=True):
+            rules.setdefault(phase, OrderedDict())[spec] = OrderedDict([('count', count), ('seconds', seconds)])
+        plugins = OrderedDict()
+        for (plugin_id, task), (count, seconds) in sorted(self.plugin_tasks.items()):
+            #Task IRIs are all in the same namespace, so just use the fragment
+            task = task.rpartition('#')[2]
+            plugins.setdefault(plugin_id, OrderedDict())[task] = OrderedDict([('count', count), ('seconds', seconds)])
+        hits, misses = self.materialize_cache
+        return OrderedDict([
+            ('records', OrderedDict([
+                ('count', self.records),
+                ('aborted', self.aborted),
+                ('seconds', self.record_seconds),
+                ('max_seconds', self.max_record_seconds),
+            ])),
+            ('rules', rules),
+            ('plugins', plugins),
+            ('materialized', OrderedDict(sorted(self.materialized.items()))),
+            ('materialize_cache', OrderedDict([
+                ('hits', hits),
+                ('misses', misses),
+                ('hit_rate', hits / (hits + misses) if hits + misses else None),
+            ])),
+        ])
+
+    def dump(self, out):
+        '''
+        Write the collected statistics to out as JSON
+        '''
+        json.dump(self.as_dict(), out, indent=2)
+        out.write('\n')
+        return
+
+
+class _no_timing(object):
+    def __enter__(self):
+        return
+
+    def __exit__(self, *exc_info):
+        return False
+
+NO_TIMING = _no_timing()
+
+
+def plugin_task(stats, pinfo, task):
+    '''
+    Return a context manager timing a plug-in task, which does nothing if stats is None
+    '''
+    return NO_TIMING if stats is None else stats.plugin_task(pinfo, task)
@@ -9,6 +9,7 @@ from versa import I, VERSA_BASEIRI, ORIGIN, RELATIONSHIP, TARGET, ATTRIBUTES
 
 from . import BL, BF_INIT_TASK, BF_INPUT_TASK, BF_INPUT_XREF_TASK, BF_MARCREC_TASK, BF_MATRES_TASK, BF_FINAL_TASK
 from .contrib.datachefids import idgen as default_idgen
+from .stats import plugin_task
 
 BL = 'http://bibfra.me/vocab/lite/'
 VTYPE_REL = I(iri.absolutize('type', VERSA_BASEIRI))
@@ -66,6 +67,66 @@ def hash_neutral_model(stream):
     return hashmap, stage3
 
 
+#Default maximum number of entries in a materialize_cache
+MATERIALIZE_CACHE_SIZE = 100000
+
+
+class materialize_cache(object):
+    '''
+    Bounded, least recently used cache of the IDs (and hash input plaintext) of materialized resources,
+    keyed on the hash input data, so that the same resource turning up again, within or across records,
+    doesn't have to be reserialized & rehashed. Tracks hits & misses
+
+    >>> cache = materialize_cache(2)
+    >>> key = cache.key('http://bibfra.me/vocab/lite/', [['name', 'United States']])
+    >>> cache.get(key) is None
+    True
+    >>> cache.put(key, ('YdWQjXh-gCQ', '[["http://bibfra.me/vocab/lite/name","United States"]]'))
+    >>> cache.get(key)[0], cache.hits, cache.misses
+    ('YdWQjXh-gCQ', 1, 1)
+    >>> cache.key('http://bibfra.me/vocab/lite/', [['date', 1900]]) is None #Only string values are cached
+    True
+
+    size - maximum number of entries, after which the least recently used are dropped. 0 disables caching
+    '''
+    def __init__(self, size=MATERIALIZE_CACHE_SIZE):
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        return
+
+    def key(self, vocabbase, data):
+        '''
+        Return the cache key for hash input data (list of key/value pairs), or None if it can't be cached.
+        The plaintext is JSON, where e.g. 1 & True differ even though they compare equal, so only plain
+        string values are cached. Keys are absolutized against vocabbase, so it's part of the cache key
+        '''
+        try:
+            if not all(( isinstance(v, str) for (k, v) in data )): return None
+            return (vocabbase,) + tuple(( (k, v) for (k, v) in data ))
+        except (TypeError, ValueError):
+            return None
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key, entry):
+        self._entries[key] = entry
+        if len(self._entries) > self.size:
+            self._entries.popitem(last=False)
+        return
+
+    def __len__(self):
+        return len(self._entries)
+
+
 #FIXME: Avoid mangling data arg without too much perf hit
 def materialize_entity(etype, ctx_params=None, model_to_update=None, data=None, addtype=True, logger=logging):
     '''
@@ -90,10 +151,17 @@ def materialize_entity(etype, ctx_params=None, model_to_update=None, data=None,
 
     data = data or []
     if addtype: data.insert(0, [VTYPE_REL, etype])
-    data_full =  [ ((vocabbase + k if not iri.is_absolute(k) else k), v) for (k, v) in data ]
-    plaintext = json.dumps(data_full, separators=(',', ':'), cls=OrderedJsonEncoder)
-
-    eid = ids.send(plaintext)
+    #The ID depends only on the hash input data, so reuse it if this resource has already been materialized
+    cache = ctx_params.get('materialize_cache')
+    key = cache.key(vocabbase, data) if cache is not None and cache.size else None
+    cached = cache.get(key) if key is not None else None
+    if cached is None:
+        data_full =  [ ((vocabbase + k if not iri.is_absolute(k) else k), v) for (k, v) in data ]
+        plaintext = json.dumps(data_full, separators=(',', ':'), cls=OrderedJsonEncoder)
+        eid = ids.send(plaintext)
+        if key is not None: cache.put(key, (eid, plaintext))
+    else:
+        eid, plaintext = cached
 
     if model_to_update:
         model_to_update.add(I(eid), VTYPE_REL, I(etype))
@@ -101,9 +169,12 @@ def materialize_entity(etype, ctx_params=None, model_to_update=None, data=None,
     params['materialized_id'] = eid
     params['first_seen'] = eid in existing_ids
     params['plaintext'] = plaintext
+    stats = ctx_params.get('stats')
+    if stats is not None: stats.materialize(etype, None if key is None else cached is not None)
     for plugin in plugins or ():
         #Not using yield from
         if BF_MATRES_TASK in plugin:
-            for p in plugin[BF_MATRES_TASK](output_model, params): pass
+            with plugin_task(stats, plugin, BF_MATRES_TASK):
+                for p in plugin[BF_MATRES_TASK](output_model, params): pass
     return eid
 
@@ -47,8 +47,10 @@ def process(source, xmlw, to_ignore=None, logger=logging, simplified=True):
                     if not simplified: attrs = {'full': r}
                     vgi = r.rsplit('/', 1)[-1]
                     if type(val) is iriref:
-                        attrs['href'] = val
-                        xmlw.start_element(vgi, attrs, empty=True)
+                        #Leave the link's own attributes be
+                        attrs = dict(attrs, href=val)
+                        xmlw.start_element(vgi, attrs)
+                        xmlw.end_element(vgi)
                     else:
                         xmlw.start_element(vgi, attrs)
                         xmlw.text(str(val))
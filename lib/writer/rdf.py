@@ -1,10 +1,12 @@
 '''
 '''
 
+import io
 import re
 import os
 import logging
 import itertools
+from collections import OrderedDict
 
 #from rdflib import Graph, BNode, Namespace
 from rdflib import URIRef, Literal, RDF, RDFS
@@ -54,3 +56,140 @@ def process(source, target, to_ignore=None, logger=logging):
             [ target.add(prep(stmt)) for stmt in source.match(rid) ]
 
     return
+
+
+def prefixes(vocabbase, entbase=None):
+    '''
+    Namespace prefixes conventionally used for RDF output, as a list of (prefix, namespace IRI) pairs
+    '''
+    if vocabbase == BFZ:
+        result = [('bf', BFZ), ('bfc', BFZ + 'cftag/'), ('bfd', BFZ + 'dftag/')]
+    else:
+        result = [('vb', vocabbase)]
+    if entbase:
+        result.append(('ent', entbase))
+    return result
+
+
+#Number of most recently written triples remembered in order to avoid writing them again
+DEFAULT_DEDUP_WINDOW = 100000
+
+#Conservative subset of Turtle local names, for which prefixed names are safe to use
+SIMPLE_LOCAL_NAME_PAT = re.compile(r'^[A-Za-z0-9_][A-Za-z0-9_\-]*$')
+
+def nt_term(term):
+    '''
+    Serialize an rdflib term for N-Triples (also valid Turtle), escaping literals as needed
+    '''
+    if isinstance(term, Literal):
+        value = str(term).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n').replace('\r', '\\r')
+        if term.language:
+            return '"{0}"@{1}'.format(value, term.language)
+        elif term.datatype:
+            return '"{0}"^^<{1}>'.format(value, term.datatype)
+        return '"{0}"'.format(value)
+    return term.n3()
+
+
+class stream_writer(object):
+    '''
+    Writes RDF out a record at a time, as N-Triples or Turtle, rather than accumulating
+    an rdflib graph for the whole run. Memory use stays flat regardless of the number of records
+
+    Triples repeated across records (e.g. for folded resources) are skipped if they've been
+    written within the last dedup_window triples. Any further repeats are harmless, since
+    RDF graphs are sets of triples, but make for larger output
+
+    >>> import io
+    >>> from versa.driver import memory
+    >>> m = memory.connection()
+    >>> m.add_many([(I('http://example.org/a'), VTYPE_REL, I('http://example.org/T')), (I('http://example.org/a'), I('http://example.org/name'), 'A')])
+    >>> out = io.StringIO()
+    >>> w = stream_writer(out)
+    >>> w.process(m)
+    >>> w.process(m)
+    >>> print(out.getvalue())
+    <http://example.org/a> <http://www.w3.org/1999/02/22-rdf-syntax-ns#type> <http://example.org/T> .
+    <http://example.org/a> <http://example.org/name> "A" .
+    <BLANKLINE>
+    '''
+    def __init__(self, stream, format='nt', prefixes=None, dedup_window=DEFAULT_DEDUP_WINDOW, header=True):
+        '''
+        stream - file-like object, text or binary, to which output is written
+        format - 'nt' for N-Triples or 'turtle'
+        prefixes - list of (prefix, namespace IRI) pairs to use in Turtle output
+        dedup_window - number of most recently written triples to check for repeats
+        header - whether to start Turtle output with the prefix declarations. Turn off
+                 for pieces of output which will follow on from others, with the same prefixes
+        '''
+        if format not in ('nt', 'turtle'):
+            raise ValueError('Unsupported streaming RDF format: {0}'.format(format))
+        self._stream = stream
+        self._binary = not isinstance(stream, io.TextIOBase)
+        self._turtle = format == 'turtle'
+        self._prefixes = (prefixes or []) if self._turtle else []
+        self._dedup_window = dedup_window
+        self._written = OrderedDict()
+        if self._prefixes and header:
+            self._write(''.join(( '@prefix {0}: <{1}> .\n'.format(prefix, ns) for (prefix, ns) in self._prefixes )) + '\n')
+        return
+
+    def _write(self, text):
+        self._stream.write(text.encode('utf-8') if self._binary else text)
+
+    def _term(self, term):
+        if self._turtle and isinstance(term, URIRef):
+            if term == RDF.type: return 'a'
+            for prefix, ns in self._prefixes:
+                if term.startswith(ns) and SIMPLE_LOCAL_NAME_PAT.match(term[len(ns):]):
+                    return '{0}:{1}'.format(prefix, term[len(ns):])
+        return nt_term(term)
+
+    def _seen(self, triple):
+        '''
+        Check whether a triple has been written recently, remembering it if not
+        '''
+        if triple in self._written:
+            self._written.move_to_end(triple)
+            return True
+        self._written[triple] = None
+        if len(self._written) > self._dedup_window:
+            self._written.popitem(last=False)
+        return False
+
+    def process(self, source, to_ignore=None, logger=logging):
+        '''
+        Write out the statements about all the resources with a type in an in-memory BIBFRAME model
+        Same selection of statements as process()
+        '''
+        def selected():
+            for stmt in source.match(None, VTYPE_REL, None):
+                rid = stmt[ORIGIN]
+                if not (to_ignore and rid in to_ignore):
+                    yield from source.match(rid)
+
+        self.write(selected())
+        return
+
+    def write(self, stmts):
+        '''
+        Write out a batch of Versa statements as they come, e.g. from a stream of links,
+        grouped by subject within the batch for Turtle
+
+        stmts - iterable of Versa links (origin, rel, target, attrs), with IRI targets as versa.I
+        '''
+        bysubject = OrderedDict()
+        for stmt in stmts:
+            triple = prep(stmt)
+            if self._seen(triple): continue
+            bysubject.setdefault(triple[0], []).append(triple)
+
+        chunks = []
+        for s, triples in bysubject.items():
+            if self._turtle:
+                pos = ' ;\n    '.join(( '{0} {1}'.format(self._term(p), self._term(o)) for (s, p, o) in triples ))
+                chunks.append('{0} {1} .\n\n'.format(self._term(s), pos))
+            else:
+                chunks.extend(( '{0} {1} {2} .\n'.format(nt_term(s), nt_term(p), nt_term(o)) for (s, p, o) in triples ))
+        if chunks: self._write(''.join(chunks))
+        return
@@ -0,0 +1,85 @@
+'''
+Output rolled across multiple files (shards), so that bulk loaders can take them in parallel,
+and a failed load only needs one shard redone
+
+marc2bf --out-pattern out-{shard:04d}.json --rdfttl-pattern out-{shard:04d}.ttl --records-per-shard 50000 records.mrx
+
+Each shard is a self-contained document, e.g. a complete Versa JSON array, or Turtle with its
+prefix declarations. All the outputs of a run are sharded the same way, so out-0003.json
+and out-0003.ttl cover the same records. Without a set number of records per shard, there's
+a shard for each input
+'''
+
+import os
+
+
+class shard_writer(object):
+    '''
+    Writes output a record at a time, rolling over to a new file after a set number of records
+
+    pattern - path for each shard, in Python format syntax, with the shard number as shard, e.g. out-{shard:04d}.json
+    start_shard - function which is passed the stream for a new shard, and returns a pair of functions:
+        one to write the output for a record, given the per-record output model, and one
+        (or None) to finish the shard document off
+    records_per_shard - maximum number of records per shard. If None, each input gets a shard of its own
+    '''
+    def __init__(self, pattern, start_shard, records_per_shard=None):
+        if pattern.format(shard=0) == pattern.format(shard=1):
+            raise ValueError('Output pattern must include the shard number, e.g. out-{{shard:04d}}.json, not {0}'.format(pattern))
+        self._pattern = pattern
+        self._start_shard = start_shard
+        self._records_per_shard = records_per_shard
+        #Number of the current shard, -1 before the first
+        self.shard = -1
+        self.paths = []
+        self._stream = None
+        self._write_record = self._finish_shard = None
+        self._count = 0
+        self._new_source = False
+        return
+
+    def new_source(self):
+        '''
+        Signal the start of a new input, which starts a new shard if there's no set number of records per shard
+        '''
+        if self._records_per_shard is None: self._new_source = True
+        return
+
+    def record(self, model):
+        '''
+        Write the output for a record, given the per-record output model
+        '''
+        if self._stream is None or self._new_source or \
+                (self._records_per_shard is not None and self._count >= self._records_per_shard):
+            self._roll()
+        self._write_record(model)
+        self._count += 1
+        return
+
+    def _roll(self):
+        self._close_shard()
+        self.shard += 1
+        path = self._pattern.format(shard=self.shard)
+        dirname = os.path.dirname(path)
+        if dirname: os.makedirs(dirname, exist_ok=True)
+        self.paths.append(path)
+        self._stream = open(path, 'w', encoding='utf-8')
+        self._write_record, self._finish_shard = self._start_shard(self._stream)
+        self._count = 0
+        self._new_source = False
+        return
+
+    def _close_shard(self):
+        if self._stream is None: return
+        if self._finish_shard: self._finish_shard()
+        self._stream.close()
+        self._stream = None
+        return
+
+    def finish(self):
+        '''
+        Finish off the last shard. If there were no records at all, there's still one, empty shard
+        '''
+        if self.shard < 0: self._roll()
+        self._close_shard()
+        return
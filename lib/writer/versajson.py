@@ -0,0 +1,102 @@
+'''
+Streaming writer for Versa JSON output, a record at a time
+
+By default the output for each source is a JSON array of the links generated from all its records,
+each link in the form [index, [origin, relationship, target, attributes]]:
+
+[[0, ["http://example.org/bBsHvHu8S-M", "http://bibfra.me/vocab/lite/name", "Zweig, Stefan", {}]], [1, [...]], ...]
+
+In JSON Lines form (lines=True) each record instead gets a line of its own, with a JSON array
+of its links, so that downstream loaders can split up the output & process it in parallel
+
+Links are encoded one at a time, rather than building up a list of a record's links to encode,
+and output is gathered up to be written to the stream in large pieces
+'''
+
+import json
+
+#Characters of output to gather up before writing to the stream
+WRITE_BUFFER_SIZE = 1 << 16
+
+#Encodes a single link, e.g. (0, (origin, rel, target, attrs)), exactly as json.dumps would
+encode_link = json.JSONEncoder().encode
+
+LINK_SEPARATOR = ', '
+RECORD_SEPARATOR = ',\n'
+
+
+class writer(object):
+    '''
+    Writes the links of per-record output models as Versa JSON
+
+    >>> import io
+    >>> out = io.StringIO()
+    >>> w = writer(out, lines=True)
+    >>> w.start()
+    >>> w.record([(0, ('http://example.org/x', 'http://bibfra.me/vocab/lite/name', 'X', {}))])
+    >>> w.finish()
+    >>> out.getvalue()
+    '[[0, ["http://example.org/x", "http://bibfra.me/vocab/lite/name", "X", {}]]]\\n'
+
+    out - stream to where the JSON should be written
+    lines - If True write JSON Lines, one record per line, rather than a single JSON array
+    buffer_size - number of characters of output to gather before writing to out
+    '''
+    def __init__(self, out, lines=False, buffer_size=WRITE_BUFFER_SIZE):
+        self._out = out
+        self._lines = lines
+        self._buffer_size = buffer_size
+        self._pending = []
+        self._pending_size = 0
+        self._first_record = True
+        return
+
+    def start(self):
+        '''
+        Start the output, before any records
+        '''
+        if not self._lines: self._pending.append('[')
+        return
+
+    def record(self, model):
+        '''
+        Write out the links of a per-record output model
+        '''
+        pending = self._pending
+        size = self._pending_size
+        if self._lines:
+            pending.append('[')
+        elif not self._first_record:
+            pending.append(RECORD_SEPARATOR)
+        self._first_record = False
+        first_link = True
+        for link in model:
+            if first_link:
+                first_link = False
+            else:
+                pending.append(LINK_SEPARATOR)
+            chunk = encode_link(link)
+            pending.append(chunk)
+            size += len(chunk)
+        if self._lines: pending.append(']\n')
+        self._pending_size = size
+        if size >= self._buffer_size: self.flush()
+        return
+
+    def flush(self):
+        '''
+        Write out any output gathered so far
+        '''
+        if self._pending:
+            self._out.write(''.join(self._pending))
+            self._pending.clear()
+        self._pending_size = 0
+        return
+
+    def finish(self):
+        '''
+        Finish the output, after all records
+        '''
+        if not self._lines: self._pending.append(']')
+        self.flush()
+        return
@@ -1,12 +1,14 @@
 #!/usr/bin/env python
 '''
+Rough timings of converting each of a few test files. For a fuller breakdown, with JSON output, use:
+
+python -m bibframe.bench
 
 ----
 '''
 
 import sys
 import logging
-import asyncio
 import timeit
 import io
 from io import StringIO, BytesIO
@@ -46,15 +48,13 @@ def run_one(name, entbase=None, config=None, variation=''):
     print('Running {} ...'.format('('+variation+')' if variation else ''), fpath)
 
     def main():
-        #Need a new event loop per timeit iteration
-        loop = asyncio.new_event_loop(); asyncio.set_event_loop(None);
         instream.seek(io.SEEK_SET)
-        bfconvert(instream, model=m, out=s, config=config, loop=loop)
+        bfconvert(instream, model=m, out=s, config=config)
 
     global_space = globals()
     global_space.update(locals())
     timing = timeit.timeit('main()', setup='', number=NLOOPS, globals=global_space)
-    print('{} loops, best of 3: {:.2f} sec per loop.'.format(NLOOPS, timing))
+    print('{} loops, {:.4f} sec per loop.'.format(NLOOPS, timing / NLOOPS))
 
 
 NAMES = [ 'gunslinger',
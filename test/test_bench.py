@@ -0,0 +1,47 @@
+'''
+Check the benchmark harness runs & reports on each stage of processing
+
+Requires http://pytest.org/ e.g.:
+
+pip install pytest
+
+----
+'''
+
+import os
+import json
+import logging
+
+import pytest
+
+from bibframe import bench
+from bibframe.reader import marc
+
+
+RESOURCEPATH = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'resource'))
+
+
+@pytest.mark.parametrize('name,ninputs', [('zweig.mrx', 1), ('zweig.mrc', 1), ('std-examples.zip', 2)])
+def test_bench_report(name, ninputs):
+    report = bench.run([os.path.join(RESOURCEPATH, name)], loops=1, logger=logging.getLogger('test_bench'))
+    #Has to be serializable, for comparing runs
+    report = json.loads(json.dumps(report))
+    assert len(report['inputs']) == ninputs
+    for result in report['inputs'] + [report['total']]:
+        assert result['records'] >= 1
+        assert result['records_per_sec'] > 0
+        assert sorted(result['stages']) == sorted(bench.STAGES)
+        assert abs(sum(result['stages'].values()) - result['seconds']) < 1e-6
+        for stage in ('parse', 'bootstrap', 'main', 'specials', 'json', 'rdf'):
+            assert result['stages'][stage] > 0
+
+
+def test_instrumented_restores():
+    originals = marc.process_marcpatterns, marc.dump_record_links
+    with bench.instrumented(bench.stage_timer()):
+        assert marc.process_marcpatterns is not originals[0]
+    assert (marc.process_marcpatterns, marc.dump_record_links) == originals
+
+
+if __name__ == '__main__':
+    raise SystemExit("use py.test")
@@ -0,0 +1,92 @@
+'''
+Check that compressed & zipped inputs give the same results as the plain files
+
+Requires http://pytest.org/ e.g.:
+
+pip install pytest
+
+----
+'''
+
+import os
+import bz2
+import gzip
+import lzma
+import logging
+import zipfile
+import difflib
+from io import StringIO, BytesIO
+
+import pytest
+
+from amara3.inputsource import inputsourcetype
+
+from bibframe.reader import bfconvert
+from bibframe.reader.marc21 import handle_marc21_source, iter_records, iter_stream_records
+
+
+RESOURCEPATH = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'resource'))
+
+COMPRESSORS = {'gz': gzip.compress, 'bz2': bz2.compress, 'xz': lzma.compress}
+
+def file_diff(s_orig, s_new):
+    diff = difflib.unified_diff(s_orig.split('\n'), s_new.split('\n'))
+    return '\n'.join(list(diff))
+
+
+def convert(inputs, **kwargs):
+    out = StringIO()
+    bfconvert(inputs, out=out, logger=logging.getLogger('test_compressed'), **kwargs)
+    return out.getvalue()
+
+
+@pytest.mark.parametrize('name,handler', [('zweig.mrx', None), ('zweig.mrc', handle_marc21_source)])
+@pytest.mark.parametrize('ext', sorted(COMPRESSORS))
+def test_compressed_matches_plain(name, handler, ext, tmpdir):
+    kwargs = {'handle_marc_source': handler} if handler else {}
+    fpath = os.path.join(RESOURCEPATH, name)
+    expected = convert([fpath], defaultsourcetype=inputsourcetype.filename, **kwargs)
+    with open(fpath, 'rb') as f:
+        compressed = COMPRESSORS[ext](f.read())
+    #Detected from content, not extension
+    cpath = tmpdir.join(name + '.data')
+    cpath.write_binary(compressed)
+    result = convert([str(cpath)], defaultsourcetype=inputsourcetype.filename, **kwargs)
+    assert expected == result, file_diff(expected, result)
+    result = convert(BytesIO(compressed), **kwargs)
+    assert expected == result, file_diff(expected, result)
+
+
+def test_zip():
+    with zipfile.ZipFile(os.path.join(RESOURCEPATH, 'std-examples.zip')) as zf:
+        expected = ''.join(( convert(BytesIO(zf.read(member))) for member in zf.namelist() ))
+    result = convert([os.path.join(RESOURCEPATH, 'std-examples.zip')], defaultsourcetype=inputsourcetype.filename)
+    #Each source gets its own JSON array
+    assert expected == result, file_diff(expected, result)
+
+
+def test_zip_of_compressed(tmpdir):
+    fpath = os.path.join(RESOURCEPATH, 'zweig.mrx')
+    expected = convert([fpath], defaultsourcetype=inputsourcetype.filename)
+    zpath = tmpdir.join('bundle.zip')
+    with open(fpath, 'rb') as f, zipfile.ZipFile(str(zpath), 'w') as zf:
+        zf.writestr('records/', b'')
+        zf.writestr('records/zweig.mrx.gz', gzip.compress(f.read()))
+    result = convert([str(zpath)], defaultsourcetype=inputsourcetype.filename)
+    assert expected == result, file_diff(expected, result)
+
+
+@pytest.mark.parametrize('chunk_size', [1, 7, 4096])
+def test_stream_records(chunk_size):
+    with open(os.path.join(RESOURCEPATH, 'zweig.mrc'), 'rb') as f:
+        data = f.read()
+    #Add a record with a bad length & stray line ending, to exercise the fallback to the terminator
+    data = data + b'00000' + data[5:data.index(b'\x1d') + 1] + b'\n'
+    logger = logging.getLogger('test_compressed')
+    expected = list(iter_records(data, logger))
+    assert len(expected) > 1
+    assert list(iter_stream_records(BytesIO(data), logger, chunk_size=chunk_size)) == expected
+
+
+if __name__ == '__main__':
+    raise SystemExit("use py.test")
@@ -0,0 +1,88 @@
+'''
+Check incremental conversion against a manifest of earlier runs
+
+Requires http://pytest.org/ e.g.:
+
+pip install pytest
+
+----
+'''
+
+import os
+import json
+import logging
+from io import StringIO, BytesIO
+
+import pytest
+
+from amara3.inputsource import inputsourcetype
+
+from bibframe.reader import bfconvert
+
+
+RESOURCEPATH = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'resource'))
+
+with open(os.path.join(RESOURCEPATH, 'GW_bf_test10.mrx'), 'rb') as f:
+    RECORDS = f.read()
+
+CHANGED_TITLE = (b'<subfield code="a">The Medieval mind</subfield>', b'<subfield code="a">The Mediaeval mind</subfield>')
+DELETED = (b'<leader>02355cgm a22004934a 4500</leader>', b'<leader>02355dgm a22004934a 4500</leader>')
+
+
+def convert(content, manifest=None, base=None):
+    out = StringIO()
+    retractions = StringIO() if manifest else None
+    bfconvert([BytesIO(content)], entbase=base, out=out, manifest=manifest, retractions=retractions,
+                defaultsourcetype=inputsourcetype.stream, logger=logging.getLogger('test_delta'))
+    return json.loads(out.getvalue()), json.loads(retractions.getvalue()) if manifest else None
+
+
+def origins(links):
+    #Links are output as (index, link) pairs
+    return { link[0] for (ix, link) in links }
+
+
+def test_delta(tmpdir):
+    manifest = str(tmpdir.join('manifest.sqlite'))
+    full, ignore = convert(RECORDS)
+
+    #First run converts everything
+    assert convert(RECORDS, manifest) == (full, [])
+    #Nothing's changed, so nothing's converted
+    assert convert(RECORDS, manifest) == ([], [])
+
+    #Change the title of the first record, so its work ID changes
+    changed = RECORDS.replace(*CHANGED_TITLE)
+    expected, ignore = convert(changed)
+    out, retracted = convert(changed, manifest)
+    assert out and origins(out) < origins(expected)
+    [retraction] = retracted
+    assert retraction['control'] == '10979137'
+    assert retraction['status'] == 'changed'
+    old_ids = set(retraction['retracted'])
+    #The old IDs are gone, and were generated before
+    assert old_ids and not old_ids & origins(out) and old_ids <= origins(full)
+    assert convert(changed, manifest) == ([], [])
+
+    #Delete the record, retracting the rest of its resources
+    deleted = changed.replace(*DELETED)
+    out, retracted = convert(deleted, manifest)
+    assert out == []
+    [retraction] = retracted
+    assert retraction['control'] == '10979137'
+    assert retraction['status'] == 'deleted'
+    assert retraction['retracted'] and not old_ids & set(retraction['retracted'])
+
+
+def test_delta_settings(tmpdir):
+    manifest = str(tmpdir.join('manifest.sqlite'))
+    convert(RECORDS, manifest)
+    #Changing the conversion settings reconverts everything, retracting the old IDs
+    expected, ignore = convert(RECORDS, base='http://example.org/')
+    out, retracted = convert(RECORDS, manifest, base='http://example.org/')
+    assert out == expected
+    assert len(retracted) == 11
+
+
+if __name__ == '__main__':
+    raise SystemExit("use py.test")
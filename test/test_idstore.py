@@ -0,0 +1,95 @@
+'''
+Check that the stores for existing IDs give the same folding, and so the same output, as a plain set
+
+Requires http://pytest.org/ e.g.:
+
+pip install pytest
+
+----
+'''
+
+import os
+import glob
+import logging
+import difflib
+import sqlite3
+from io import StringIO
+
+import pytest
+
+from amara3.inputsource import inputsourcetype
+
+from bibframe.reader import bfconvert
+from bibframe.reader.idstore import compact_id_store, sqlite_id_store, int64_table
+
+
+RESOURCEPATH = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'resource'))
+
+#Repeated records, so that resources get folded
+INPUTS = [os.path.join(RESOURCEPATH, 'GW_bf_test10.mrx'), os.path.join(RESOURCEPATH, 'zweig.mrx')] * 2
+
+def file_diff(s_orig, s_new):
+    diff = difflib.unified_diff(s_orig.split('\n'), s_new.split('\n'))
+    return '\n'.join(list(diff))
+
+
+def convert(config):
+    out = StringIO()
+    bfconvert(INPUTS, out=out, config=config, defaultsourcetype=inputsourcetype.filename,
+                logger=logging.getLogger('test_idstore'))
+    return out.getvalue()
+
+
+@pytest.mark.parametrize('store', [{'store': 'compact'}, {'store': 'sqlite', 'batch_size': 3}])
+def test_store_matches_memory(store):
+    expected = convert({})
+    output = convert({'existing-ids': store})
+    assert expected == output, file_diff(expected, output)
+
+
+def test_sqlite_path(tmpdir):
+    #The named database is reused for each source & each run, but every store starts out empty
+    expected = convert({})
+    store = {'store': 'sqlite', 'path': str(tmpdir.join('ids.sqlite')), 'batch_size': 1}
+    for run in range(2):
+        output = convert({'existing-ids': store})
+        assert expected == output, file_diff(expected, output)
+
+
+def test_sqlite_close_flushes(tmpdir):
+    path = str(tmpdir.join('ids.sqlite'))
+    store = sqlite_id_store(path=path, batch_size=100)
+    for eid in IDS: store.add(eid)
+    store.close()
+    conn = sqlite3.connect(path)
+    assert conn.execute('SELECT COUNT(*) FROM existing_ids').fetchone()[0] == len(IDS)
+    conn.close()
+
+
+IDS = ['http://example.org/bBsHvHu8S-M', 'http://example.org/AAAAAAAAAAA', 'http://example.com/bBsHvHu8S-M',
+        'bBsHvHu8S-M', 'not-a-hash!', 'http://example.org/resource']
+
+@pytest.mark.parametrize('store_cls', [compact_id_store, lambda: sqlite_id_store(batch_size=2)])
+def test_store_membership(store_cls):
+    store = store_cls()
+    assert not store
+    for eid in IDS[:3]: store.add(eid)
+    assert store
+    assert [ eid in store for eid in IDS ] == [True, True, True, False, False, False]
+    for eid in IDS: store.add(eid)
+    assert all(( eid in store for eid in IDS ))
+    assert len(store) == len(IDS)
+    store.close()
+
+
+def test_int64_table_grows():
+    table = int64_table(size=8)
+    items = [ (i * 0x9E3779B97F4A7C15) % (1 << 63) - (i % 2) * (1 << 62) for i in range(1000) ]
+    for item in items: table.add(item)
+    assert len(table) == len(set(items))
+    assert all(( item in table for item in items ))
+    assert 12345 not in table
+
+
+if __name__ == '__main__':
+    raise SystemExit("use py.test")
@@ -0,0 +1,97 @@
+'''
+Check labels from the labelizer plug-in's rules
+
+Requires http://pytest.org/ e.g.:
+
+pip install pytest
+
+----
+'''
+
+import logging
+
+import pytest
+
+from versa import I
+from versa.driver import memory
+
+from bibframe import BF_MARCREC_TASK
+from bibframe.plugin import labelizer
+from bibframe.reader.tasks import plugin_executor
+
+
+BL = 'http://bibfra.me/vocab/lite/'
+VTYPE_REL = labelizer.VTYPE_REL
+RDFS_LABEL = labelizer.RDFS_LABEL
+
+
+def label(rules, links, typ=BL + 'Work', **config):
+    model = memory.connection()
+    model.add(I('http://example.org/res'), VTYPE_REL, I(typ))
+    for rel, val in links:
+        model.add(I('http://example.org/res'), I(BL + rel), val)
+    pinfo = {}
+    config['lookup'] = {BL + 'Work': rules}
+    labelizer.labelizer(pinfo, config)
+    executor = plugin_executor([pinfo])
+    executor.run(BF_MARCREC_TASK, model, {'vocabbase': BL, 'logger': logging})
+    executor.close()
+    return [ t for (o, r, t, a) in model.match(None, RDFS_LABEL) ]
+
+
+LINKS = [('name', 'Smith'), ('title', 'Tea'), ('date', '1900'), ('title', 'Cakes')]
+
+@pytest.mark.parametrize('rules,expected', [
+    #Property order, with multiple values
+    ({'properties': [BL + 'title', BL + 'name']}, ['Tea | Cakes Smith']),
+    #MARC order
+    ({'marcOrder': True, 'separator': ', ', 'properties': [BL + 'title', BL + 'name']}, ['Smith, Tea | Cakes']),
+    #Callables as eval-able strings, & a plain wrapper
+    ({'separator': "lambda ctx: ' / ' if ctx['nextProperty'] == I('" + BL + "date') else ' '",
+      'multivalSeparator': "lambda ctx: ' & '", 'wrapper': '[]',
+      'properties': [BL + 'title', BL + 'date']}, ['[Tea] & [Cakes] / [1900]']),
+    #The configured vocabulary base IRI is available to them
+    ({'separator': "lambda ctx: ' / ' if ctx['nextProperty'] == vocabbase + 'date' else ' '",
+      'properties': [BL + 'title', BL + 'date']}, ['Tea | Cakes / 1900']),
+    #The first rule which gives a label wins
+    ([{'properties': [BL + 'medium']}, {'properties': [BL + 'date']}], ['1900']),
+    ([{'properties': [BL + 'medium']}], []),
+])
+def test_rules(rules, expected):
+    assert label(rules, LINKS) == expected
+
+
+def test_default_and_type():
+    assert label([{'properties': [BL + 'medium']}], LINKS, **{'default-label': 'UNKNOWN'}) == ['UNKNOWN']
+    #No rules for the type
+    assert label({'properties': [BL + 'title']}, LINKS, typ=BL + 'Instance') == []
+
+
+def test_compiled_once(monkeypatch):
+    evaluated = []
+    def counting_eval(s, vocabbase):
+        evaluated.append(s)
+        return ' -- '
+    monkeypatch.setattr(labelizer, 'chunk_eval', counting_eval)
+    pinfo = {}
+    labelizer.labelizer(pinfo, {'lookup': {BL + 'Work': {'properties': [BL + 'title']}}})
+    assert len(evaluated) == 3
+    model = memory.connection()
+    for i in range(5):
+        model.add(I('http://example.org/res{0}'.format(i)), VTYPE_REL, I(BL + 'Work'))
+        model.add(I('http://example.org/res{0}'.format(i)), I(BL + 'title'), 'Title')
+    executor = plugin_executor([pinfo])
+    executor.run(BF_MARCREC_TASK, model, {'vocabbase': BL, 'logger': logging})
+    executor.close()
+    assert len(evaluated) == 3
+    assert len(list(model.match(None, RDFS_LABEL))) == 5
+    #Compiled again for a run with another vocabulary base IRI, but still only the once
+    for vocabbase in ('http://example.org/vocab/', 'http://example.org/vocab/'):
+        executor = plugin_executor([pinfo])
+        executor.run(BF_MARCREC_TASK, model, {'vocabbase': vocabbase, 'logger': logging})
+        executor.close()
+    assert len(evaluated) == 6
+
+
+if __name__ == '__main__':
+    raise SystemExit("use py.test")
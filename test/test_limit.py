@@ -0,0 +1,80 @@
+'''
+Check that conversion stops reading input once the record limit is reached
+
+Requires http://pytest.org/ e.g.:
+
+pip install pytest
+
+----
+'''
+
+import os
+import json
+import logging
+from io import BytesIO, StringIO
+
+import pytest
+
+from amara3.inputsource import inputsourcetype
+
+from bibframe.reader import bfconvert
+from bibframe.reader.marc21 import handle_marc21_source
+
+
+RESOURCEPATH = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'resource'))
+
+NRECORDS = 500
+
+class counting_stream(BytesIO):
+    '''
+    Stream which tracks how much has been read from it
+    '''
+    def __init__(self, data):
+        BytesIO.__init__(self, data)
+        self.amount_read = 0
+
+    def read(self, *args):
+        data = BytesIO.read(self, *args)
+        self.amount_read += len(data)
+        return data
+
+
+class unreadable_stream(BytesIO):
+    def read(self, *args):
+        raise AssertionError('Input read after the limit was reached')
+
+
+def big_marcxml():
+    with open(os.path.join(RESOURCEPATH, 'zweig.mrx'), 'rb') as f:
+        data = f.read()
+    head, sep, rest = data.partition(b'<marc:record>')
+    records, sep, tail = (sep + rest).rpartition(b'</marc:collection>')
+    return head + records * NRECORDS + sep + tail
+
+
+def convert(inputs, **kwargs):
+    out = StringIO()
+    bfconvert(inputs, out=out, defaultsourcetype=inputsourcetype.stream, logger=logging.getLogger('test_limit'), **kwargs)
+    return out.getvalue()
+
+
+@pytest.mark.parametrize('limit', [1, 3])
+def test_limit_stops_reading(limit):
+    data = big_marcxml()
+    stream = counting_stream(data)
+    output = convert([stream, unreadable_stream()], limit=limit)
+    assert stream.amount_read < len(data) / 10
+    assert len(json.loads(output)) > 0
+
+
+def test_limit_marc21():
+    with open(os.path.join(RESOURCEPATH, 'zweig.mrc'), 'rb') as f:
+        data = f.read()
+    #zweig.mrc has 2 records
+    output = convert([BytesIO(data * NRECORDS), unreadable_stream()], limit=2, handle_marc_source=handle_marc21_source)
+    #Complete JSON, with just the resources of those records
+    assert output == convert([BytesIO(data)], handle_marc_source=handle_marc21_source)
+
+
+if __name__ == '__main__':
+    raise SystemExit("use py.test")
@@ -0,0 +1,60 @@
+'''
+Check that MARC21 (ISO 2709) binary input gives the same results as the equivalent MARC/XML
+
+Requires http://pytest.org/ e.g.:
+
+pip install pytest
+
+----
+'''
+
+import os
+import logging
+import difflib
+from io import StringIO, BytesIO
+
+import pytest
+
+from amara3.inputsource import inputsourcetype
+
+from bibframe.reader import bfconvert
+from bibframe.reader.marc21 import handle_marc21_source
+
+
+RESOURCEPATH = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'resource'))
+
+def file_diff(s_orig, s_new):
+    diff = difflib.unified_diff(s_orig.split('\n'), s_new.split('\n'))
+    return '\n'.join(list(diff))
+
+
+def convert(inputs, **kwargs):
+    out = StringIO()
+    bfconvert(inputs, out=out, logger=logging.getLogger('test_marc21'), **kwargs)
+    return out.getvalue()
+
+
+@pytest.mark.parametrize('canonical', [False, True])
+def test_marc21_matches_marcxml(canonical):
+    expected = convert([os.path.join(RESOURCEPATH, 'zweig.mrx')], canonical=canonical,
+                        defaultsourcetype=inputsourcetype.filename)
+    #From a file (memory-mapped)
+    result = convert([os.path.join(RESOURCEPATH, 'zweig.mrc')], canonical=canonical,
+                        handle_marc_source=handle_marc21_source, defaultsourcetype=inputsourcetype.filename)
+    assert expected == result, file_diff(expected, result)
+    #From a stream
+    with open(os.path.join(RESOURCEPATH, 'zweig.mrc'), 'rb') as mrc:
+        result = convert(BytesIO(mrc.read()), canonical=canonical, handle_marc_source=handle_marc21_source)
+    assert expected == result, file_diff(expected, result)
+
+
+def test_marc21_config():
+    expected = convert([os.path.join(RESOURCEPATH, 'zweig.mrx')], limit=1, defaultsourcetype=inputsourcetype.filename)
+    config = {'marc_record_handler': 'http://bibfra.me/tool/pybibframe/marchandler#marc21'}
+    result = convert([os.path.join(RESOURCEPATH, 'zweig.mrc')], limit=1, config=config,
+                        defaultsourcetype=inputsourcetype.filename)
+    assert expected == result, file_diff(expected, result)
+
+
+if __name__ == '__main__':
+    raise SystemExit("use py.test")
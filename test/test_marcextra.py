@@ -0,0 +1,70 @@
+'''
+Check decoding of the fixed length data elements of the 006, 007 & 008 fields
+
+Requires http://pytest.org/ e.g.:
+
+pip install pytest
+
+----
+'''
+
+import logging
+
+import pytest
+
+from versa import I
+
+from bibframe.reader.marcextra import transforms
+
+WORK = I('http://example.org/work')
+INSTANCE = I('http://example.org/instance')
+
+#(leader, 008)
+CASES = [
+    ('00000nam a2200000 a 4500', '920219s1993    caua   j      000 0 eng  '),
+    ('00000ncm a2200000 a 4500', '850103s1984    nyumsa  bdf        ger  '),
+    ('00000nem a2200000 a 4500', '990602s1998    xx ar    a     0   a0eng  '),
+    ('00000ngm a2200000 a 4500', '010523s2000    xxu120 e          vleng  '),
+    ('00000nmm a2200000 a 4500', '971212s1997    xx  j   o d f      eng  '),
+    ('00000nas a2200000 a 4500', '750101c19009999nyuwr p       0   a0eng  '),
+    ('00000npc a2200000 a 4500', '881107i18771953xx            o    eng  '),
+    #Truncated 008
+    ('00000nam a2200000 a 4500', '920219s1993    caua'),
+    #Unknown material type
+    ('00000n   a2200000 a 4500', '920219s1993    caua   j      000 0 eng  '),
+]
+
+
+def params(leader):
+    return {'leader': leader, 'default-origin': WORK, 'instanceids': [INSTANCE], 'logger': logging}
+
+
+@pytest.mark.parametrize('leader,field008', CASES)
+def test_process_008_batch(leader, field008):
+    t = transforms()
+    #Batch decoding gives the same links, but with None for the work
+    expected = [ (None if o == WORK else o, r, v) for (o, r, v) in t.process_008(field008, params(leader)) ]
+    assert t.process_008_batch([field008], [leader], instance=INSTANCE) == [expected]
+
+
+def test_process_008_batch_shared_leader():
+    t = transforms()
+    leader = CASES[0][0]
+    fields = [ field008 for (l, field008) in CASES ] + [None]
+    batch = t.process_008_batch(fields, leader, instance=INSTANCE)
+    assert batch == [ t.process_008_batch([field008], [leader], instance=INSTANCE)[0] for field008 in fields ]
+    assert batch[-1] == []
+
+
+def test_fixed_length_patterns_compiled_once():
+    t = transforms()
+    list(t.process_008(CASES[0][1], params(CASES[0][0])))
+    compiled = t.fixed_length_patterns('Books', 18)
+    list(t.process_008(CASES[0][1], params(CASES[0][0])))
+    assert t.fixed_length_patterns('Books', 18) is compiled
+    #The 006 patterns are the same, shifted
+    assert [ p[0] + 17 for p in t.fixed_length_patterns('Books', 1) ] == [ p[0] for p in compiled ]
+
+
+if __name__ == '__main__':
+    raise SystemExit("use py.test")
@@ -0,0 +1,66 @@
+'''
+Check that caching the IDs of materialized resources doesn't change the results of conversion
+
+Requires http://pytest.org/ e.g.:
+
+pip install pytest
+
+----
+'''
+
+import os
+import json
+import asyncio
+import logging
+from io import StringIO
+
+import pytest
+
+from amara3.inputsource import inputsourcetype
+
+from bibframe import g_services, BF_INIT_TASK, BF_MATRES_TASK
+from bibframe.reader import bfconvert
+
+
+RESOURCEPATH = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'resource'))
+
+MATRES_LOG = 'http://example.org/test#matres-log'
+
+#What the plug-in saw of each materialized resource
+SEEN = []
+
+@asyncio.coroutine
+def log_matres(model, params):
+    SEEN.append((params['materialized_id'], params['first_seen'], params['plaintext']))
+    return
+
+g_services[MATRES_LOG] = {BF_INIT_TASK: lambda pinfo, config=None: None, BF_MATRES_TASK: log_matres}
+
+
+def convert(fnames, cache_size):
+    del SEEN[:]
+    out = StringIO()
+    stats = StringIO()
+    config = {'plugins': [{'id': MATRES_LOG}], 'materialize-cache-size': cache_size}
+    bfconvert([ os.path.join(RESOURCEPATH, fname) for fname in fnames ], out=out, config=config, stats=stats,
+                defaultsourcetype=inputsourcetype.filename, logger=logging.getLogger('test_materialize_cache'))
+    return out.getvalue(), list(SEEN), json.loads(stats.getvalue())['materialize_cache']
+
+
+#Repeating a file repeats all its resources, across sources
+@pytest.mark.parametrize('fnames', [['zweig.mrx'], ['zweig.mrx', 'zweig.mrx'], ['egyptskulls.mrx', 'kford-holdings1.mrx']])
+@pytest.mark.parametrize('cache_size', [1, 100000])
+def test_materialize_cache(fnames, cache_size):
+    expected_out, expected_seen, uncached = convert(fnames, 0)
+    assert uncached['hits'] == uncached['misses'] == 0
+    out, seen, cached = convert(fnames, cache_size)
+    assert out == expected_out
+    #Plug-ins get the same notifications, including whether the resource was already seen
+    assert seen == expected_seen
+    assert cached['hits'] + cached['misses'] == len(seen)
+    if len(fnames) == 2 and fnames[0] == fnames[1] and cache_size > 1:
+        assert cached['hits'] >= len(seen) // 2
+
+
+if __name__ == '__main__':
+    raise SystemExit("use py.test")
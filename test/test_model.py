@@ -0,0 +1,120 @@
+'''
+Check that the indexed Versa model gives the same results as Versa's memory model
+
+Requires http://pytest.org/ e.g.:
+
+pip install pytest
+
+----
+'''
+
+import os
+import logging
+from io import StringIO
+
+import pytest
+
+from amara3.inputsource import inputsourcetype
+from versa import I
+from versa.driver import memory
+
+from bibframe.reader import bfconvert
+from bibframe.model import indexed_connection
+
+
+RESOURCEPATH = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'resource'))
+
+EX = 'http://example.org/'
+
+LINKS = [
+    (I(EX + 'work'), I(EX + 'title'), 'Title', {}),
+    (I(EX + 'work'), I(EX + 'creator'), I(EX + 'person'), {'role': 'author'}),
+    (I(EX + 'instance'), I(EX + 'instantiates'), I(EX + 'work'), {}),
+    (I(EX + 'work'), I(EX + 'title'), 'Other title', {}),
+    (I(EX + 'person'), I(EX + 'name'), 'Name', {}),
+    (I(EX + 'work'), I(EX + 'creator'), I(EX + 'person2'), {'role': 'editor'}),
+]
+
+PATTERNS = [
+    {},
+    {'origin': EX + 'work'},
+    {'origin': I(EX + 'work'), 'rel': I(EX + 'title')},
+    {'origin': EX + 'work', 'rel': EX + 'creator', 'attrs': {'role': 'editor'}},
+    {'origin': EX + 'work', 'target': 'Other title'},
+    {'origin': EX + 'nowhere'},
+    {'rel': EX + 'title'},
+    {'origin': EX + 'work', 'include_ids': True},
+]
+
+
+def models():
+    plain, indexed = memory.connection(), indexed_connection()
+    for m in (plain, indexed): m.add_many(LINKS)
+    return plain, indexed
+
+
+def check_same(plain, indexed):
+    for pattern in PATTERNS:
+        assert list(indexed.match(**pattern)) == list(plain.match(**pattern))
+    assert list(indexed) == list(plain)
+
+
+def test_match():
+    plain, indexed = models()
+    check_same(plain, indexed)
+    check_same(plain.copy(), indexed.copy())
+    assert isinstance(indexed.copy(), indexed_connection)
+
+
+def test_changes():
+    plain, indexed = models()
+    for m in (plain, indexed):
+        #Warm up the indexes, then change the links in ways which shift their positions
+        list(m.match(EX + 'work'))
+        m.add(I(EX + 'work'), I(EX + 'title'), 'Inserted', {}, index=1)
+        list(m.match(EX + 'work'))
+        m.remove([0, 3])
+        list(m.match(EX + 'work'))
+        m.add(I(EX + 'work'), I(EX + 'title'), 'Appended', {})
+    check_same(plain, indexed)
+    for m in (plain, indexed): m.create_space()
+    check_same(plain, indexed)
+
+
+def test_add_while_matching():
+    plain, indexed = models()
+    for m in (plain, indexed):
+        for o, r, t, a in m.match(EX + 'work', EX + 'title'):
+            if not t.startswith('Copy'): m.add(o, r, 'Copy of ' + t, {})
+    check_same(plain, indexed)
+
+
+class no_scan_list(list):
+    def __contains__(self, item):
+        raise AssertionError('Links scanned for a duplicate')
+
+
+def test_duplicates():
+    plain, indexed = models()
+    indexed._relationships = no_scan_list(indexed._relationships)
+    for m in (plain, indexed):
+        m.add_many(LINKS)
+        m.add(I(EX + 'work'), I(EX + 'title'), 'Title', {'lang': 'en'})
+        m.add(I(EX + 'work'), I(EX + 'title'), 'Title', {'lang': 'en'})
+        m.add(I(EX + 'work'), I(EX + 'title'), 'Title', {}, index=0)
+    check_same(plain, indexed)
+
+
+def convert(config):
+    out = StringIO()
+    bfconvert([os.path.join(RESOURCEPATH, 'GW_bf_test10.mrx')], out=out, config=config, canonical=True,
+                defaultsourcetype=inputsourcetype.filename, logger=logging.getLogger('test_model'))
+    return out.getvalue()
+
+
+def test_conversion():
+    assert convert(None) == convert({'versa-model-cls': 'versa.driver.memory.connection'})
+
+
+if __name__ == '__main__':
+    raise SystemExit("use py.test")
@@ -0,0 +1,81 @@
+'''
+Check that converting records across multiple worker processes gives the same output as serial conversion
+
+Requires http://pytest.org/ e.g.:
+
+pip install pytest
+
+----
+'''
+
+import os
+import glob
+import logging
+import difflib
+from io import StringIO
+
+import pytest
+
+from amara3.inputsource import inputsourcetype
+
+from bibframe.reader import bfconvert, parallel, idstore
+
+id_store_factory = idstore.id_store_factory
+
+
+RESOURCEPATH = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'resource'))
+
+#Several sources, some with multiple records, and some records repeated so that resources get folded
+INPUTS = sorted(glob.glob(os.path.join(RESOURCEPATH, '*.mrx')))
+INPUTS += [os.path.join(RESOURCEPATH, 'GW_bf_test10.mrx'), os.path.join(RESOURCEPATH, 'zweig.mrx')]
+
+def file_diff(s_orig, s_new):
+    diff = difflib.unified_diff(s_orig.split('\n'), s_new.split('\n'))
+    return '\n'.join(list(diff))
+
+
+def convert(workers, **kwargs):
+    out = StringIO()
+    bfconvert(INPUTS, out=out, defaultsourcetype=inputsourcetype.filename,
+                logger=logging.getLogger('test_parallel'), workers=workers, **kwargs)
+    return out.getvalue()
+
+
+@pytest.mark.parametrize('canonical,limit', [(False, None), (True, None), (False, 5)])
+def test_parallel_matches_serial(monkeypatch, canonical, limit):
+    #Small chunks, so that records are spread across workers
+    monkeypatch.setattr(parallel, 'DEFAULT_CHUNK_SIZE', 2)
+    serial = convert(None, canonical=canonical, limit=limit)
+    parallel_out = convert(3, canonical=canonical, limit=limit)
+    assert serial == parallel_out, file_diff(serial, parallel_out)
+
+
+@pytest.mark.parametrize('config', [
+    {'existing-ids': {'store': 'compact'}},
+    {'existing-ids': {'store': 'sqlite'}},
+    {'materialize-cache-size': 0},
+])
+def test_parallel_config(monkeypatch, tmpdir, config):
+    monkeypatch.setattr(parallel, 'DEFAULT_CHUNK_SIZE', 2)
+    stores = []
+    def recording_store(store_config):
+        factory = id_store_factory(store_config)
+        def create():
+            stores.append(factory())
+            return stores[-1]
+        return create
+    monkeypatch.setattr(idstore, 'id_store_factory', recording_store)
+    if config.get('existing-ids', {}).get('store') == 'sqlite':
+        config = {'existing-ids': {'store': 'sqlite', 'dir': str(tmpdir)}}
+    serial = convert(None, config=config)
+    del stores[:]
+    parallel_out = convert(3, config=config)
+    assert serial == parallel_out, file_diff(serial, parallel_out)
+    #The parent keeps track of the existing IDs in the configured kind of store
+    expected = id_store_factory(config.get('existing-ids'))()
+    expected.close()
+    assert stores and all(( type(s) is type(expected) for s in stores ))
+
+
+if __name__ == '__main__':
+    raise SystemExit("use py.test")
@@ -0,0 +1,145 @@
+'''
+Check that plug-in tasks run concurrently, without changing the results of conversion
+
+Requires http://pytest.org/ e.g.:
+
+pip install pytest
+
+----
+'''
+
+import os
+import asyncio
+import logging
+from io import StringIO
+
+import pytest
+
+from amara3.inputsource import inputsourcetype
+
+from bibframe import g_services, BF_INIT_TASK, BF_MARCREC_TASK
+from bibframe.reader import bfconvert
+from bibframe.reader.tasks import plugin_executor
+from bibframe.model import indexed_connection
+from bibframe.stats import collector
+
+
+RESOURCEPATH = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'resource'))
+
+SLOW_LOOKUP = 'http://example.org/test#slow-lookup'
+SLOW_LOOKUP2 = 'http://example.org/test#slow-lookup2'
+QUICK_LOOKUP = 'http://example.org/test#quick-lookup'
+LOOKUP_REL = 'http://example.org/test#looked-up'
+
+
+class slow_lookup(object):
+    '''
+    Stands in for a plug-in which looks things up over the network. The first record takes
+    much longer than the rest, so if tasks overlap they finish out of order
+    '''
+    #Tasks under way at the moment, most at once, and records in the order their tasks finished
+    state = {'running': 0, 'most': 0, 'finished': []}
+
+    def __init__(self, pinfo, config=None):
+        pinfo[BF_MARCREC_TASK] = self.handle_record_links
+        self._count = 0
+        return
+
+    async def handle_record_links(self, model, params):
+        state = self.state
+        count = self._count
+        self._count += 1
+        state['running'] += 1
+        state['most'] = max(state['most'], state['running'])
+        await asyncio.sleep(0.2 if count == 0 else 0.01)
+        origin = next(iter(model))[1][0]
+        model.add(origin, LOOKUP_REL, str(count))
+        state['running'] -= 1
+        state['finished'].append(count)
+        return
+
+class quick_lookup(object):
+    '''
+    Plug-in with a plain function as its task, which notes the models it's given
+    '''
+    models = []
+
+    def __init__(self, pinfo, config=None):
+        pinfo[BF_MARCREC_TASK] = self.handle_record_links
+        return
+
+    def handle_record_links(self, model, params):
+        self.models.append(model)
+        origin = next(iter(model))[1][0]
+        model.add(origin, LOOKUP_REL, 'quick')
+        return
+
+g_services[SLOW_LOOKUP] = {BF_INIT_TASK: slow_lookup}
+g_services[SLOW_LOOKUP2] = {BF_INIT_TASK: slow_lookup}
+g_services[QUICK_LOOKUP] = {BF_INIT_TASK: quick_lookup}
+
+
+def convert(plugin_ids, window, model=None):
+    slow_lookup.state.update(running=0, most=0, finished=[])
+    out = StringIO()
+    config = {'plugins': [ {'id': pid} for pid in plugin_ids ], 'plugin-window': window}
+    bfconvert([os.path.join(RESOURCEPATH, 'GW_bf_test10.mrx')], out=out, config=config, model=model,
+                defaultsourcetype=inputsourcetype.filename, logger=logging.getLogger('test_plugin_tasks'))
+    return out.getvalue(), dict(slow_lookup.state)
+
+
+def test_no_overlap():
+    out, state = convert([SLOW_LOOKUP], 1)
+    assert LOOKUP_REL in out
+    assert state['most'] == 1
+    assert state['finished'] == sorted(state['finished'])
+
+
+@pytest.mark.parametrize('window', [2, 4, 100])
+def test_window(window):
+    expected, state = convert([SLOW_LOOKUP], 1)
+    out, state = convert([SLOW_LOOKUP], window)
+    #Records are still output in order, with what the plug-in added
+    assert out == expected
+    assert 1 < state['most'] <= window
+    assert state['finished'] != sorted(state['finished'])
+    assert sorted(state['finished']) == list(range(11))
+
+
+def test_plugins_concurrent():
+    #Both plug-ins' tasks for a record are awaited together, even without overlapping records
+    out, state = convert([SLOW_LOOKUP, SLOW_LOOKUP2], 1)
+    assert state['most'] == 2
+
+
+def test_plain_function_in_place():
+    #Tasks which can't carry on past their start work on the output model itself, whatever the window
+    model = indexed_connection()
+    del quick_lookup.models[:]
+    out, state = convert([QUICK_LOOKUP], 16, model=model)
+    assert '"quick"' in out
+    assert len(quick_lookup.models) == 11
+    assert all(( m is model for m in quick_lookup.models ))
+
+    del quick_lookup.models[:]
+    convert([QUICK_LOOKUP, SLOW_LOOKUP], 16, model=model)
+    assert not any(( m is model for m in quick_lookup.models ))
+
+
+def test_timing_on_error():
+    def fail(model, params):
+        raise ValueError('lookup failed')
+
+    stats = collector()
+    plugin = {BF_MARCREC_TASK: fail}
+    stats.name_plugin(plugin, QUICK_LOOKUP)
+    executor = plugin_executor([plugin], stats=stats)
+    with pytest.raises(ValueError):
+        executor.run(BF_MARCREC_TASK, None, {})
+    executor.close()
+    #The task is still timed
+    assert stats.plugin_tasks[QUICK_LOOKUP, BF_MARCREC_TASK][0] == 1
+
+
+if __name__ == '__main__':
+    raise SystemExit("use py.test")
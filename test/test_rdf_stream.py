@@ -0,0 +1,55 @@
+'''
+Check that streaming RDF output gives the same graph as the in-memory rdflib graph output
+
+Requires http://pytest.org/ e.g.:
+
+pip install pytest
+
+----
+'''
+
+import os
+import logging
+from io import StringIO, BytesIO
+
+import pytest
+
+import rdflib
+
+from amara3.inputsource import inputsourcetype
+
+from bibframe.reader import bfconvert
+
+
+RESOURCEPATH = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'resource'))
+
+INPUTS = [ os.path.join(RESOURCEPATH, fname) for fname in ('zweig.mrx', 'timathom-140716.mrx', 'GW_bf_test10.mrx', 'zweig.mrx') ]
+
+
+def convert(**kwargs):
+    bfconvert(INPUTS, out=StringIO(), entbase='http://example.org/', defaultsourcetype=inputsourcetype.filename,
+                logger=logging.getLogger('test_rdf_stream'), **kwargs)
+
+
+def test_stream_matches_graph():
+    ttl = StringIO()
+    convert(rdfttl=ttl)
+    expected = rdflib.Graph()
+    expected.parse(data=ttl.getvalue(), format='turtle')
+
+    nt = BytesIO()
+    streamed_ttl = StringIO()
+    convert(rdfnt=nt, rdfttl=streamed_ttl, streamrdf=True)
+
+    ntlines = nt.getvalue().decode('utf-8').splitlines()
+    #Resources repeated across records should only be written once
+    assert len(ntlines) == len(set(ntlines))
+
+    for data, format in ((nt.getvalue().decode('utf-8'), 'nt'), (streamed_ttl.getvalue(), 'turtle')):
+        g = rdflib.Graph()
+        g.parse(data=data, format=format)
+        assert set(g) == set(expected)
+
+
+if __name__ == '__main__':
+    raise SystemExit("use py.test")
@@ -0,0 +1,94 @@
+'''
+Check that the lightweight MARC record input model behaves as Versa's memory model,
+other than for duplicate links
+
+Requires http://pytest.org/ e.g.:
+
+pip install pytest
+
+----
+'''
+
+import pytest
+
+from versa.driver import memory
+
+from bibframe.reader.record import marc_record
+
+
+MARC = 'http://www.loc.gov/MARC21/slim/'
+REC = 'record-1'
+
+LINKS = [
+    (REC, MARC + 'leader', '00000nam a2200000 a 4500', {}),
+    (REC, MARC + 'control/001', '12345', {'tag': '001'}),
+    (REC, MARC + 'data/650', '', {'tag': '650', 'ind1': ' ', 'ind2': '0', '0.a': 'Cats.'}),
+    (REC, MARC + 'data/650', '', {'tag': '650', 'ind1': ' ', 'ind2': '0', '0.a': 'Dogs.'}),
+    ('record-2', MARC + 'data/650', '', {'tag': '650', 'ind1': ' ', 'ind2': '0', '0.a': 'Cats.'}),
+    (REC, MARC + 'control/003', 'DLC', {'tag': '003'}),
+]
+
+PATTERNS = [
+    {},
+    {'rel': MARC + 'data/650'},
+    {'origin': REC, 'rel': MARC + 'data/650'},
+    {'target': '12345'},
+    {'rel': MARC + 'data/650', 'attrs': {'0.a': 'Cats.'}},
+]
+
+
+def models():
+    rec, mem = marc_record(), memory.connection()
+    for link in LINKS:
+        assert rec.add(*link) == mem.add(*link)
+    return rec, mem
+
+
+def test_add():
+    rec, mem = models()
+    assert rec.size() == mem.size() == len(LINKS)
+    assert list(rec) == list(mem)
+    rec, mem = marc_record(), memory.connection()
+    rec.add_many(LINKS[:2] + list(enumerate(LINKS[2:])))
+    mem.add_many(LINKS)
+    assert list(rec) == list(mem)
+
+
+def test_duplicates():
+    #Repeated fields are all kept, whatever the version of Versa
+    rec = marc_record()
+    rec.add_many(LINKS)
+    assert rec.add(*LINKS[2]) == len(LINKS)
+    rec.add_many(LINKS)
+    assert rec.size() == 2 * len(LINKS) + 1
+    assert len(list(rec.match(REC, MARC + 'data/650', attrs={'0.a': 'Cats.'}))) == 3
+
+
+@pytest.mark.parametrize('pattern', PATTERNS)
+def test_match(pattern):
+    rec, mem = models()
+    assert list(rec.match(**pattern)) == list(mem.match(**pattern))
+    assert list(rec.match(include_ids=True, **pattern)) == list(mem.match(include_ids=True, **pattern))
+
+
+def test_remove():
+    rec, mem = models()
+    for index in ([1, 3], 0):
+        rec.remove(index)
+        mem.remove(index)
+        assert list(rec) == list(mem)
+    rec.add(*LINKS[2])
+    mem.add(*LINKS[2])
+    assert list(rec) == list(mem)
+
+
+def test_null():
+    rec = marc_record()
+    with pytest.raises(ValueError):
+        rec.add(None, MARC + 'leader', '')
+    with pytest.raises(ValueError):
+        rec.add(REC, None, '')
+
+
+if __name__ == '__main__':
+    raise SystemExit("use py.test")
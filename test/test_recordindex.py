@@ -0,0 +1,118 @@
+'''
+Check conversion of ranges of records from MARC/XML, using the index of record offsets
+
+Requires http://pytest.org/ e.g.:
+
+pip install pytest
+
+----
+'''
+
+import os
+import gzip
+import shutil
+import logging
+from io import StringIO
+from xml.etree import ElementTree
+
+import pytest
+
+from amara3.inputsource import inputsourcetype
+
+from bibframe.reader import bfconvert
+from bibframe.reader.marc import MARCXML_NS
+from bibframe.reader.recordindex import index_for, build_index, read_index, INDEX_SUFFIX
+
+
+RESOURCEPATH = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'resource'))
+
+
+def convert(path, **kwargs):
+    out = StringIO()
+    bfconvert([path], out=out, logger=logging.getLogger('test_recordindex'),
+                defaultsourcetype=inputsourcetype.filename, **kwargs)
+    return out.getvalue()
+
+
+def copy_resource(name, tmpdir):
+    path = str(tmpdir.join(name))
+    shutil.copy(os.path.join(RESOURCEPATH, name), path)
+    return path
+
+
+def extract_records(path, start, stop, tmpdir):
+    '''
+    Write a MARC/XML file of just a range of records, independently of the index
+    '''
+    tree = ElementTree.parse(path)
+    records = tree.getroot().findall('{{{0}}}record'.format(MARCXML_NS))
+    collection = ElementTree.Element('{{{0}}}collection'.format(MARCXML_NS))
+    collection.extend(records[start:stop])
+    extract_path = str(tmpdir.join('extract.mrx'))
+    ElementTree.ElementTree(collection).write(extract_path, encoding='utf-8', xml_declaration=True)
+    return extract_path
+
+
+#GW_bf_test10.mrx has 11 records, in the default namespace, & zweig.mrx 2, with a marc: prefix
+@pytest.mark.parametrize('name', ['GW_bf_test10.mrx', 'zweig.mrx'])
+@pytest.mark.parametrize('start,stop', [(None, None), (0, 3), (3, 7), (-2, None), (4, 100)])
+def test_range(name, start, stop, tmpdir):
+    path = copy_resource(name, tmpdir)
+    expected = convert(extract_records(path, start, stop, tmpdir))
+    result = convert(path, record_range=(start, stop))
+    assert result == expected
+    assert os.path.exists(path + INDEX_SUFFIX)
+
+
+def test_empty_range(tmpdir):
+    path = copy_resource('zweig.mrx', tmpdir)
+    with pytest.warns(RuntimeWarning):
+        assert convert(path, record_range=(1, 1)) == '[]'
+
+
+def test_index_sidecar(tmpdir):
+    path = copy_resource('GW_bf_test10.mrx', tmpdir)
+    index = index_for(path)
+    assert len(index) == 11
+    saved = read_index(path + INDEX_SUFFIX)
+    assert (list(saved.starts), list(saved.ends), saved.prolog, saved.epilog, saved.size, saved.lax) == \
+        (list(index.starts), list(index.ends), index.prolog, index.epilog, index.size, index.lax)
+    #Each record's offsets pick out just that record
+    with open(path, 'rb') as f:
+        data = f.read()
+    for start, end in zip(index.starts, index.ends):
+        assert data[start:end].startswith(b'<record>') and data[start:end].endswith(b'</record>')
+    #Tags straddling chunks are handled
+    with open(path, 'rb') as f:
+        small = build_index(f, chunk_size=7)
+    assert (list(small.starts), list(small.ends)) == (list(index.starts), list(index.ends))
+
+    #A changed file gets its index rebuilt
+    with open(path, 'ab') as f:
+        f.write(b'\n')
+    assert index_for(path).size == index.size + 1
+
+
+def test_lax(tmpdir):
+    path = str(tmpdir.join('lax.mrx'))
+    with open(os.path.join(RESOURCEPATH, 'zweig.mrx'), 'rb') as f:
+        #Drop the namespace declaration for the marc: prefix
+        data = f.read().replace(b'xmlns:marc="' + MARCXML_NS.encode('ascii') + b'"', b'')
+    with open(path, 'wb') as f:
+        f.write(data)
+    with open(path, 'rb') as f:
+        assert len(build_index(f, lax=True)) == 2
+    expected = convert(copy_resource('zweig.mrx', tmpdir), record_range=(1, 2))
+    assert convert(path, lax=True, record_range=(1, 2)) == expected
+
+
+def test_compressed(tmpdir):
+    path = str(tmpdir.join('zweig.mrx.gz'))
+    with open(os.path.join(RESOURCEPATH, 'zweig.mrx'), 'rb') as f, gzip.open(path, 'wb') as gzf:
+        gzf.write(f.read())
+    with pytest.raises(ValueError):
+        convert(path, record_range=(0, 2))
+
+
+if __name__ == '__main__':
+    raise SystemExit("use py.test")
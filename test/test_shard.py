@@ -0,0 +1,116 @@
+'''
+Check output rolled across multiple files (shards)
+
+Requires http://pytest.org/ e.g.:
+
+pip install pytest
+
+----
+'''
+
+import os
+import json
+import logging
+from io import StringIO, BytesIO
+from xml.dom import minidom
+
+import pytest
+
+import rdflib
+
+from amara3.inputsource import inputsourcetype
+
+from bibframe.reader import bfconvert
+from bibframe.writer.shard import shard_writer
+
+
+RESOURCEPATH = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'resource'))
+
+#11 records
+INPUT = os.path.join(RESOURCEPATH, 'GW_bf_test10.mrx')
+
+
+def convert(inputs, **kwargs):
+    bfconvert(inputs, logger=logging.getLogger('test_shard'), defaultsourcetype=inputsourcetype.filename,
+                entbase='http://example.org/', **kwargs)
+
+
+def shard_paths(tmpdir, ext):
+    return sorted(( str(p) for p in tmpdir.listdir() if p.ext == ext ))
+
+
+@pytest.mark.parametrize('records_per_shard,nshards', [(4, 3), (11, 1), (100, 1)])
+def test_versajson_shards(records_per_shard, nshards, tmpdir):
+    out = StringIO()
+    convert([INPUT], out=out)
+    expected = json.loads(out.getvalue())
+
+    convert([INPUT], out_pattern=str(tmpdir.join('out-{shard:04d}.json')), records_per_shard=records_per_shard)
+    paths = shard_paths(tmpdir, '.json')
+    assert [ os.path.basename(p) for p in paths ] == [ 'out-{0:04d}.json'.format(i) for i in range(nshards) ]
+    links = []
+    for path in paths:
+        #Each shard is a complete JSON document
+        with open(path) as f:
+            links.extend(json.load(f))
+    assert links == expected
+
+
+def test_rdf_shards(tmpdir):
+    ttl = BytesIO()
+    convert([INPUT], out=StringIO(), rdfttl=ttl, streamrdf=True)
+    expected = set(rdflib.Graph().parse(data=ttl.getvalue().decode('utf-8'), format='turtle'))
+
+    convert([INPUT], out=StringIO(), records_per_shard=4,
+            rdfttl_pattern=str(tmpdir.join('out-{shard}.ttl')),
+            rdfnt_pattern=str(tmpdir.join('out-{shard}.nt')))
+    for ext, format in (('.ttl', 'turtle'), ('.nt', 'nt')):
+        paths = shard_paths(tmpdir, ext)
+        assert len(paths) == 3
+        triples = set()
+        for path in paths:
+            #Each shard parses on its own, e.g. with the Turtle prefixes declared
+            triples.update(rdflib.Graph().parse(path, format=format))
+        assert triples == expected
+
+
+def test_xml_shards(tmpdir):
+    xml = StringIO()
+    convert([INPUT], out=StringIO(), xml=xml)
+    expected = [ elem.toxml() for elem in minidom.parseString(xml.getvalue()).documentElement.childNodes ]
+    assert expected
+
+    convert([INPUT], out=StringIO(), records_per_shard=4, xml_pattern=str(tmpdir.join('out-{shard}.xml')))
+    paths = shard_paths(tmpdir, '.xml')
+    assert len(paths) == 3
+    elems = []
+    for path in paths:
+        #Each shard is a complete MicroXML document
+        elems.extend(( elem.toxml() for elem in minidom.parse(path).documentElement.childNodes ))
+    assert elems == expected
+
+
+def test_shard_per_input(tmpdir):
+    inputs = [INPUT, os.path.join(RESOURCEPATH, 'zweig.mrx')]
+    convert(inputs, out_pattern=str(tmpdir.join('sub', 'out-{shard}.json')))
+    paths = shard_paths(tmpdir.join('sub'), '.json')
+    assert len(paths) == 2
+    for path, name in zip(paths, inputs):
+        out = StringIO()
+        convert([name], out=out)
+        with open(path) as f:
+            assert json.load(f) == json.loads(out.getvalue())
+
+
+def test_empty_and_bad_pattern(tmpdir):
+    sharded = shard_writer(str(tmpdir.join('out-{shard}.json')), lambda stream: (None, lambda: stream.write('[]')))
+    sharded.finish()
+    assert sharded.paths == [str(tmpdir.join('out-0.json'))]
+    with open(sharded.paths[0]) as f:
+        assert json.load(f) == []
+    with pytest.raises(ValueError):
+        shard_writer(str(tmpdir.join('out.json')), None)
+
+
+if __name__ == '__main__':
+    raise SystemExit("use py.test")
@@ -0,0 +1,68 @@
+'''
+Check the opt-in instrumentation of conversion
+
+Requires http://pytest.org/ e.g.:
+
+pip install pytest
+
+----
+'''
+
+import os
+import json
+import logging
+from io import StringIO
+
+import pytest
+
+from amara3.inputsource import inputsourcetype
+
+from bibframe.reader import bfconvert, BOOTSTRAP_PHASE, DEFAULT_MAIN_PHASE
+import bibframe.plugin
+
+
+RESOURCEPATH = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'resource'))
+
+LABELIZER = 'http://bibfra.me/tool/pybibframe#labelizer'
+CONFIG = {
+    "plugins": [ {
+        "id": LABELIZER,
+        "lookup": {
+            "http://bibfra.me/vocab/lite/Instance": [ {
+                "properties": [ "http://bibfra.me/vocab/lite/titleStatement" ]
+            } ]
+        },
+        "default-label": "!UNKNOWN LABEL"
+    } ]
+}
+
+
+def convert(config=None, stats=None):
+    out = StringIO()
+    bfconvert([os.path.join(RESOURCEPATH, 'zweig.mrx')], out=out, config=config, stats=stats,
+                defaultsourcetype=inputsourcetype.filename, logger=logging.getLogger('test_stats'))
+    return out.getvalue()
+
+
+@pytest.mark.parametrize('config', [None, CONFIG])
+def test_stats(config):
+    stats = StringIO()
+    #Collecting statistics mustn't affect the output
+    assert convert(config=config, stats=stats) == convert(config=config)
+    report = json.loads(stats.getvalue())
+    assert report['records']['count'] == 2
+    assert report['records']['aborted'] == 0
+    assert report['rules'][DEFAULT_MAIN_PHASE]['245$a']['count'] == 2
+    assert report['rules'][BOOTSTRAP_PHASE]['245$a']['count'] == 2
+    assert report['materialized']['http://bibfra.me/vocab/lite/Instance'] == 2
+    if config:
+        tasks = report['plugins'][LABELIZER]
+        assert tasks['task.init']['count'] == 1
+        assert tasks['task.marcrec']['count'] == 2
+        assert tasks['task.materialize-resource']['count'] == sum(report['materialized'].values())
+    else:
+        assert report['plugins'] == {}
+
+
+if __name__ == '__main__':
+    raise SystemExit("use py.test")
@@ -0,0 +1,48 @@
+'''
+Test matching of input fields against the transforms index
+
+Requires http://pytest.org/ e.g.:
+
+pip install pytest
+
+----
+'''
+
+import pytest
+
+from bibframe.reader import transform_index
+
+TRANSFORMS = {
+    '245': 'T',
+    '245-10': 'T-10',
+    '245-?0': 'T-?0',
+    '245-1?': 'T-1?',
+    '245$a': 'Ta',
+    '245-10$a': 'T-10a',
+    '245-?0$a': 'T-?0a',
+    '245$b': 'Tb',
+    '264-#1': 'P-#1',
+    '024$a-#1': 'never matched',
+}
+
+INDEX_CASES = [
+    (('245', '1', '0'), (['245-10', '245-?0', '245-1?', '245'], {'a': ['245-10$a', '245-?0$a', '245$a'], 'b': ['245$b']})),
+    (('245', '0', '0'), (['245-?0', '245'], {'a': ['245-?0$a', '245$a'], 'b': ['245$b']})),
+    (('245', '1', '4'), (['245-1?', '245'], {'a': ['245$a'], 'b': ['245$b']})),
+    (('264', '#', '1'), (['264-#1'], {})),
+    (('264', '#', '2'), ([], {})),
+    (('100', '1', '#'), ([], {})),
+]
+
+@pytest.mark.parametrize('field,expected', INDEX_CASES)
+def test_resolve(field, expected):
+    index = transform_index(TRANSFORMS)
+    field_matches, sf_matches = index.resolve(*field)
+    assert [ spec for (funcinfo, spec) in field_matches ] == expected[0]
+    assert { code: [ spec for (funcinfo, spec) in matches ] for code, matches in sf_matches.items() if matches } == expected[1]
+    for funcinfo, spec in field_matches:
+        assert funcinfo == TRANSFORMS[spec]
+
+
+if __name__ == '__main__':
+    raise SystemExit("use py.test")
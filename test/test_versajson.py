@@ -0,0 +1,76 @@
+'''
+Check the streaming Versa JSON writer, in standard & JSON Lines form
+
+Requires http://pytest.org/ e.g.:
+
+pip install pytest
+
+----
+'''
+
+import os
+import json
+import logging
+from io import StringIO
+
+import pytest
+
+from amara3.inputsource import inputsourcetype
+
+from versa import I
+
+from bibframe.reader import bfconvert
+from bibframe.writer import versajson
+
+
+RESOURCEPATH = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'resource'))
+
+RECORDS = [
+    [(0, (I('http://example.org/a'), I('http://bibfra.me/vocab/lite/name'), 'Zweig, Stefan', {'@target-type': '@iri-ref'})),
+     (1, (I('http://example.org/a'), I('http://bibfra.me/vocab/lite/date'), '1881-1942', {}))],
+    [],
+    [(0, (I('http://example.org/b'), I('http://bibfra.me/vocab/lite/title'), 'Schätze "des" Lebens', {'x': ['1', '2']}))],
+]
+
+
+def convert(name, **kwargs):
+    out = StringIO()
+    bfconvert([os.path.join(RESOURCEPATH, name)], out=out, logger=logging.getLogger('test_versajson'),
+                defaultsourcetype=inputsourcetype.filename, **kwargs)
+    return out.getvalue()
+
+
+@pytest.mark.parametrize('buffer_size', [1, versajson.WRITE_BUFFER_SIZE])
+def test_writer_matches_json(buffer_size):
+    out = StringIO()
+    w = versajson.writer(out, buffer_size=buffer_size)
+    w.start()
+    for record in RECORDS: w.record(record)
+    w.finish()
+    #Same as encoding each record as a list with the json module, then stringing them together
+    expected = '[' + ',\n'.join(( json.dumps(record)[1:-1] for record in RECORDS )) + ']'
+    assert out.getvalue() == expected
+
+
+@pytest.mark.parametrize('buffer_size', [1, versajson.WRITE_BUFFER_SIZE])
+def test_writer_lines(buffer_size):
+    out = StringIO()
+    w = versajson.writer(out, lines=True, buffer_size=buffer_size)
+    w.start()
+    for record in RECORDS: w.record(record)
+    w.finish()
+    lines = out.getvalue().split('\n')
+    assert lines.pop() == ''
+    assert [ json.loads(line) for line in lines ] == json.loads(json.dumps(RECORDS))
+
+
+@pytest.mark.parametrize('name', ['zweig.mrx', 'GW_bf_test10.mrx'])
+def test_jsonl_matches_array(name):
+    links = json.loads(convert(name))
+    lines = convert(name, jsonl=True).splitlines()
+    assert len(lines) > 1
+    assert [ link for line in lines for link in json.loads(line) ] == links
+
+
+if __name__ == '__main__':
+    raise SystemExit("use py.test")
@@ -0,0 +1,106 @@
+'''
+Check the incremental Versa JSON reader, & streaming conversion of Versa JSON dumps to RDF
+
+Requires http://pytest.org/ e.g.:
+
+pip install pytest
+
+----
+'''
+
+import os
+import json
+import logging
+from io import StringIO, BytesIO
+
+import pytest
+
+import rdflib
+
+from amara3.inputsource import inputsourcetype
+from versa import I
+
+from bibframe.reader import bfconvert
+from bibframe.reader.versajson import link_reader, rdfconvert
+
+
+RESOURCEPATH = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'resource'))
+
+INPUTS = [ os.path.join(RESOURCEPATH, fname) for fname in ('zweig.mrx', 'GW_bf_test10.mrx') ]
+
+EX = 'http://example.org/'
+
+LINKS = [
+    (EX + 'x', EX + 'name', 'Ünïcödé, "quoted" 1.5', {'lang': 'de'}),
+    (EX + 'x', EX + 'count', 12345, {}),
+    (EX + 'y', EX + 'name', '', {}),
+]
+
+
+def convert(**kwargs):
+    out = StringIO()
+    bfconvert(INPUTS, out=out, entbase=EX, defaultsourcetype=inputsourcetype.filename,
+                logger=logging.getLogger('test_versajson_reader'), **kwargs)
+    return out.getvalue()
+
+
+def graph(data, format):
+    g = rdflib.Graph()
+    g.parse(data=data, format=format)
+    return set(g)
+
+
+@pytest.mark.parametrize('chunk_size', [1, 2, 7, 1000])
+@pytest.mark.parametrize('binary', [False, True])
+def test_chunks(chunk_size, binary):
+    raw = json.dumps(list(enumerate(LINKS)), ensure_ascii=False)
+    lines = '\n'.join(( json.dumps([[i, link]], ensure_ascii=False) for (i, link) in enumerate(LINKS) )) + '\n[]\n'
+    for dump in (raw, lines, '  \n' + raw + '\n'):
+        stream = BytesIO(dump.encode('utf-8')) if binary else StringIO(dump)
+        assert list(link_reader(stream, chunk_size=chunk_size)) == LINKS
+    assert list(link_reader(StringIO(''))) == []
+
+
+@pytest.mark.parametrize('dump', ['[[0, ["x", "y", "z", {}]]', '[[0, ["x", "y", "z", {}]] [1]]', '{}'])
+def test_bad(dump):
+    with pytest.raises(ValueError):
+        list(link_reader(StringIO(dump), chunk_size=4))
+
+
+def test_canonical_matches_rdf(tmpdir):
+    ntout = BytesIO()
+    versaout = str(tmpdir.join('out.json'))
+    with open(versaout, 'w') as f:
+        f.write(convert(canonical=True, rdfnt=ntout, streamrdf=True))
+    expected = graph(ntout.getvalue().decode('utf-8'), 'nt')
+
+    for format in ('nt', 'turtle'):
+        out = StringIO()
+        rdfconvert([versaout], out, format=format, prefixes=[('vb', 'http://bibfra.me/vocab/lite/'), ('ent', EX)])
+        assert graph(out.getvalue(), format) == expected
+
+
+def test_parallel(tmpdir):
+    paths = []
+    for i, jsonl in enumerate((False, True, False)):
+        paths.append(str(tmpdir.join('out{0}.json'.format(i))))
+        with open(paths[-1], 'w') as f:
+            f.write(convert(jsonl=jsonl))
+    prefixes = [('vb', 'http://bibfra.me/vocab/lite/')]
+
+    serial = BytesIO()
+    rdfconvert(paths, serial, format='turtle', prefixes=prefixes)
+    parallel = BytesIO()
+    rdfconvert(paths, parallel, format='turtle', prefixes=prefixes, workers=2)
+    data = parallel.getvalue().decode('utf-8')
+    #Prefixes are only declared once
+    assert data.count('@prefix vb:') == 1
+    assert graph(data, 'turtle') == graph(serial.getvalue().decode('utf-8'), 'turtle')
+
+    #Resource types are IRIs even in raw dumps
+    types = [ o for (s, p, o) in graph(data, 'turtle') if p == rdflib.RDF.type ]
+    assert types and all(( isinstance(o, rdflib.URIRef) for o in types ))
+
+
+if __name__ == '__main__':
+    raise SystemExit("use py.test")
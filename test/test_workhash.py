@@ -0,0 +1,66 @@
+'''
+Check that taking the work hash data straight from the input gives the same work IDs as
+running the bootstrap phase through the transforms
+
+Requires http://pytest.org/ e.g.:
+
+pip install pytest
+
+----
+'''
+
+import os
+import logging
+from io import StringIO
+
+import pytest
+
+from amara3.inputsource import inputsourcetype
+from versa import I
+
+from bibframe.reader import bfconvert, transform_set, DEFAULT_TRANSFORM_IRIS
+from bibframe.reader.util import ignore, register_transforms
+from bibframe.reader.marcworkidpatterns import WORK_HASH_TRANSFORMS
+from bibframe.reader.marc import workid_links
+
+
+RESOURCEPATH = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'resource'))
+
+#The default bootstrap transforms, plus one for a field which isn't in the test records,
+#so that they're not recognized as the default & are run in full
+FULL_WORK_HASH_TRANSFORMS_ID = 'http://example.org/test#full-workhash'
+register_transforms(FULL_WORK_HASH_TRANSFORMS_ID, dict(WORK_HASH_TRANSFORMS, **{'999$9': ignore()}))
+
+FULL_BOOTSTRAP_CONFIG = {'transforms': {'bootstrap': [FULL_WORK_HASH_TRANSFORMS_ID], 'default-main': DEFAULT_TRANSFORM_IRIS}}
+
+
+def convert(fname, config=None):
+    out = StringIO()
+    bfconvert([os.path.join(RESOURCEPATH, fname)], out=out, config=config, canonical=True,
+                defaultsourcetype=inputsourcetype.filename, logger=logging.getLogger('test_workhash'))
+    return out.getvalue()
+
+
+@pytest.mark.parametrize('fname', sorted(( f for f in os.listdir(RESOURCEPATH) if f.endswith('.mrx') )))
+def test_same_ids(fname):
+    assert transform_set().workhash_only
+    with pytest.warns(RuntimeWarning):
+        assert not transform_set(FULL_BOOTSTRAP_CONFIG['transforms']).workhash_only
+        expected = convert(fname, FULL_BOOTSTRAP_CONFIG)
+    assert convert(fname) == expected
+
+
+def test_duplicates():
+    origin = I('http://example.org/work')
+    rel = I('http://bibfra.me/vocab/lite/title')
+    for unique, expected in ((False, 2), (True, 1)):
+        links = workid_links(origin, unique=unique)
+        links.add(origin, rel, 'Title')
+        links.add(origin, rel, 'Title')
+        #Links from other resources, e.g. the instance, don't go into the work hash
+        links.add(I('http://example.org/instance'), rel, 'Other')
+        assert links.workid_data() == [[rel, 'Title']] * expected
+
+
+if __name__ == '__main__':
+    raise SystemExit("use py.test")